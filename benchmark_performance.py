@@ -0,0 +1,398 @@
+"""
+Бенчмарки производительности основных этапов конвейера.
+
+Запуск: python benchmark_performance.py [имя_бенчмарка] [--rows N]
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core import (
+    CarPricePredictor,
+    DataAnalyzer,
+    DataPreprocessor,
+    EncodingConfig,
+    ModelTrainer,
+    PreprocessingConfig,
+    RegularizationPathConfig,
+    SearchConfig,
+)
+from core.linear_paths import LINEAR_PATH_MODELS, select_alphas
+from core.model_trainer import SPARSE_INPUT_MODELS
+
+
+def make_synthetic_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Создает синтетический набор данных автомобилей заданного размера."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {
+            "car_ID": np.arange(n_rows),
+            "wheelbase": rng.normal(98.0, 6.0, n_rows),
+            "enginesize": rng.integers(60, 330, n_rows),
+            "horsepower": rng.normal(104.0, 39.0, n_rows),
+            "citympg": rng.integers(13, 49, n_rows),
+            "constant": np.ones(n_rows),
+            "fueltype": rng.choice(["gas", "diesel"], n_rows),
+            "carbody": rng.choice(["sedan", "hatchback", "wagon", "hardtop", "convertible"], n_rows),
+            "price": rng.normal(13000.0, 8000.0, n_rows),
+        }
+    )
+    missing = rng.random(n_rows) < 0.05
+    frame.loc[missing, "horsepower"] = np.nan
+    frame.loc[rng.random(n_rows) < 0.05, "carbody"] = np.nan
+    return frame
+
+
+def _timed(fn, *args, repeat: int = 1):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _legacy_preprocess(dataframe: pd.DataFrame, config: PreprocessingConfig) -> pd.DataFrame:
+    """Прежняя цепочка шагов: каждый шаг отдельно сканирует скопированный кадр."""
+    df = dataframe.copy()
+    threshold = int(len(df) * config.high_missing_threshold)
+    mask = df.isna().sum()
+    df = df.drop(columns=mask[mask > threshold].index.tolist())
+    df = df.drop(columns=[c for c in config.drop_columns if c in df.columns], errors="ignore")
+    if config.drop_constant:
+        nunique = df.nunique()
+        df = df.drop(columns=nunique[nunique <= 1].index.tolist())
+    numeric_cols = df.select_dtypes(include="number").columns
+    if len(numeric_cols) > 0:
+        df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
+    for col in df.select_dtypes(exclude="number").columns:
+        if df[col].isna().any():
+            mode_values = df[col].mode()
+            df[col] = df[col].fillna(mode_values.iloc[0] if len(mode_values) else "Unknown")
+    return df
+
+
+def benchmark_preprocessing(n_rows: int) -> None:
+    """Сравнивает прежнюю цепочку шагов с однопроходным профилированием."""
+    print(f"\n=== Предобработка: {n_rows:,} строк ===")
+    frame = make_synthetic_frame(n_rows)
+    config = PreprocessingConfig(target_column="price", drop_columns=["car_ID"])
+
+    legacy_time, legacy = _timed(_legacy_preprocess, frame, config)
+    fused_time, fused = _timed(DataPreprocessor(config).preprocess, frame)
+    pd.testing.assert_frame_equal(legacy, fused)
+
+    print(f"  Прежняя цепочка:          {legacy_time:8.3f} c")
+    print(f"  Однопроходный профиль:    {fused_time:8.3f} c")
+    print(f"  Ускорение:                {legacy_time / fused_time:8.2f}x")
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _write_synthetic_csv(csv_path: str, n_rows: int) -> None:
+    make_synthetic_frame(n_rows).to_csv(csv_path, index=False)
+    # Прогреваем бинарный кэш для сценария повторного открытия
+    CarPricePredictor().load_data(csv_path)
+
+
+def _memory_worker(csv_path: str, memory_lean: bool, use_cache: bool) -> tuple[float, float]:
+    """Выполняется в отдельном процессе: загрузка + предобработка, пик RSS до и после."""
+    before = _peak_rss_mb()
+    predictor = CarPricePredictor(memory_lean=memory_lean)
+    if not use_cache:
+        predictor.loader.cache = None
+    predictor.load_data(csv_path)
+    predictor.preprocess_data(
+        PreprocessingConfig(target_column="price", drop_columns=["car_ID"])
+    )
+    return before, _peak_rss_mb()
+
+
+def benchmark_memory(n_rows: int) -> None:
+    """Сравнивает пиковый RSS загрузки и предобработки в обычном и экономном режимах."""
+    print(f"\n=== Пиковая память: {n_rows:,} строк ===")
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        print("  Модуль resource недоступен на этой платформе")
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "synthetic.csv"
+        # Данные готовятся в отдельном процессе: пик RSS наследуется дочерними процессами
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            executor.submit(_write_synthetic_csv, str(csv_path), n_rows).result()
+        print(f"  Размер CSV: {csv_path.stat().st_size / 1024 ** 2:.1f} MB")
+
+        for source, use_cache in (("разбор CSV", False), ("из кэша", True)):
+            for label, memory_lean in (("обычный", False), ("экономный", True)):
+                # Новый процесс на каждое измерение, чтобы пики не смешивались
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    before, after = executor.submit(
+                        _memory_worker, str(csv_path), memory_lean, use_cache
+                    ).result()
+                print(
+                    f"  {source:<11} {label:<10} пик RSS {after:8.1f} MB "
+                    f"(прирост {after - before:8.1f} MB)"
+                )
+
+
+def _legacy_numeric_statistics(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """Прежний вариант: каждая статистика - отдельный проход по числовому блоку."""
+    numeric_df = dataframe.select_dtypes(include="number")
+    quantiles = numeric_df.quantile([0.1, 0.25, 0.75, 0.9]).T.add_prefix("q_")
+    stats = pd.DataFrame(
+        {
+            "min": numeric_df.min(),
+            "max": numeric_df.max(),
+            "mean": numeric_df.mean(),
+            "median": numeric_df.median(),
+            "variance": numeric_df.var(),
+            "std": numeric_df.std(),
+        }
+    )
+    return stats.join(quantiles)
+
+
+def _make_numeric_frame(n_rows: int, n_columns: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n_rows, n_columns))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    return pd.DataFrame(values, columns=[f"x{i}" for i in range(n_columns)])
+
+
+def benchmark_numeric_statistics(n_rows: int) -> None:
+    """Масштабирование numeric_statistics по числу строк и столбцов."""
+    print(f"\n=== Числовая статистика: до {n_rows:,} строк ===")
+    analyzer = DataAnalyzer()
+    print(f"  {'строк':>10} {'столбцов':>9} {'прежний, c':>11} {'новый, c':>9} {'ускорение':>10}")
+    for rows in (max(n_rows // 100, 1), max(n_rows // 10, 1), n_rows):
+        for n_columns in (4, 16, 48):
+            frame = _make_numeric_frame(rows, n_columns)
+            legacy_time, legacy = _timed(_legacy_numeric_statistics, frame)
+            engine_time, engine = _timed(analyzer.numeric_statistics, frame)
+            pd.testing.assert_frame_equal(legacy, engine)
+            print(
+                f"  {rows:>10,} {n_columns:>9} {legacy_time:>11.3f} {engine_time:>9.3f} "
+                f"{legacy_time / engine_time:>9.2f}x"
+            )
+            del frame
+
+
+def _legacy_categorical_statistics(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """Прежний вариант: dropna, mode, сравнение с модой и nunique по каждому столбцу."""
+    rows = []
+    for column, series in dataframe.select_dtypes(exclude="number").items():
+        series = series.dropna()
+        mode = series.mode().iloc[0] if not series.empty else ""
+        mode_freq = (series == mode).sum() if mode != "" else 0
+        rows.append(
+            {
+                "column": column,
+                "unique_count": series.nunique(),
+                "mode": mode,
+                "mode_frequency": mode_freq,
+                "mode_percentage": mode_freq / max(len(series), 1),
+            }
+        )
+    return pd.DataFrame(rows).set_index("column")
+
+
+def benchmark_categorical_statistics(n_rows: int) -> None:
+    """Сравнивает categorical_statistics с прежним вариантом, включая столбец высокой кардинальности."""
+    print(f"\n=== Категориальная статистика: {n_rows:,} строк ===")
+    rng = np.random.default_rng(42)
+    frame = make_synthetic_frame(n_rows)
+    frame["CarName"] = pd.Series(rng.integers(0, max(n_rows // 5, 1), n_rows)).map("car {}".format)
+    frame["carbody_category"] = frame["carbody"].astype("category")
+
+    legacy_time, legacy = _timed(_legacy_categorical_statistics, frame)
+    engine_time, engine = _timed(DataAnalyzer().categorical_statistics, frame)
+    pd.testing.assert_frame_equal(legacy, engine)
+
+    print(f"  Прежний вариант:          {legacy_time:8.3f} c")
+    print(f"  Одна таблица частот:      {engine_time:8.3f} c")
+    print(f"  Ускорение:                {legacy_time / engine_time:8.2f}x")
+
+
+def benchmark_visualizations(n_rows: int) -> None:
+    """Время построения графиков по каждой точке и по агрегатам в зависимости от числа строк."""
+    print(f"\n=== Визуализации: до {n_rows:,} строк ===")
+    per_point = DataAnalyzer(large_data_rows=sys.maxsize)
+    aggregated = DataAnalyzer(large_data_rows=0)
+    print(f"  {'строк':>10} {'по точкам, c':>13} {'по агрегатам, c':>16}")
+    for rows in (max(n_rows // 100, 1), max(n_rows // 10, 1), n_rows):
+        frame = make_synthetic_frame(rows)[["price", "horsepower"]]
+        point_time, _ = _timed(per_point.build_visualizations, frame, "price")
+        binned_time, _ = _timed(aggregated.build_visualizations, frame, "price")
+        print(f"  {rows:>10,} {point_time:>13.3f} {binned_time:>16.3f}")
+
+
+def make_training_frame(n_rows: int, seed: int = 42, n_names: int = 150) -> pd.DataFrame:
+    """Очищенный набор для обучения: синтетические признаки и CarName на n_names значений."""
+    rng = np.random.default_rng(seed)
+    frame = DataPreprocessor(
+        PreprocessingConfig(target_column="price", drop_columns=["car_ID"])
+    ).preprocess(make_synthetic_frame(n_rows, seed))
+    frame["CarName"] = pd.Series(rng.integers(0, n_names, n_rows)).map("car {}".format)
+    return frame
+
+
+def benchmark_training(n_rows: int) -> None:
+    """Доля подготовки признаков в обучении: прежде она повторялась для каждой модели."""
+    print(f"\n=== Обучение моделей: {n_rows:,} строк ===")
+    frame = make_training_frame(n_rows)
+    trainer = ModelTrainer(target_column="price")
+    X = frame.drop(columns=["price"])
+    n_models = len(trainer._build_models(int(len(X) * 0.8), 42, 50))
+
+    def prepare():
+        preprocessor = trainer._build_preprocessor(X)
+        preprocessor.fit_transform(X.iloc[: int(len(X) * 0.8)])
+        preprocessor.transform(X.iloc[int(len(X) * 0.8):])
+
+    prepare_time, _ = _timed(prepare, repeat=3)
+    train_time, results = _timed(trainer.train, frame, 0.2, 42, 50)
+    print(f"  Моделей:                          {len(results)}")
+    print(f"  Подготовка признаков (один раз):  {prepare_time:8.3f} c")
+    print(f"  Прежде (на каждую модель):        {prepare_time * n_models:8.3f} c")
+    print(f"  Обучение всех моделей:            {train_time:8.3f} c")
+    workers = os.cpu_count() or 1
+    if workers > 1:
+        parallel_time, _ = _timed(ModelTrainer("price", n_jobs=workers).train, frame, 0.2, 42, 50)
+        print(f"  Параллельно ({workers} процессов):       {parallel_time:8.3f} c")
+
+
+def _matrix_nbytes(matrix) -> int:
+    if hasattr(matrix, "indptr"):
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    return matrix.nbytes
+
+
+def benchmark_sparse_training(n_rows: int) -> None:
+    """Линейные модели и SVR на плотном и разреженном One-Hot при широком CarName."""
+    n_names = max(n_rows // 2, 150)
+    print(f"\n=== Разреженные признаки: {n_rows:,} строк, {n_names:,} значений CarName ===")
+    frame = make_training_frame(n_rows, n_names=n_names)
+    X = frame.drop(columns=["price"])
+    y = frame["price"]
+    split = int(len(X) * 0.8)
+
+    for sparse_output in (False, True):
+        label = "CSR" if sparse_output else "Плотная"
+        features = ModelTrainer._prepare_features(
+            ModelTrainer._build_preprocessor(X, sparse_output),
+            X.iloc[:split], X.iloc[split:], y.iloc[:split], y.iloc[split:],
+        )
+        models = ModelTrainer._build_models(split, 42, 50)
+        start = time.perf_counter()
+        for name in SPARSE_INPUT_MODELS & models.keys():
+            models[name].fit(features.X_train, features.y_train)
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {label:8s} матрица {features.X_train.shape[1]:6d} столбцов, "
+            f"{_matrix_nbytes(features.X_train) / 1024 ** 2:8.1f} MB, линейные + SVR {elapsed:7.3f} c"
+        )
+
+
+def benchmark_boosting(n_rows: int) -> None:
+    """Обучение всех моделей с GradientBoostingRegressor и с HistGradientBoostingRegressor."""
+    print(f"\n=== Движки бустинга: {n_rows:,} строк ===")
+    frame = make_training_frame(n_rows)
+    for engine, name in (("histogram", "hist_gradient_boosting"), ("exact", "gradient_boosting")):
+        trainer = ModelTrainer(target_column="price", boosting=engine)
+        elapsed, results = _timed(trainer.train, frame, 0.2, 42, 10)
+        print(f"  {engine:10s} все модели {elapsed:8.2f} c, R² {name}: {results[name].metrics['r2']:.4f}")
+
+
+def benchmark_search(n_rows: int) -> None:
+    """Successive halving против оценки тех же кандидатов сразу на полном ресурсе."""
+    print(f"\n=== Подбор гиперпараметров: {n_rows:,} строк ===")
+    frame = make_training_frame(n_rows)
+    X = frame.drop(columns=["price"])
+    y = frame["price"]
+    trainer = ModelTrainer(target_column="price")
+    n_candidates = SearchConfig().n_candidates
+    # factor больше числа кандидатов - один раунд, все кандидаты на полном ресурсе
+    for label, factor in (("halving", 3), ("полный перебор", n_candidates + 1)):
+        models = trainer._build_models(len(X), 42, 100)
+        elapsed, best = _timed(
+            trainer._search_hyperparameters, models, X, y, SearchConfig(factor=factor),
+            EncodingConfig(), 42, 1, None, lambda percent: None,
+        )
+        print(f"  {label:16s} {elapsed:8.2f} c, R² random_forest {best['random_forest'][1]:.4f}")
+
+
+def benchmark_linear_paths(n_rows: int) -> None:
+    """Пути регуляризации трех линейных семейств против одиночных обучений с фиксированным alpha."""
+    print(f"\n=== Пути регуляризации: {n_rows:,} строк ===")
+    frame = make_training_frame(n_rows)
+    X = frame.drop(columns=["price"])
+    split = int(len(X) * 0.8)
+    features = ModelTrainer._prepare_features(
+        ModelTrainer._build_preprocessor(X, sparse_output=True),
+        X.iloc[:split], X.iloc[split:], frame["price"].iloc[:split], frame["price"].iloc[split:],
+    )
+    models = ModelTrainer._build_models(split, 42, 10)
+    linear = {name: models[name] for name in LINEAR_PATH_MODELS}
+
+    def single_fits():
+        for model in linear.values():
+            model.fit(features.X_train, features.y_train_values)
+
+    single_time, _ = _timed(single_fits)
+    config = RegularizationPathConfig()
+    path_time, selected = _timed(select_alphas, linear, features.X_train, features.y_train_values, config)
+    n_fits = config.n_alphas * (2 + len(config.l1_ratios))
+    print(f"  Матрица признаков:          {features.X_train.shape[1]} столбцов")
+    print(f"  Ridge, Lasso, ElasticNet:   {single_time:8.2f} c (по одному alpha)")
+    print(f"  Пути регуляризации:         {path_time:8.2f} c ({n_fits} моделей)")
+    for name, (params, score) in selected.items():
+        print(f"    {name:12s} {params}, R² {score:.4f}")
+
+
+BENCHMARKS = {
+    "preprocessing": (benchmark_preprocessing, 10_000_000),
+    "memory": (benchmark_memory, 2_000_000),
+    "numeric_statistics": (benchmark_numeric_statistics, 1_000_000),
+    "categorical_statistics": (benchmark_categorical_statistics, 1_000_000),
+    "visualizations": (benchmark_visualizations, 2_000_000),
+    "training": (benchmark_training, 4_000),
+    "sparse_training": (benchmark_sparse_training, 4_000),
+    "boosting": (benchmark_boosting, 100_000),
+    "search": (benchmark_search, 3_000),
+    "linear_paths": (benchmark_linear_paths, 200_000),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("names", nargs="*", help="Бенчмарки для запуска (по умолчанию все)")
+    parser.add_argument("--rows", type=int, default=None, help="Число строк синтетических данных")
+    args = parser.parse_args()
+
+    for name in args.names or BENCHMARKS:
+        fn, default_rows = BENCHMARKS[name]
+        fn(args.rows or default_rows)
+
+
+if __name__ == "__main__":
+    main()
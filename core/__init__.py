@@ -1,19 +1,38 @@
 """Основные компоненты анализа данных для CarMLAnalysis."""
 
+from .data_cache import DatasetCache
 from .data_loader import DataLoader
 from .data_preprocessor import DataPreprocessor, PreprocessingConfig
 from .data_analyzer import DataAnalyzer, VisualizationArtifacts
-from .model_trainer import ModelTrainer, ModelTrainingResult
+from .encoders import EncodingConfig, FrequencyEncoder, HashingEncoder
+from .hyperparameter_search import SearchConfig
+from .linear_paths import RegularizationPathConfig
+from .model_trainer import CrossValidationResult, ModelProfile, ModelTrainer, ModelTrainingResult
+from .preprocessing_cache import PreprocessingCache
+from .streaming_stats import CategoricalAccumulator, NumericAccumulator
+from .training_budget import TrainingBudget
 from .car_price_predictor import CarPricePredictor
 
 __all__ = [
     "DataLoader",
+    "DatasetCache",
     "DataPreprocessor",
     "PreprocessingConfig",
+    "PreprocessingCache",
     "DataAnalyzer",
     "VisualizationArtifacts",
+    "NumericAccumulator",
+    "CategoricalAccumulator",
+    "EncodingConfig",
+    "HashingEncoder",
+    "FrequencyEncoder",
     "ModelTrainer",
     "ModelTrainingResult",
+    "CrossValidationResult",
+    "ModelProfile",
+    "SearchConfig",
+    "RegularizationPathConfig",
+    "TrainingBudget",
     "CarPricePredictor",
 ]
 
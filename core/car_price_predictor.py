@@ -1,38 +1,132 @@
 from __future__ import annotations
 
+import multiprocessing
+import os
+import pickle
+import threading
+import weakref
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 import pandas as pd
 
-from .data_analyzer import DataAnalyzer, VisualizationArtifacts
+from .correlation import correlation_matrix
+from .data_analyzer import (
+    DataAnalyzer,
+    VisualizationArtifacts,
+    render_correlation_heatmap,
+    render_price_boxplot,
+    render_price_histogram,
+)
 from .data_loader import DataLoader, DataSummary
 from .data_preprocessor import DataPreprocessor, PreprocessingConfig
+from .encoders import EncodingConfig
+from .hyperparameter_search import SearchConfig
+from .linear_paths import RegularizationPathConfig
 from .model_trainer import ModelTrainer, ModelTrainingResult
+from .preprocessing_cache import PreprocessingCache
+from .training_budget import TrainingBudget
 
 
 @dataclass
 class AnalysisArtifacts:
     numeric_stats_path: Optional[Path] = None
     categorical_stats_path: Optional[Path] = None
+    correlation_path: Optional[Path] = None
     visualizations: Optional[VisualizationArtifacts] = None
 
 
+# Потоки для статистики и корреляций (NumPy и pandas отпускают GIL в тяжелых операциях)
+ANALYSIS_THREADS = 4
+
+
+class _StageProgress:
+    """Сообщает в progress_callback процент завершенных этапов анализа."""
+
+    def __init__(self, total: int, callback: Optional[Callable[[int], None]]) -> None:
+        self.total = total
+        self.callback = callback
+        self.done = 0
+        self._lock = threading.Lock()
+
+    def advance(self) -> None:
+        with self._lock:
+            self.done += 1
+            percent = int(100 * self.done / self.total)
+        if self.callback is not None:
+            self.callback(min(percent, 99))
+
+    def wrap(self, fn: Callable) -> Callable:
+        def stage(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            self.advance()
+            return result
+
+        return stage
+
+
+def enable_copy_on_write() -> None:
+    """Включает copy-on-write pandas (в pandas >= 3.0 он всегда включен)."""
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def copy_on_write_enabled() -> bool:
+    return int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
 class CarPricePredictor:
     """Координирует полный аналитический конвейер."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        memory_lean: bool = False,
+        preprocessing_cache: Optional[PreprocessingCache] = None,
+    ) -> None:
+        """
+        memory_lean включает экономный режим: pandas работает в copy-on-write,
+        загрузчик не делает защитную копию, поэтому одновременно в памяти
+        живут только сырой (raw_df) и очищенный (cleaned_df) кадры.
+
+        preprocessing_cache хранит результаты предобработки по хэшу данных
+        и параметров; по умолчанию используется кэш только в памяти.
+        """
+        self.memory_lean = memory_lean
+        if memory_lean:
+            enable_copy_on_write()
         self.loader = DataLoader()
         self.preprocessor = DataPreprocessor()
         self.analyzer = DataAnalyzer()
         self.trainer = ModelTrainer()
+        self.preprocessing_cache = (
+            preprocessing_cache if preprocessing_cache is not None else PreprocessingCache()
+        )
+        self.preprocessing_cache_hit = False
         self.raw_df: Optional[pd.DataFrame] = None
         self.cleaned_df: Optional[pd.DataFrame] = None
         self.analysis_artifacts: Optional[AnalysisArtifacts] = None
+        self._correlation_source: Optional[weakref.ref] = None
+        # Рендеринг в процессах имеет смысл, только если есть больше одного ядра
+        self.render_in_processes = (os.cpu_count() or 1) > 1
+        self._render_pool: Optional[ProcessPoolExecutor] = None
 
-    def load_data(self, path: str | Path) -> DataSummary:
-        self.raw_df = self.loader.load_csv(path)
+    def load_data(
+        self,
+        path: str | Path,
+        chunksize: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        optimize_memory: bool = False,
+    ) -> DataSummary:
+        self.raw_df = self.loader.load_csv(
+            path,
+            chunksize=chunksize,
+            progress_callback=progress_callback,
+            optimize_memory=optimize_memory,
+            copy=not self.memory_lean,
+        )
         return self.loader.describe()
 
     def preprocess_data(
@@ -40,52 +134,213 @@ class CarPricePredictor:
     ) -> pd.DataFrame:
         if self.raw_df is None:
             raise ValueError("Load data before preprocessing.")
-        if config:
-            self.preprocessor = DataPreprocessor(config)
-        self.cleaned_df = self.preprocessor.preprocess(self.raw_df)
+        config = config or self.preprocessor.config
+        self.preprocessor = DataPreprocessor(config)
+
+        key = self.preprocessing_cache.key(self.raw_df, config)
+        cached = self.preprocessing_cache.get(key)
+        self.preprocessing_cache_hit = cached is not None
+        if cached is not None:
+            self.preprocessor.state = cached.state
+            # Без copy-on-write изменение cleaned_df на месте испортило бы запись кэша
+            cleaned = cached.frame if copy_on_write_enabled() else cached.frame.copy()
+            self.preprocessor.cleaned_frame = cleaned
+        else:
+            cleaned = self.preprocessor.preprocess(self.raw_df)
+            self.preprocessing_cache.put(
+                key, self.preprocessor.state, cleaned, copy=not copy_on_write_enabled()
+            )
+        self.cleaned_df = cleaned
         self.trainer.target_column = self.preprocessor.config.target_column
         return self.cleaned_df
 
     def analyze(
-        self, output_dir: str | Path, target_column: Optional[str] = None
+        self,
+        output_dir: str | Path,
+        target_column: Optional[str] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
     ) -> AnalysisArtifacts:
+        """
+        Считает статистику и строит графики, выполняя независимые этапы одновременно.
+
+        Числовая и категориальная статистика и матрица корреляций (NumPy)
+        считаются в пуле потоков, графики рендерятся в пуле процессов (или в
+        потоках, если процессы недоступны). progress_callback получает процент
+        завершенных этапов.
+        """
         if self.cleaned_df is None:
             raise ValueError("Preprocess data before running analysis.")
         out_dir = Path(output_dir)
         out_dir.mkdir(parents=True, exist_ok=True)
 
+        dataframe = self.cleaned_df
+        target = target_column or self.preprocessor.config.target_column
         numeric_path = out_dir / "numeric_statistics.csv"
         categorical_path = out_dir / "categorical_statistics.csv"
+        correlation_path: Optional[Path] = out_dir / "correlation_matrix.csv"
 
-        self.analyzer.numeric_statistics(self.cleaned_df, numeric_path)
-        self.analyzer.categorical_statistics(self.cleaned_df, categorical_path)
+        price_series = None
+        if not dataframe.empty and target in dataframe.columns:
+            price_series = dataframe[target].dropna()
+            if price_series.empty:
+                price_series = None
+        plots = price_series is not None
 
-        visualizations = self.analyzer.build_visualizations(
-            self.cleaned_df,
-            target_column or self.preprocessor.config.target_column,
-        )
+        progress = _StageProgress(6 if plots else 2, progress_callback)
+        visualizations = VisualizationArtifacts()
+        with ThreadPoolExecutor(max_workers=ANALYSIS_THREADS) as threads:
+            numeric_future = threads.submit(
+                progress.wrap(self.analyzer.numeric_statistics), dataframe, numeric_path
+            )
+            categorical_future = threads.submit(
+                progress.wrap(self.analyzer.categorical_statistics), dataframe, categorical_path
+            )
+
+            if plots:
+                renderer = self._render_executor(threads)
+                large_data = len(price_series) >= self.analyzer.large_data_rows
+                renders = {
+                    "price_hist": (render_price_histogram, (price_series, large_data)),
+                    "price_box": (render_price_boxplot, (price_series, large_data)),
+                }
+                render_futures = {
+                    name: self._submit_render(renderer, threads, fn, args)
+                    for name, (fn, args) in renders.items()
+                }
+
+                correlation = progress.wrap(self._correlation_stage)(dataframe, correlation_path)
+                visualizations.correlation = correlation
+                heatmap = self.analyzer.heatmap_matrix(correlation, target)
+                if heatmap is not None:
+                    renders["correlation_heatmap"] = (render_correlation_heatmap, heatmap)
+                    render_futures["correlation_heatmap"] = self._submit_render(
+                        renderer, threads, render_correlation_heatmap, heatmap
+                    )
+                else:
+                    progress.advance()
+
+                for name, future in render_futures.items():
+                    fn, args = renders[name]
+                    setattr(visualizations, name, self._render_result(future, threads, fn, args))
+                    progress.advance()
+            else:
+                correlation_path = None
+
+            numeric_future.result()
+            categorical_future.result()
 
         self.analysis_artifacts = AnalysisArtifacts(
             numeric_stats_path=numeric_path,
             categorical_stats_path=categorical_path,
+            correlation_path=correlation_path,
             visualizations=visualizations,
         )
         return self.analysis_artifacts
 
+    def _correlation_stage(self, dataframe: pd.DataFrame, path: Path) -> pd.DataFrame:
+        """Матрица корреляций; переиспользуется, пока очищенный кадр тот же."""
+        previous = self.analysis_artifacts
+        if (
+            previous is not None
+            and previous.visualizations is not None
+            and previous.visualizations.correlation is not None
+            and self._correlation_source is not None
+            and self._correlation_source() is dataframe
+        ):
+            correlation = previous.visualizations.correlation
+        else:
+            correlation = correlation_matrix(dataframe)
+        correlation.to_csv(path, index=True)
+        self._correlation_source = weakref.ref(dataframe)
+        return correlation
+
+    def _render_executor(self, fallback: ThreadPoolExecutor) -> Executor:
+        """Пул процессов для рендеринга (создается один раз) или пул потоков."""
+        if not self.render_in_processes:
+            return fallback
+        if self._render_pool is None:
+            try:
+                self._render_pool = ProcessPoolExecutor(
+                    max_workers=min(3, os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, ValueError, NotImplementedError):
+                self.render_in_processes = False
+                return fallback
+        return self._render_pool
+
+    def _submit_render(
+        self, renderer: Executor, fallback: ThreadPoolExecutor, fn: Callable[..., bytes], args: tuple
+    ) -> Future:
+        try:
+            return renderer.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self.shutdown()
+            self.render_in_processes = False
+            return fallback.submit(fn, *args)
+
+    def _render_result(
+        self, future: Future, fallback: ThreadPoolExecutor, fn: Callable[..., bytes], args: tuple
+    ) -> bytes:
+        """Результат рендеринга; при сбое пула процессов график строится в потоке."""
+        try:
+            return future.result()
+        except (BrokenProcessPool, OSError, pickle.PicklingError):
+            self.shutdown()
+            self.render_in_processes = False
+            return fallback.submit(fn, *args).result()
+
+    def shutdown(self) -> None:
+        """Останавливает пул процессов рендеринга."""
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=False, cancel_futures=True)
+            self._render_pool = None
+
     def train_models(
         self,
         test_size: float = 0.2,
         random_state: int = 42,
         rf_estimators: int = 300,
+        n_jobs: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        encoding: Optional[EncodingConfig] = None,
+        boosting: Optional[str] = None,
+        budget: Optional[TrainingBudget] = None,
+        cv_folds: Optional[int] = None,
+        search: Optional[SearchConfig] = None,
+        paths: Optional[RegularizationPathConfig] = None,
+        profile_memory: Optional[bool] = None,
     ) -> dict[str, ModelTrainingResult]:
+        """
+        n_jobs - число процессов обучения, encoding - кодирование категорий
+        с большим числом значений, boosting - движок градиентного бустинга,
+        budget - лимиты времени и памяти на модель (None - значения из
+        ModelTrainer). Пропущенные по лимитам модели - в trainer.skipped.
+        cv_folds >= 2 добавляет к результатам метрики k-fold кросс-валидации,
+        search включает подбор гиперпараметров, paths - выбор alpha линейных
+        моделей по путям регуляризации (best_params в результатах),
+        profile_memory - замер пика памяти обучения в профиле моделей.
+        """
         if self.cleaned_df is None:
             raise ValueError("Preprocess data before training models.")
-        return self.trainer.train(
+        results = self.trainer.train(
             self.cleaned_df,
             test_size=test_size,
             random_state=random_state,
             rf_estimators=rf_estimators,
+            n_jobs=n_jobs,
+            progress_callback=progress_callback,
+            encoding=encoding,
+            boosting=boosting,
+            budget=budget,
+            cv_folds=cv_folds,
+            search=search,
+            paths=paths,
+            profile_memory=profile_memory,
         )
+        for result in results.values():
+            result.preprocessing = self.preprocessor.state
+        return results
 
     def predict(self, input_data: pd.DataFrame, model_name: str) -> pd.DataFrame:
         """
@@ -98,32 +353,30 @@ class CarPricePredictor:
         if input_data.empty:
             raise ValueError("Input data is empty.")
         
-        # Убираем target_column из входных данных, если он есть
-        data_for_prediction = input_data.copy()
-        if self.trainer.target_column in data_for_prediction.columns:
-            data_for_prediction = data_for_prediction.drop(columns=[self.trainer.target_column])
+        # Убираем target_column из входных данных, если он есть (drop не меняет input_data)
+        data_for_prediction = input_data.drop(
+            columns=[self.trainer.target_column], errors="ignore"
+        )
         
         predictions = self.trainer.predict(model_name, data_for_prediction)
-        result = input_data.copy()
-        result["predicted_price"] = predictions
-        return result
+        return input_data.assign(predicted_price=predictions)
     
     def predict_raw(self, input_data: pd.DataFrame, model_name: str) -> pd.DataFrame:
         """
         Выполняет предсказания на сырых данных.
-        Автоматически применяет ту же предобработку,
-        что была использована при обучении.
+        Применяет предобработку, обученную на тренировочных данных
+        (удаленные столбцы, медианы и моды), без пересчета статистик.
         """
         if input_data.empty:
             raise ValueError("Input data is empty.")
         
-        if self.cleaned_df is None:
+        if not self.preprocessor.is_fitted:
             raise ValueError(
                 "Сначала нужно выполнить preprocess_data для настройки предобработчика."
             )
         
         # Применяем ту же предобработку
-        processed_data = self.preprocessor.preprocess(input_data)
+        processed_data = self.preprocessor.transform(input_data)
         
         # Выполняем предсказание
         return self.predict(processed_data, model_name)
@@ -132,5 +385,14 @@ class CarPricePredictor:
         return self.trainer.save_model(model_name, path)
 
     def load_model(self, path: str | Path) -> ModelTrainingResult:
-        return self.trainer.load_model(path)
+        result = self.trainer.load_model(path)
+        # Модель несет с собой обученную предобработку - восстанавливаем ее
+        state = getattr(result, "preprocessing", None)
+        if state is not None:
+            self.preprocessor = DataPreprocessor(
+                PreprocessingConfig(target_column=state.target_column)
+            )
+            self.preprocessor.state = state
+            self.trainer.target_column = state.target_column
+        return result
 
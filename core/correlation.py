@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .streaming_stats import numeric_block
+
+# Ограничение памяти на один блок строк (float64 до перевода в float32)
+BLOCK_BYTES = 64 * 1024 ** 2
+
+
+def correlation_matrix(
+    dataframe: pd.DataFrame, block_bytes: int = BLOCK_BYTES
+) -> pd.DataFrame:
+    """
+    Матрица корреляций Пирсона числовых столбцов, посчитанная блоками строк.
+
+    Первый проход находит средние, второй накапливает произведения
+    центрированных значений: каждый блок переводится в float32 и умножается
+    одной матричной операцией, суммы блоков копятся в float64. Память
+    ограничена размером блока и матрицей k x k. Пропуски заменяются средним
+    столбца (в отличие от попарного исключения в DataFrame.corr).
+    """
+    numeric_df = dataframe.select_dtypes(include="number")
+    n_rows, n_columns = numeric_df.shape
+    if n_columns == 0:
+        return pd.DataFrame(index=numeric_df.columns, columns=numeric_df.columns, dtype=np.float64)
+    step = max(block_bytes // (8 * n_columns), 1024)
+
+    sums = np.zeros(n_columns)
+    counts = np.zeros(n_columns, dtype=np.int64)
+    for start in range(0, n_rows, step):
+        block = numeric_block(numeric_df.iloc[start:start + step])
+        missing = np.isnan(block)
+        sums += np.where(missing, 0.0, block).sum(axis=1)
+        counts += block.shape[1] - missing.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+    products = np.zeros((n_columns, n_columns))
+    for start in range(0, n_rows, step):
+        centered = numeric_block(numeric_df.iloc[start:start + step])
+        centered -= means[:, None]
+        centered[np.isnan(centered)] = 0.0
+        centered = centered.astype(np.float32)
+        products += centered @ centered.T
+
+    norms = np.sqrt(np.diag(products))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = products / np.outer(norms, norms)
+    # Постоянные столбцы не коррелируют ни с чем, как у DataFrame.corr
+    constant = ~(norms > 0)
+    matrix[constant, :] = np.nan
+    matrix[:, constant] = np.nan
+    np.clip(matrix, -1.0, 1.0, out=matrix)
+    np.fill_diagonal(matrix, np.where(constant, np.nan, 1.0))
+    return pd.DataFrame(matrix, index=numeric_df.columns, columns=numeric_df.columns)
+
+
+def top_correlated(
+    correlation: pd.DataFrame, target_column: str, k: int
+) -> Optional[pd.DataFrame]:
+    """Подматрица из целевого столбца и k признаков с наибольшей |корреляцией| с ним."""
+    if target_column not in correlation.columns:
+        return None
+    strength = correlation[target_column].drop(target_column).abs().dropna()
+    selected = [target_column] + strength.nlargest(k).index.tolist()
+    return correlation.loc[selected, selected]
@@ -1,83 +1,137 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
-import matplotlib.pyplot as plt
+import matplotlib
+import numpy as np
 import pandas as pd
 import seaborn as sns
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 
-from utils import MatplotlibStyler
+from utils import FigureConverter, MatplotlibStyler
+
+from .correlation import correlation_matrix, top_correlated
+from .streaming_stats import CategoricalAccumulator, NumericAccumulator
+
+NUMERIC_QUANTILES = (0.1, 0.25, 0.75, 0.9)
+# С этого числа строк графики строятся по агрегатам, а не по каждой точке
+LARGE_DATA_ROWS = 100_000
+HISTOGRAM_BINS = 64
+KDE_BINS_PER_BAR = 16
+KDE_GRID_SIZE = 256
+# Шире этого тепловая карта показывает только признаки, сильнее всего связанные с целью
+CORRELATION_FULL_MAX_COLUMNS = 50
+CORRELATION_TOP_K = 20
+# Axes.bxp принимает orientation с matplotlib 3.10; vert в новых версиях устарел
+BXP_HORIZONTAL = (
+    {"orientation": "horizontal"}
+    if tuple(int(part) for part in matplotlib.__version__.split(".")[:2]) >= (3, 10)
+    else {"vert": False}
+)
 
 
 @dataclass
 class VisualizationArtifacts:
-    price_hist: Optional[plt.Figure] = None
-    price_box: Optional[plt.Figure] = None
-    correlation_heatmap: Optional[plt.Figure] = None
+    """Готовые изображения графиков в формате PNG (GUI только декодирует их)."""
+
+    price_hist: Optional[bytes] = None
+    price_box: Optional[bytes] = None
+    correlation_heatmap: Optional[bytes] = None
+    # Полная матрица корреляций, по которой построена тепловая карта
+    correlation: Optional[pd.DataFrame] = None
 
 
 class DataAnalyzer:
     """Генерирует описательную статистику и визуализации."""
 
-    def __init__(self) -> None:
-        MatplotlibStyler.apply()
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        large_data_rows: int = LARGE_DATA_ROWS,
+        correlation_top_k: Optional[int] = None,
+    ) -> None:
+        """
+        correlation_top_k ограничивает тепловую карту целевым столбцом и k
+        признаками с наибольшей |корреляцией| с ним; при None режим включается
+        сам, если числовых столбцов больше CORRELATION_FULL_MAX_COLUMNS.
+        """
+        # max_workers=1 отключает параллельный расчет статистики по столбцам
+        self.max_workers = max_workers
+        self.large_data_rows = large_data_rows
+        self.correlation_top_k = correlation_top_k
+        _ensure_style()
+
+    def numeric_accumulator(self, quantile_capacity: Optional[int] = None) -> NumericAccumulator:
+        """
+        Накопитель числовой статистики для порций данных.
+
+        update(chunk) добавляет строки, merge объединяет накопители разных
+        потоков или файлов; результат выводит numeric_statistics(accumulator).
+        """
+        return NumericAccumulator(quantile_capacity=quantile_capacity)
+
+    def categorical_accumulator(self, capacity: Optional[int] = None) -> CategoricalAccumulator:
+        """Накопитель таблиц частот нечисловых столбцов (см. numeric_accumulator)."""
+        return CategoricalAccumulator(capacity=capacity, max_workers=self.max_workers)
 
     def numeric_statistics(
-        self, dataframe: pd.DataFrame, output_path: Optional[Path] = None
+        self,
+        dataframe: pd.DataFrame | NumericAccumulator,
+        output_path: Optional[Path] = None,
     ) -> pd.DataFrame:
-        numeric_df = dataframe.select_dtypes(include="number")
-        quantiles = numeric_df.quantile([0.1, 0.25, 0.75, 0.9]).T.add_prefix("q_")
-        stats = pd.DataFrame(
-            {
-                "min": numeric_df.min(),
-                "max": numeric_df.max(),
-                "mean": numeric_df.mean(),
-                "median": numeric_df.median(),
-                "variance": numeric_df.var(),
-                "std": numeric_df.std(),
-            }
-        )
-        stats = stats.join(quantiles)
+        """
+        Описательная статистика числовых столбцов.
+
+        Числовой блок извлекается один раз в непрерывный массив float64, после
+        чего одна сортировка дает медиану и все квантили. Вместо DataFrame
+        можно передать накопитель, собранный по порциям.
+        """
+        accumulator = dataframe
+        if isinstance(dataframe, pd.DataFrame):
+            accumulator = self.numeric_accumulator().update(dataframe)
+        stats = accumulator.statistics(NUMERIC_QUANTILES)
         if output_path:
             stats.to_csv(output_path, index=True)
         return stats
 
     def categorical_statistics(
-        self, dataframe: pd.DataFrame, output_path: Optional[Path] = None
+        self,
+        dataframe: pd.DataFrame | CategoricalAccumulator,
+        output_path: Optional[Path] = None,
     ) -> pd.DataFrame:
-        categorical_df = dataframe.select_dtypes(exclude="number")
-        rows = []
-        for column in categorical_df.columns:
-            series = categorical_df[column].dropna()
-            if not series.empty:
-                mode_values = series.mode()
-                mode = mode_values.iloc[0] if len(mode_values) > 0 else ""
-                mode_freq = (series == mode).sum() if mode != "" else 0
-            else:
-                mode = ""
-                mode_freq = 0
-            
-            rows.append(
-                {
-                    "column": column,
-                    "unique_count": series.nunique(),
-                    "mode": mode,
-                    "mode_frequency": mode_freq,
-                    "mode_percentage": mode_freq / max(len(series), 1),
-                }
-            )
-        stats = pd.DataFrame(rows)
-        if len(stats) > 0:
-            stats = stats.set_index("column")
+        """
+        Уникальные значения и мода нечисловых столбцов.
+
+        По каждому столбцу строится одна таблица частот (bincount кодов для
+        category, value_counts для остальных); столбцы обрабатываются параллельно.
+        """
+        accumulator = dataframe
+        if isinstance(dataframe, pd.DataFrame):
+            accumulator = self.categorical_accumulator().update(dataframe)
+        stats = accumulator.statistics()
         if output_path:
             stats.to_csv(output_path, index=True)
         return stats
 
     def build_visualizations(
-        self, dataframe: pd.DataFrame, target_column: str
+        self,
+        dataframe: pd.DataFrame,
+        target_column: str,
+        correlation: Optional[pd.DataFrame] = None,
     ) -> VisualizationArtifacts:
+        """
+        Строит графики и сразу кодирует их в PNG.
+
+        Фигуры создаются через объектный интерфейс Matplotlib с холстом Agg,
+        без pyplot и его глобального реестра фигур, поэтому метод безопасно
+        вызывать из рабочего потока. Начиная с large_data_rows строк гистограмма,
+        KDE и boxplot рисуются по заранее посчитанным бинам и квартилям.
+        Ранее посчитанную матрицу correlation можно передать для повторного использования.
+        """
         artifacts = VisualizationArtifacts()
         if dataframe.empty:
             return artifacts
@@ -89,22 +143,130 @@ class DataAnalyzer:
         if price_series.empty:
             return artifacts
 
-        fig_hist, ax_hist = plt.subplots(figsize=(8, 4))
-        sns.histplot(price_series, kde=True, ax=ax_hist)
-        ax_hist.set_title("Price Distribution")
-        artifacts.price_hist = fig_hist
-
-        fig_box, ax_box = plt.subplots(figsize=(6, 4))
-        sns.boxplot(x=price_series, ax=ax_box)
-        ax_box.set_title("Price Boxplot")
-        artifacts.price_box = fig_box
+        large_data = len(price_series) >= self.large_data_rows
+        artifacts.price_hist = render_price_histogram(price_series, large_data)
+        artifacts.price_box = render_price_boxplot(price_series, large_data)
 
-        numeric_df = dataframe.select_dtypes(include="number")
-        if numeric_df.shape[1] > 1:
-            fig_corr, ax_corr = plt.subplots(figsize=(8, 6))
-            sns.heatmap(numeric_df.corr(), annot=False, cmap="coolwarm", ax=ax_corr)
-            ax_corr.set_title("Correlation Heatmap")
-            artifacts.correlation_heatmap = fig_corr
+        if correlation is None:
+            correlation = correlation_matrix(dataframe)
+        artifacts.correlation = correlation
+        heatmap = self.heatmap_matrix(correlation, target_column)
+        if heatmap is not None:
+            artifacts.correlation_heatmap = render_correlation_heatmap(*heatmap)
 
         return artifacts
 
+    def heatmap_matrix(
+        self, correlation: pd.DataFrame, target_column: str
+    ) -> Optional[tuple[pd.DataFrame, str]]:
+        """Часть матрицы корреляций для тепловой карты и ее заголовок (top-k на широких данных)."""
+        if correlation.shape[1] <= 1:
+            return None
+        top_k = self.correlation_top_k
+        if top_k is None and correlation.shape[1] > CORRELATION_FULL_MAX_COLUMNS:
+            top_k = CORRELATION_TOP_K
+        top = top_correlated(correlation, target_column, top_k) if top_k else None
+        if top is not None:
+            return top, f"Top {len(top) - 1} Correlations with {target_column}"
+        return correlation, "Correlation Heatmap"
+
+
+# Функции отрисовки - модульные, чтобы их можно было выполнять в пуле процессов
+
+def render_price_histogram(price_series: pd.Series, large_data: bool) -> bytes:
+    _ensure_style()
+    figure = Figure(figsize=(8, 4))
+    ax = figure.subplots()
+    if large_data:
+        _binned_histplot(ax, price_series)
+    else:
+        sns.histplot(price_series, kde=True, ax=ax)
+    ax.set_title("Price Distribution")
+    return FigureConverter.to_png(figure)
+
+
+def render_price_boxplot(price_series: pd.Series, large_data: bool) -> bytes:
+    _ensure_style()
+    figure = Figure(figsize=(6, 4))
+    ax = figure.subplots()
+    if large_data:
+        _quantile_boxplot(ax, price_series)
+    else:
+        sns.boxplot(x=price_series, ax=ax)
+    ax.set_title("Price Boxplot")
+    return FigureConverter.to_png(figure)
+
+
+def render_correlation_heatmap(matrix: pd.DataFrame, title: str) -> bytes:
+    _ensure_style()
+    figure = Figure(figsize=(8, 6))
+    ax = figure.subplots()
+    sns.heatmap(matrix, annot=False, cmap="coolwarm", ax=ax)
+    ax.set_title(title)
+    return FigureConverter.to_png(figure)
+
+
+_style_lock = threading.Lock()
+_style_applied = False
+
+
+def _ensure_style() -> None:
+    """Применяет стиль один раз на процесс (в дочерних процессах пула тоже)."""
+    global _style_applied
+    with _style_lock:
+        if not _style_applied:
+            MatplotlibStyler.apply()
+            _style_applied = True
+
+
+def _binned_histplot(ax: Axes, series: pd.Series) -> None:
+    """
+    Гистограмма с KDE по агрегатам: один проход np.histogram по данным в
+    мелкие бины, из которых суммируются столбцы и считается KDE на
+    фиксированной сетке. Время отрисовки не зависит от числа строк.
+    """
+    values = series.to_numpy(dtype=np.float64)
+    fine_counts, fine_edges = np.histogram(values, bins=HISTOGRAM_BINS * KDE_BINS_PER_BAR)
+    counts = fine_counts.reshape(HISTOGRAM_BINS, KDE_BINS_PER_BAR).sum(axis=1)
+    edges = fine_edges[::KDE_BINS_PER_BAR]
+    width = edges[1] - edges[0]
+    color = sns.color_palette()[0]
+    ax.bar(edges[:-1], counts, width=width, align="edge", color=color, alpha=0.75,
+           edgecolor="white", linewidth=0.5)
+
+    # Правило Скотта, как у seaborn, но не уже мелкого бина
+    fine_centers = (fine_edges[:-1] + fine_edges[1:]) / 2
+    fine_width = fine_edges[1] - fine_edges[0]
+    n = fine_counts.sum()
+    bandwidth = max(np.std(values) * n ** (-1 / 5), fine_width)
+    if bandwidth > 0:
+        grid = np.linspace(fine_edges[0], fine_edges[-1], KDE_GRID_SIZE)
+        kernel = np.exp(-0.5 * ((grid[:, None] - fine_centers[None, :]) / bandwidth) ** 2)
+        density = kernel @ fine_counts / (n * bandwidth * np.sqrt(2 * np.pi))
+        # Масштаб как у histplot(kde=True): плотность в единицах высоты столбцов
+        ax.plot(grid, density * n * width, color=color, linewidth=1.5)
+    ax.set_xlabel(series.name)
+    ax.set_ylabel("Count")
+
+
+def _quantile_boxplot(ax: Axes, series: pd.Series) -> None:
+    """Горизонтальный boxplot по квартилям (Axes.bxp), без сортировки всего ряда."""
+    values = series.to_numpy(dtype=np.float64)
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    # Усы - крайние значения внутри 1.5 IQR, как у seaborn/matplotlib
+    low = values[values >= q1 - 1.5 * iqr].min()
+    high = values[values <= q3 + 1.5 * iqr].max()
+    stats = {"med": median, "q1": q1, "q3": q3, "whislo": low, "whishi": high, "fliers": []}
+    color = sns.color_palette()[0]
+    ax.bxp(
+        [stats],
+        **BXP_HORIZONTAL,
+        widths=0.8,
+        patch_artist=True,
+        showfliers=False,
+        boxprops={"facecolor": color},
+        medianprops={"color": "black"},
+    )
+    ax.set_yticks([])
+    ax.set_xlabel(series.name)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR_NAME = ".carml_cache"
+CACHE_FORMAT_VERSION = 1
+_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """Отпечаток исходного файла, по которому проверяется актуальность кэша."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+
+class DatasetCache:
+    """
+    Бинарный поколоночный кэш загруженных CSV.
+
+    Кэш хранится рядом с исходным файлом в каталоге ``.carml_cache``:
+    по одному ``.npy`` на столбец и ``meta.json`` с отпечатком файла.
+    Строковые столбцы сохраняются как коды + словарь значений, поэтому
+    чтение не требует pickle и не парсит текст CSV.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None) -> None:
+        # По умолчанию кэш лежит рядом с исходным файлом
+        self.root = Path(root) if root is not None else None
+
+    def entry_dir(self, source: str | Path) -> Path:
+        source_path = Path(source).resolve()
+        root = self.root or source_path.parent / CACHE_DIR_NAME
+        path_key = hashlib.blake2b(
+            str(source_path).encode("utf-8"), digest_size=8
+        ).hexdigest()
+        return root / f"{source_path.stem}-{path_key}"
+
+    @staticmethod
+    def fingerprint(source: str | Path) -> FileFingerprint:
+        source_path = Path(source).resolve()
+        stat = source_path.stat()
+        return FileFingerprint(
+            path=str(source_path),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=DatasetCache._hash_file(source_path),
+        )
+
+    def load(self, source: str | Path) -> Optional[pd.DataFrame]:
+        """Возвращает DataFrame из кэша или None, если кэш отсутствует/устарел."""
+        entry = self.entry_dir(source)
+        meta = self._read_meta(entry)
+        if meta is None:
+            return None
+
+        cached = meta.get("fingerprint", {})
+        stat = Path(source).resolve().stat()
+        # Дешевые проверки размера и времени изменения до хэширования содержимого
+        if cached.get("size") != stat.st_size or cached.get("mtime_ns") != stat.st_mtime_ns:
+            return None
+        if cached.get("content_hash") != self._hash_file(Path(source).resolve()):
+            return None
+
+        try:
+            return read_frame(entry, meta)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store(
+        self,
+        source: str | Path,
+        dataframe: pd.DataFrame,
+        fingerprint: Optional[FileFingerprint] = None,
+    ) -> bool:
+        """Сохраняет DataFrame в кэш. Возвращает False, если кэширование невозможно."""
+        fingerprint = fingerprint or self.fingerprint(source)
+        entry = self.entry_dir(source)
+        tmp_entry = entry.with_name(entry.name + ".tmp")
+        try:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            tmp_entry.mkdir(parents=True)
+            meta = write_frame(tmp_entry, dataframe)
+            meta["fingerprint"] = asdict(fingerprint)
+            with open(tmp_entry / "meta.json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp_entry, entry)
+            return True
+        except (OSError, TypeError, ValueError):
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return False
+
+    @staticmethod
+    def _read_meta(entry: Path) -> Optional[dict]:
+        meta_path = entry / "meta.json"
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+def write_frame(directory: Path, dataframe: pd.DataFrame) -> dict:
+    """Записывает столбцы DataFrame в отдельные .npy файлы и возвращает метаданные."""
+    if not isinstance(dataframe.index, pd.RangeIndex) or dataframe.index.start != 0:
+        raise ValueError("Кэшируются только кадры с RangeIndex от нуля")
+
+    columns = []
+    for position, name in enumerate(dataframe.columns):
+        if not isinstance(name, str):
+            raise ValueError(f"Неподдерживаемое имя столбца: {name!r}")
+        series = dataframe.iloc[:, position]
+        dtype = series.dtype
+        base = directory / str(position)
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = _to_plain_array(dtype.categories)
+            np.save(f"{base}.npy", series.cat.codes.to_numpy())
+            np.save(f"{base}.categories.npy", categories)
+            columns.append(
+                {"name": name, "kind": "category", "ordered": bool(dtype.ordered)}
+            )
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+            np.save(f"{base}.npy", series.to_numpy())
+            columns.append({"name": name, "kind": "array", "dtype": str(dtype)})
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            np.save(f"{base}.npy", codes.astype(np.int32 if len(uniques) < 2**31 else np.int64))
+            np.save(f"{base}.categories.npy", _to_plain_array(uniques))
+            columns.append({"name": name, "kind": "string", "dtype": str(dtype)})
+        else:
+            raise ValueError(f"Неподдерживаемый тип столбца {name}: {dtype}")
+
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "rows": int(len(dataframe)),
+        "columns": columns,
+    }
+
+
+def read_frame(directory: Path, meta: dict) -> pd.DataFrame:
+    """Собирает DataFrame из поколоночных .npy файлов, записанных write_frame."""
+    data = {}
+    for position, column in enumerate(meta["columns"]):
+        base = directory / str(position)
+        values = np.load(f"{base}.npy", allow_pickle=False)
+        kind = column["kind"]
+        if kind == "array":
+            data[column["name"]] = values
+            continue
+        categories = np.load(f"{base}.categories.npy", allow_pickle=False)
+        if kind == "category":
+            data[column["name"]] = pd.Categorical.from_codes(
+                values, categories=categories, ordered=column.get("ordered", False)
+            )
+            continue
+        # Строки собираются одной выборкой из словаря, без промежуточных копий
+        restored = categories.astype(object).take(values)
+        missing = values < 0
+        if missing.any():
+            restored[missing] = np.nan
+        data[column["name"]] = (
+            restored if column["dtype"] == "object" else pd.array(restored, dtype=column["dtype"])
+        )
+
+    frame = pd.DataFrame(
+        data, columns=[column["name"] for column in meta["columns"]], copy=False
+    )
+    if len(frame) != meta["rows"]:
+        raise ValueError("Повреждённый кэш: число строк не совпадает")
+    return frame
+
+
+def _to_plain_array(values: pd.Index | np.ndarray) -> np.ndarray:
+    """Преобразует словарь значений в массив без object dtype (без pickle)."""
+    array = np.asarray(values)
+    if array.dtype.kind == "O" or pd.api.types.is_string_dtype(getattr(values, "dtype", None)):
+        if not all(isinstance(value, str) for value in array):
+            raise ValueError("Словарь значений содержит не только строки")
+        return array.astype(str)
+    return array
@@ -3,10 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from io import StringIO
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 
+import numpy as np
 import pandas as pd
 
+from .data_cache import DatasetCache
+
 
 @dataclass
 class DataSummary:
@@ -17,37 +20,192 @@ class DataSummary:
     dtypes: pd.Series
     missing: pd.DataFrame
     info: str
+    cache_hit: bool = False
+    memory_bytes: int = 0
+    memory_saved_bytes: int = 0
 
 
 class DataLoader:
     """Отвечает за поиск CSV и загрузку их в pandas."""
 
-    def __init__(self) -> None:
+    # Размер порции строк при потоковом чтении
+    DEFAULT_CHUNKSIZE = 100_000
+    # Файлы крупнее этого порога читаются потоково, даже если chunksize не задан
+    STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+    # Строковые столбцы с долей уникальных значений не выше порога становятся category
+    CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+    def __init__(self, use_cache: bool = True, cache: Optional[DatasetCache] = None) -> None:
         self.dataframe: Optional[pd.DataFrame] = None
         self.source_path: Optional[Path] = None
+        self.cache = (cache or DatasetCache()) if use_cache else None
+        self.cache_hit = False
+        self.memory_saved_bytes = 0
 
     @staticmethod
     def find_csv_files(directory: str | Path) -> list[Path]:
         directory = Path(directory)
         return sorted(directory.glob("*.csv"))
 
-    def load_csv(self, path: str | Path) -> pd.DataFrame:
+    def load_csv(
+        self,
+        path: str | Path,
+        chunksize: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        optimize_memory: bool = False,
+        copy: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Загружает CSV в DataFrame.
+
+        Если задан chunksize или файл больше STREAMING_THRESHOLD_BYTES,
+        файл читается порциями с отчетом о прогрессе (0-100) через
+        progress_callback. В потоковом режиме возвращается сам загруженный
+        DataFrame без дополнительной копии, чтобы не удваивать пик памяти.
+
+        При включённом кэше неизменившийся файл читается из бинарного
+        поколоночного кэша без разбора CSV (см. DatasetCache).
+
+        optimize_memory включает компактный профиль: повторяющиеся строки
+        переводятся в category, числа - в минимальный безопасный тип
+        (см. optimize_dtypes). Сэкономленные байты попадают в DataSummary.
+
+        copy=False возвращает сам DataFrame загрузчика без защитной копии
+        (используется экономным режимом CarPricePredictor вместе с copy-on-write).
+        """
         try:
             csv_path = Path(path)
             if not csv_path.exists():
                 raise FileNotFoundError(f"Файл {csv_path} не существует")
-            
-            self.dataframe = pd.read_csv(csv_path)
+
+            self.cache_hit = False
+            self.memory_saved_bytes = 0
+            if self.cache is not None:
+                cached = self.cache.load(csv_path)
+                if cached is not None and not cached.empty:
+                    self.dataframe = cached
+                    self.source_path = csv_path
+                    self.cache_hit = True
+                    if optimize_memory:
+                        self._apply_memory_profile()
+                    if progress_callback is not None:
+                        progress_callback(100)
+                    return self.dataframe.copy() if copy else self.dataframe
+
+            streaming = chunksize is not None or (
+                csv_path.stat().st_size > self.STREAMING_THRESHOLD_BYTES
+            )
+            if streaming:
+                self.dataframe = self._concat_chunks(
+                    self.iter_csv_chunks(
+                        csv_path,
+                        chunksize=chunksize or self.DEFAULT_CHUNKSIZE,
+                        progress_callback=progress_callback,
+                    )
+                )
+            else:
+                self.dataframe = pd.read_csv(csv_path)
             if self.dataframe.empty:
                 raise ValueError("CSV файл пуст")
-                
+
             self.source_path = csv_path
-            return self.dataframe.copy()
+            if self.cache is not None:
+                self.cache.store(csv_path, self.dataframe)
+            if optimize_memory:
+                self._apply_memory_profile()
+            if progress_callback is not None:
+                progress_callback(100)
+            return self.dataframe if streaming or not copy else self.dataframe.copy()
         except Exception as e:
             self.dataframe = None
             self.source_path = None
+            self.cache_hit = False
+            self.memory_saved_bytes = 0
             raise Exception(f"Ошибка загрузки CSV: {str(e)}") from e
 
+    @classmethod
+    def optimize_dtypes(cls, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Возвращает компактную версию DataFrame.
+
+        Целые понижаются до минимальной знаковой разрядности, float64 -> float32
+        только если значения восстанавливаются без потерь, строковые столбцы
+        с долей уникальных значений не выше CATEGORY_MAX_UNIQUE_RATIO -> category.
+        """
+        optimized = {}
+        for column in dataframe.columns:
+            series = dataframe[column]
+            dtype = series.dtype
+            if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+                optimized[column] = series
+            elif pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+                optimized[column] = pd.to_numeric(series, downcast="integer")
+            elif dtype == np.float64:
+                values = series.to_numpy()
+                narrowed = values.astype(np.float32)
+                if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+                    optimized[column] = pd.Series(narrowed, index=series.index, name=column)
+                else:
+                    optimized[column] = series
+            elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+                non_null = series.count()
+                unique = series.nunique(dropna=True)
+                if non_null > 1 and unique <= non_null * cls.CATEGORY_MAX_UNIQUE_RATIO:
+                    optimized[column] = series.astype("category")
+                else:
+                    optimized[column] = series
+            else:
+                optimized[column] = series
+        return pd.DataFrame(optimized, index=dataframe.index, columns=dataframe.columns)
+
+    def _apply_memory_profile(self) -> None:
+        before = int(self.dataframe.memory_usage(deep=True).sum())
+        self.dataframe = self.optimize_dtypes(self.dataframe)
+        after = int(self.dataframe.memory_usage(deep=True).sum())
+        self.memory_saved_bytes = before - after
+
+    @staticmethod
+    def _concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Собирает DataFrame из порций по столбцам.
+
+        Каждая порция сразу раскладывается на копии столбцов и освобождается,
+        а части столбца освобождаются сразу после его склейки. Пик памяти -
+        итоговый кадр плюс один столбец, а не все порции плюс кадр, как у
+        pd.concat по списку порций.
+        """
+        pieces: dict[Any, list[pd.Series]] = {}
+        for chunk in chunks:
+            for column in chunk.columns:
+                # Копия не держит двумерный блок порции целиком
+                pieces.setdefault(column, []).append(chunk[column].copy())
+            del chunk
+        columns = {}
+        for column in list(pieces):
+            columns[column] = pd.concat(pieces.pop(column), ignore_index=True)
+        return pd.DataFrame(columns, copy=False)
+
+    @staticmethod
+    def iter_csv_chunks(
+        path: str | Path,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Читает CSV порциями, сообщая долю прочитанных байт."""
+        csv_path = Path(path)
+        total_bytes = max(csv_path.stat().st_size, 1)
+        last_reported = -1
+        with open(csv_path, "rb") as handle:
+            with pd.read_csv(handle, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    if progress_callback is not None:
+                        # Оставляем 100% для момента окончательной сборки кадра
+                        percent = min(int(handle.tell() * 100 / total_bytes), 99)
+                        if percent != last_reported:
+                            progress_callback(percent)
+                            last_reported = percent
+                    yield chunk
+
     def describe(self) -> DataSummary:
         if self.dataframe is None:
             raise ValueError("Dataset is not loaded yet.")
@@ -56,7 +214,7 @@ class DataLoader:
             raise ValueError("Dataset is empty.")
 
         buffer = StringIO()
-        self.dataframe.info(buf=buffer)
+        self.dataframe.info(buf=buffer, memory_usage="deep")
         info_text = buffer.getvalue()
         missing = self.dataframe.isna().sum().rename("missing_count")
         missing_pct = (missing / len(self.dataframe) * 100).rename("missing_pct")
@@ -68,4 +226,7 @@ class DataLoader:
             dtypes=self.dataframe.dtypes,
             missing=missing_summary,
             info=info_text,
+            cache_hit=self.cache_hit,
+            memory_bytes=int(self.dataframe.memory_usage(deep=True).sum()),
+            memory_saved_bytes=self.memory_saved_bytes,
         )
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import tempfile
 from dataclasses import dataclass, field
-from typing import Optional
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from .encoders import extract_brand
+from .streaming_stats import FrequencySketch, QuantileSketch, mode_from_counts
+
+# Источник порций: итерируемый набор DataFrame или фабрика, возвращающая новый итератор
+ChunkSource = Union[Iterable[pd.DataFrame], Callable[[], Iterable[pd.DataFrame]]]
+
 
 @dataclass
 class PreprocessingConfig:
@@ -15,6 +24,35 @@ class PreprocessingConfig:
     high_missing_threshold: float = 0.3
     drop_constant: bool = True
     encode_columns: Optional[list[str]] = None
+    # Столбец вида "марка модель" (CarName), заменяемый маркой
+    brand_column: Optional[str] = None
+
+
+@dataclass
+class ColumnProfile:
+    """Результат однопроходного профилирования одного столбца."""
+
+    null_count: int
+    # Число различных значений, ограниченное сверху двумя (достаточно для поиска констант)
+    distinct_count: int
+    median: Optional[float] = None
+    mode: Any = None
+
+
+@dataclass
+class PreprocessingState:
+    """Статистики, зафиксированные на обучающих данных методом fit."""
+
+    target_column: str
+    dropped_columns: list[str]
+    columns: list[str]
+    medians: dict[str, Any]
+    modes: dict[str, Any]
+    brand_column: Optional[str] = None
+
+    @property
+    def fill_values(self) -> dict[str, Any]:
+        return {**self.medians, **self.modes}
 
 
 class DataPreprocessor:
@@ -23,51 +61,247 @@ class DataPreprocessor:
     def __init__(self, config: Optional[PreprocessingConfig] = None) -> None:
         self.config = config or PreprocessingConfig()
         self.cleaned_frame: Optional[pd.DataFrame] = None
+        self.state: Optional[PreprocessingState] = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.state is not None
 
     def preprocess(self, dataframe: pd.DataFrame) -> pd.DataFrame:
-        df = dataframe.copy()
-        df = self._drop_high_missing(df)
-        df = self._drop_columns(df)
-        if self.config.drop_constant:
-            df = self._drop_constant(df)
-        df = self._fill_missing(df)
-        df = self._encode_categoricals(df)
+        """Обучает предобработчик на dataframe и сразу применяет его (fit + transform)."""
+        df = self.fit(dataframe).transform(dataframe)
         self.cleaned_frame = df
         return df
 
-    def _drop_high_missing(self, df: pd.DataFrame) -> pd.DataFrame:
-        threshold = int(len(df) * self.config.high_missing_threshold)
-        mask = df.isna().sum()
-        columns_to_drop = mask[mask > threshold].index.tolist()
-        return df.drop(columns=columns_to_drop)
-
-    def _drop_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        cols = [col for col in self.config.drop_columns if col in df.columns]
-        return df.drop(columns=cols, errors="ignore")
-
-    def _drop_constant(self, df: pd.DataFrame) -> pd.DataFrame:
-        nunique = df.nunique()
-        constant_cols = nunique[nunique <= 1].index.tolist()
-        return df.drop(columns=constant_cols)
-
-    def _fill_missing(self, df: pd.DataFrame) -> pd.DataFrame:
-        numeric_cols = df.select_dtypes(include="number").columns
-        categorical_cols = df.select_dtypes(exclude="number").columns
-
-        # Заполнение числовых столбцов медианой
-        if len(numeric_cols) > 0:
-            df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
-        
-        # Заполнение категориальных столбцов модой
-        for col in categorical_cols:
-            if df[col].isna().any():
-                mode_values = df[col].mode()
-                if len(mode_values) > 0:
-                    df[col] = df[col].fillna(mode_values.iloc[0])
-                else:
-                    # Если моды нет, заполняем строкой "Unknown"
-                    df[col] = df[col].fillna("Unknown")
-        return df
+    def fit(self, dataframe: pd.DataFrame | Iterable[pd.DataFrame]) -> "DataPreprocessor":
+        """
+        Запоминает удаляемые столбцы, медианы и моды обучающих данных.
+
+        Принимает целый DataFrame (не изменяется и не копируется) либо
+        итератор порций - тогда статистики собираются потоково (см. fit_chunks).
+        """
+        if not isinstance(dataframe, pd.DataFrame):
+            return self.fit_chunks(dataframe)
+        profiles = self.profile_columns(dataframe)
+        self.state = self._build_state(list(dataframe.columns), profiles, len(dataframe))
+        return self
+
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame]) -> "DataPreprocessor":
+        """
+        Обучает предобработчик за один потоковый проход по порциям.
+
+        Доли пропусков считаются точно, число различных значений - с отсечкой
+        на двух, медианы - по квантильному скетчу, моды - подсчетом heavy hitters.
+        """
+        skip = set(self.config.drop_columns)
+        columns: list[str] = []
+        profilers: dict[str, _StreamingColumnProfiler] = {}
+        n_rows = 0
+        for chunk in chunks:
+            n_rows += len(chunk)
+            for col in chunk.columns:
+                if col not in columns:
+                    columns.append(col)
+                if col in skip:
+                    continue
+                profiler = profilers.get(col)
+                if profiler is None:
+                    # Столбец, появившийся не в первой порции, пропущен в предыдущих строках
+                    profiler = profilers[col] = _StreamingColumnProfiler(
+                        missing_rows=n_rows - len(chunk)
+                    )
+                profiler.update(chunk[col])
+            for col, profiler in profilers.items():
+                if col not in chunk.columns:
+                    profiler.null_count += len(chunk)
+
+        if not columns:
+            raise ValueError("Нет данных для обучения предобработчика.")
+        profiles = {col: profiler.profile() for col, profiler in profilers.items()}
+        self.state = self._build_state(columns, profiles, n_rows)
+        return self
+
+    def transform_chunks(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Лениво применяет обученную предобработку к каждой порции."""
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    def preprocess_chunks(
+        self,
+        chunks: ChunkSource,
+        output_path: Optional[str | Path] = None,
+        consumer: Optional[Callable[[pd.DataFrame], None]] = None,
+    ) -> int:
+        """
+        Предобработка данных больше оперативной памяти в два прохода.
+
+        Первый проход собирает статистики (fit_chunks), второй выдает очищенные
+        порции в CSV output_path и/или в consumer. Если chunks - одноразовый
+        итератор, а не фабрика или коллекция, порции на время между проходами
+        сохраняются во временный каталог на диске. Возвращает число строк.
+        """
+        if output_path is None and consumer is None:
+            raise ValueError("Укажите output_path или consumer для очищенных порций.")
+
+        with tempfile.TemporaryDirectory(prefix="carml_chunks_") as spill_dir:
+            if callable(chunks):
+                self.fit_chunks(chunks())
+                second_pass = chunks()
+            elif isinstance(chunks, (list, tuple)):
+                self.fit_chunks(chunks)
+                second_pass = chunks
+            else:
+                spilled: list[Path] = []
+                self.fit_chunks(_spill_chunks(chunks, Path(spill_dir), spilled))
+                second_pass = _read_spilled(spilled)
+
+            written = 0
+            output = Path(output_path) if output_path is not None else None
+            for cleaned in self.transform_chunks(second_pass):
+                if output is not None:
+                    first = written == 0
+                    cleaned.to_csv(output, mode="w" if first else "a", header=first, index=False)
+                if consumer is not None:
+                    consumer(cleaned)
+                written += len(cleaned)
+        return written
+
+    def _build_state(
+        self, all_columns: list[str], profiles: dict[str, ColumnProfile], n_rows: int
+    ) -> PreprocessingState:
+        threshold = int(n_rows * self.config.high_missing_threshold)
+        config_drops = set(self.config.drop_columns)
+
+        dropped: list[str] = []
+        columns: list[str] = []
+        medians: dict[str, Any] = {}
+        modes: dict[str, Any] = {}
+        for col in all_columns:
+            if col in config_drops:
+                dropped.append(col)
+                continue
+            profile = profiles[col]
+            if profile.null_count > threshold or (
+                self.config.drop_constant and profile.distinct_count <= 1
+            ):
+                dropped.append(col)
+                continue
+            columns.append(col)
+            if profile.median is not None:
+                medians[col] = profile.median
+            else:
+                # Если моды нет, заполняем строкой "Unknown"
+                modes[col] = profile.mode if profile.mode is not None else "Unknown"
+
+        return PreprocessingState(
+            target_column=self.config.target_column,
+            dropped_columns=dropped,
+            columns=columns,
+            medians=medians,
+            modes=modes,
+            brand_column=self.config.brand_column if self.config.brand_column in columns else None,
+        )
+
+    def transform(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Применяет сохраненную предобработку без пересчета статистик.
+
+        Лишние столбцы отбрасываются, отсутствующие признаки (кроме целевого)
+        добавляются и заполняются значениями из обучающих данных. Если задан
+        brand_column, его значения заменяются маркой (extract_brand).
+        """
+        if self.state is None:
+            raise ValueError("Предобработчик не обучен. Сначала вызовите fit или preprocess.")
+        state = self.state
+
+        present = [col for col in state.columns if col in dataframe.columns]
+        df = dataframe if list(dataframe.columns) == present else dataframe[present]
+
+        # Заполняем только столбцы, в которых действительно есть пропуски
+        has_missing = df.isna().any()
+        fill_values = state.fill_values
+        to_fill = {
+            col: fill_values[col]
+            for col in has_missing.index[has_missing.to_numpy()]
+            if col in fill_values
+        }
+        if to_fill:
+            # Категория для значения заполнения должна существовать заранее
+            new_categories = {
+                col: df[col].cat.add_categories([value])
+                for col, value in to_fill.items()
+                if isinstance(df[col].dtype, pd.CategoricalDtype)
+                and value not in df[col].dtype.categories
+            }
+            if new_categories:
+                df = df.assign(**new_categories)
+            df = df.fillna(to_fill)
+
+        absent = [
+            col for col in state.columns
+            if col not in dataframe.columns and col != state.target_column
+        ]
+        if absent:
+            df = df.assign(**{col: fill_values.get(col) for col in absent})
+            df = df[[col for col in state.columns if col in df.columns]]
+
+        if state.brand_column is not None and state.brand_column in df.columns:
+            df = df.assign(**{state.brand_column: extract_brand(df[state.brand_column])})
+
+        return self._encode_categoricals(df)
+
+    def profile_columns(
+        self, dataframe: pd.DataFrame, columns: Optional[list[str]] = None
+    ) -> dict[str, ColumnProfile]:
+        """
+        Профилирует столбцы за один проход по каждому из них.
+
+        Для числовых столбцов из одного NumPy-массива считаются число пропусков,
+        признак константности (min == max) и медиана; для остальных один
+        value_counts дает число пропусков, число различных значений и моду.
+        Столбцы из config.drop_columns пропускаются.
+        """
+        skip = set(self.config.drop_columns)
+        columns = columns if columns is not None else [
+            col for col in dataframe.columns if col not in skip
+        ]
+        return {col: self._profile_series(dataframe[col]) for col in columns}
+
+    @staticmethod
+    def _profile_series(series: pd.Series) -> ColumnProfile:
+        dtype = series.dtype
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            missing = np.isnan(values)
+            null_count = int(missing.sum())
+            valid = values[~missing] if null_count else values
+            if valid.size == 0:
+                return ColumnProfile(null_count=null_count, distinct_count=0, median=np.nan)
+            distinct = 1 if valid.min() == valid.max() else 2
+            return ColumnProfile(
+                null_count=null_count,
+                distinct_count=distinct,
+                median=float(np.median(valid)),
+            )
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            valid_codes = codes[codes >= 0]
+            counts = np.bincount(valid_codes, minlength=len(dtype.categories))
+            observed = int((counts > 0).sum())
+            mode = dtype.categories[int(counts.argmax())] if valid_codes.size else None
+            return ColumnProfile(
+                null_count=int(codes.size - valid_codes.size),
+                distinct_count=min(observed, 2),
+                mode=mode,
+            )
+
+        counts = series.value_counts(dropna=True, sort=False)
+        return ColumnProfile(
+            null_count=int(len(series) - counts.sum()),
+            distinct_count=min(len(counts), 2),
+            mode=mode_from_counts(counts),
+        )
 
     def _encode_categoricals(self, df: pd.DataFrame) -> pd.DataFrame:
         # НЕ кодируем категориальные признаки здесь
@@ -76,3 +310,89 @@ class DataPreprocessor:
         # Просто возвращаем данные как есть - категориальные признаки остаются строками
         return df
 
+
+class _StreamingColumnProfiler:
+    """Накапливает ColumnProfile одного столбца по порциям данных."""
+
+    def __init__(self, missing_rows: int = 0, sketch_size: int = 4096, top_values: int = 1024) -> None:
+        self.null_count = missing_rows
+        self.numeric: Optional[bool] = None
+        # Пока все значения пропущены, тип столбца определяется по dtype порций
+        self.only_numeric_dtypes = True
+        self.first_value: Any = None
+        self.distinct_count = 0
+        self.quantiles = QuantileSketch(k=sketch_size)
+        self.frequencies = FrequencySketch(capacity=top_values)
+
+    def update(self, series: pd.Series) -> None:
+        dtype = series.dtype
+        numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        self.only_numeric_dtypes = self.only_numeric_dtypes and numeric
+        if series.notna().any():
+            if self.numeric is None:
+                self.numeric = numeric
+            elif self.numeric != numeric:
+                raise ValueError(
+                    f"Столбец '{series.name}' меняет тип между порциями ({dtype})."
+                )
+
+        if numeric:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = values[~np.isnan(values)]
+            self.null_count += int(values.size - valid.size)
+            if valid.size:
+                self.quantiles.update(valid)
+                self._observe(valid.min(), valid.max())
+            return
+
+        counts = series.value_counts(dropna=True, sort=False)
+        counts = counts[counts > 0]
+        self.null_count += int(len(series) - counts.sum())
+        if len(counts):
+            self.frequencies.update_counts(counts)
+            self._observe(counts.index[0], counts.index[-1] if len(counts) > 1 else counts.index[0])
+            if len(counts) > 1:
+                self.distinct_count = 2
+
+    def _observe(self, low: Any, high: Any) -> None:
+        # Различные значения считаются только до двух: этого хватает для поиска констант
+        if self.distinct_count >= 2:
+            return
+        if self.distinct_count == 0:
+            self.first_value = low
+            self.distinct_count = 1
+        if low != self.first_value or high != self.first_value:
+            self.distinct_count = 2
+
+    def profile(self) -> ColumnProfile:
+        if self.numeric is None:
+            # Столбец целиком из пропусков
+            median = np.nan if self.only_numeric_dtypes else None
+            return ColumnProfile(null_count=self.null_count, distinct_count=0, median=median)
+        if self.numeric:
+            return ColumnProfile(
+                null_count=self.null_count,
+                distinct_count=self.distinct_count,
+                median=self.quantiles.quantile(0.5),
+            )
+        return ColumnProfile(
+            null_count=self.null_count,
+            distinct_count=self.distinct_count,
+            mode=self.frequencies.mode(),
+        )
+
+
+def _spill_chunks(
+    chunks: Iterable[pd.DataFrame], directory: Path, paths: list[Path]
+) -> Iterator[pd.DataFrame]:
+    """Пропускает порции дальше, попутно сохраняя их на диск для второго прохода."""
+    for index, chunk in enumerate(chunks):
+        path = directory / f"chunk_{index:06d}.pkl"
+        chunk.to_pickle(path)
+        paths.append(path)
+        yield chunk
+
+
+def _read_spilled(paths: list[Path]) -> Iterator[pd.DataFrame]:
+    for path in paths:
+        yield pd.read_pickle(path)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+import sklearn
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.model_selection import KFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler, TargetEncoder
+
+# Опечатки и сокращения марок в CarName набора CarPrice_Assignment
+BRAND_ALIASES = {
+    "maxda": "mazda",
+    "porcshce": "porsche",
+    "toyouta": "toyota",
+    "vokswagen": "volkswagen",
+    "vw": "volkswagen",
+}
+
+HIGH_CARDINALITY_ENCODINGS = ("onehot", "hashing", "frequency", "target")
+
+
+@dataclass
+class EncodingConfig:
+    """
+    Кодирование категориальных признаков с большим числом значений.
+
+    Столбцы, у которых различных значений больше threshold, кодируются
+    способом high_cardinality: onehot (как остальные), hashing (фиксированная
+    ширина hash_features), frequency (доля значения в обучающей выборке) или
+    target (среднее целевой переменной вне фолда, target_folds фолдов).
+    """
+
+    high_cardinality: str = "onehot"
+    threshold: int = 50
+    hash_features: int = 64
+    target_folds: int = 5
+
+    def __post_init__(self) -> None:
+        if self.high_cardinality not in HIGH_CARDINALITY_ENCODINGS:
+            raise ValueError(
+                f"Unknown encoding '{self.high_cardinality}'. "
+                f"Expected one of: {', '.join(HIGH_CARDINALITY_ENCODINGS)}."
+            )
+
+
+def extract_brand(series: pd.Series) -> pd.Series:
+    """
+    Марка из строки вида "марка модель": первое слово в нижнем регистре,
+    известные опечатки исправляются. Строковые операции выполняются только
+    над различными значениями, затем раскладываются по строкам.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    brands = (
+        pd.Series(uniques, dtype="string")
+        .str.strip()
+        .str.split(n=1)
+        .str[0]
+        .str.lower()
+        .replace(BRAND_ALIASES)
+        .to_numpy(dtype=object, na_value=np.nan)
+    )
+    values = np.full(len(codes), np.nan, dtype=object)
+    valid = codes >= 0
+    values[valid] = brands.take(codes[valid])
+    return pd.Series(values, index=series.index, name=series.name, dtype=object)
+
+
+def _as_frame(X: Any) -> pd.DataFrame:
+    return X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+
+
+class HashingEncoder(TransformerMixin, BaseEstimator):
+    """
+    Хэширование категорий в n_features столбцов (CSR).
+
+    Значение v столбца c попадает в столбец hash("c=v") % n_features, поэтому
+    ширина матрицы не зависит от числа различных значений, а новые значения
+    не требуют переобучения.
+    """
+
+    def __init__(self, n_features: int = 64) -> None:
+        self.n_features = n_features
+
+    def fit(self, X: Any, y: Any = None) -> "HashingEncoder":
+        if self.n_features < 1:
+            raise ValueError("n_features must be positive.")
+        self.n_features_in_ = _as_frame(X).shape[1]
+        return self
+
+    def transform(self, X: Any) -> sparse.csr_matrix:
+        frame = _as_frame(X)
+        n_rows, n_columns = frame.shape
+        indices = np.empty((n_rows, n_columns), dtype=np.int64)
+        for position, name in enumerate(frame.columns):
+            codes, uniques = pd.factorize(frame.iloc[:, position], use_na_sentinel=False)
+            keys = np.array([f"{name}={value}" for value in uniques], dtype=object)
+            buckets = (pd.util.hash_array(keys) % np.uint64(self.n_features)).astype(np.int64)
+            indices[:, position] = buckets.take(codes)
+        matrix = sparse.csr_matrix(
+            (np.ones(indices.size), indices.ravel(), np.arange(0, indices.size + 1, n_columns)),
+            shape=(n_rows, self.n_features),
+        )
+        # Коллизии внутри строки складываются в одну ячейку
+        matrix.sum_duplicates()
+        return matrix
+
+    def get_feature_names_out(self, input_features: Any = None) -> np.ndarray:
+        return np.array([f"hash_{i}" for i in range(self.n_features)], dtype=object)
+
+
+class FrequencyEncoder(TransformerMixin, BaseEstimator):
+    """Заменяет категорию ее долей в обучающей выборке (новые значения - 0)."""
+
+    def fit(self, X: Any, y: Any = None) -> "FrequencyEncoder":
+        frame = _as_frame(X)
+        self.frequencies_ = [
+            frame.iloc[:, position].value_counts(normalize=True, dropna=False)
+            for position in range(frame.shape[1])
+        ]
+        self.feature_names_in_ = np.asarray([str(name) for name in frame.columns], dtype=object)
+        self.n_features_in_ = frame.shape[1]
+        return self
+
+    def transform(self, X: Any) -> np.ndarray:
+        frame = _as_frame(X)
+        result = np.empty(frame.shape, dtype=np.float64)
+        for position, frequencies in enumerate(self.frequencies_):
+            codes, uniques = pd.factorize(frame.iloc[:, position], use_na_sentinel=False)
+            mapped = frequencies.reindex(uniques).to_numpy(dtype=np.float64, na_value=0.0)
+            result[:, position] = mapped.take(codes)
+        return result
+
+    def get_feature_names_out(self, input_features: Any = None) -> np.ndarray:
+        return np.array([f"{name}_frequency" for name in self.feature_names_in_], dtype=object)
+
+
+def high_cardinality_encoder(config: EncodingConfig, random_state: Optional[int] = None) -> Any:
+    """
+    Трансформер для столбцов с числом значений больше config.threshold.
+    Частоты и средние цены масштабируются, как числовые признаки.
+    """
+    if config.high_cardinality == "hashing":
+        return HashingEncoder(n_features=config.hash_features)
+    if config.high_cardinality == "frequency":
+        encoder = FrequencyEncoder()
+    # fit_transform TargetEncoder кодирует обучающую выборку вне фолда (cross fitting)
+    elif tuple(int(part) for part in sklearn.__version__.split(".")[:2]) >= (1, 9):
+        folds = KFold(n_splits=config.target_folds, shuffle=True, random_state=random_state)
+        encoder = TargetEncoder(target_type="continuous", cv=folds)
+    else:
+        encoder = TargetEncoder(
+            target_type="continuous", cv=config.target_folds, shuffle=True, random_state=random_state
+        )
+    return Pipeline([("encoder", encoder), ("scaler", StandardScaler())])
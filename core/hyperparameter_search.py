@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+# Пространства гиперпараметров моделей; линейная регрессия не настраивается
+SEARCH_SPACES: dict[str, dict[str, list[Any]]] = {
+    "random_forest": {
+        "max_depth": [None, 10, 20, 30],
+        "min_samples_split": [2, 5, 10],
+        "min_samples_leaf": [1, 2, 4],
+        "max_features": [1.0, 0.5, "sqrt"],
+    },
+    "gradient_boosting": {
+        "learning_rate": [0.03, 0.1, 0.3],
+        "max_depth": [3, 5, 7],
+        "subsample": [0.7, 1.0],
+        "min_samples_leaf": [1, 5, 20],
+    },
+    "hist_gradient_boosting": {
+        "learning_rate": [0.03, 0.1, 0.3],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [10, 20, 50],
+        "l2_regularization": [0.0, 0.1, 1.0],
+    },
+    "ridge": {"alpha": [0.01, 0.1, 1.0, 10.0, 100.0]},
+    "lasso": {"alpha": [0.001, 0.01, 0.1, 1.0, 10.0]},
+    "elastic_net": {"alpha": [0.001, 0.01, 0.1, 1.0], "l1_ratio": [0.1, 0.5, 0.9]},
+    "svr": {"C": [1, 10, 100, 1000], "gamma": ["scale", 0.01, 0.1], "epsilon": [0.01, 0.1, 1.0]},
+}
+
+# Ансамбли, которые дообучаются (warm_start) при росте числа деревьев/итераций
+WARM_START_RESOURCES = {
+    "random_forest": "n_estimators",
+    "gradient_boosting": "n_estimators",
+    "hist_gradient_boosting": "max_iter",
+}
+
+
+@dataclass
+class SearchConfig:
+    """
+    Подбор гиперпараметров последовательным делением пополам (successive halving).
+
+    Из SEARCH_SPACES случайно выбираются n_candidates конфигураций и
+    оцениваются средним R² на cv_folds фолдах обучающей выборки. После каждого
+    раунда остается лучшая 1/factor часть кандидатов, а их ресурс растет в
+    factor раз: число деревьев/итераций у ансамблей (дообучение warm_start)
+    или число строк у остальных моделей (не меньше min_rows). Последний раунд
+    идет на полном ресурсе.
+    """
+
+    n_candidates: int = 16
+    factor: int = 3
+    cv_folds: int = 3
+    min_rows: int = 100
+
+    def __post_init__(self) -> None:
+        if self.n_candidates < 1:
+            raise ValueError("n_candidates must be positive.")
+        if self.factor < 2:
+            raise ValueError("factor must be at least 2.")
+        if self.cv_folds < 2:
+            raise ValueError("cv_folds must be at least 2.")
+
+
+def sample_candidates(name: str, config: SearchConfig, random_state: Optional[int] = None) -> list[dict[str, Any]]:
+    """Случайные конфигурации из пространства модели (все, если их не больше n_candidates)."""
+    space = SEARCH_SPACES[name]
+    n_configurations = len(ParameterGrid(space))
+    if n_configurations <= config.n_candidates:
+        return list(ParameterGrid(space))
+    return list(ParameterSampler(space, config.n_candidates, random_state=random_state))
+
+
+def halving_schedule(n_candidates: int, factor: int, max_resource: int, min_resource: int = 1) -> list[int]:
+    """
+    Ресурс каждого раунда: последний раунд - max_resource, каждый предыдущий
+    в factor раз меньше (не меньше min_resource). Раундов столько, чтобы к
+    последнему остался один кандидат.
+    """
+    n_rounds = 1 + int(math.floor(math.log(n_candidates) / math.log(factor) + 1e-9)) if n_candidates > 1 else 1
+    return [
+        max(int(max_resource / factor ** (n_rounds - 1 - round_)), min(min_resource, max_resource))
+        for round_ in range(n_rounds)
+    ]
+
+
+def survivors(scores: dict[int, float], factor: int) -> list[int]:
+    """Лучшая 1/factor часть кандидатов (хотя бы один) по убыванию оценки."""
+    ranked = sorted(scores, key=lambda candidate: (-scores[candidate], candidate))
+    return ranked[: max(len(ranked) // factor, 1)]
+
+
+def mean_score(fold_scores: list[float]) -> float:
+    """Средняя оценка кандидата; неудачное обучение на любом фолде - -inf."""
+    if not fold_scores or not np.all(np.isfinite(fold_scores)):
+        return -math.inf
+    return float(np.mean(fold_scores))
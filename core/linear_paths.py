@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import enet_path
+
+# Модели, для которых alpha выбирается по пути регуляризации
+LINEAR_PATH_MODELS = ("ridge", "lasso", "elastic_net")
+# Предел ширины матрицы признаков: матрица Грама p x p и ее разложение
+MAX_PATH_FEATURES = 4000
+
+
+@dataclass
+class RegularizationPathConfig:
+    """
+    Выбор alpha для Ridge, Lasso и ElasticNet по путям регуляризации.
+
+    Матрица Грама обучающей части считается один раз и общая для всех
+    семейств; каждый путь из n_alphas значений (от alpha_max до eps * alpha_max)
+    обучается с теплым стартом от предыдущего alpha. Лучшее alpha (и l1_ratio
+    для ElasticNet из l1_ratios) выбирается по R² на validation_fraction
+    обучающей выборки.
+    """
+
+    n_alphas: int = 50
+    eps: float = 1e-4
+    validation_fraction: float = 0.2
+    l1_ratios: tuple[float, ...] = (0.1, 0.5, 0.7, 0.9, 0.95)
+
+    def __post_init__(self) -> None:
+        if self.n_alphas < 2:
+            raise ValueError("n_alphas must be at least 2.")
+        if not 0.0 < self.validation_fraction < 1.0:
+            raise ValueError("validation_fraction must be between 0 and 1.")
+        if not self.l1_ratios or not all(0.0 < ratio <= 1.0 for ratio in self.l1_ratios):
+            raise ValueError("l1_ratios must be in (0, 1].")
+
+
+@dataclass
+class GramSystem:
+    """
+    Центрированные XᵀX и Xᵀy: всё, от чего зависят коэффициенты линейных
+    моделей со свободным членом. Собственное разложение считается один раз
+    (лениво) и используется и путем Ridge, и путями Lasso/ElasticNet.
+    """
+
+    gram: np.ndarray
+    xy: np.ndarray
+    x_mean: np.ndarray
+    y_mean: float
+    n_samples: int
+    _eigen: Optional[tuple[np.ndarray, np.ndarray]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_data(cls, X: Any, y: np.ndarray) -> "GramSystem":
+        """Строит систему по плотной или разреженной (без центрирования X) матрице."""
+        n_samples = X.shape[0]
+        x_mean = np.asarray(X.mean(axis=0), dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64)
+        y_mean = float(y.mean())
+        gram = X.T @ X
+        gram = gram.toarray() if sparse.issparse(gram) else np.asarray(gram, dtype=np.float64)
+        gram -= n_samples * np.outer(x_mean, x_mean)
+        xy = np.asarray(X.T @ (y - y_mean), dtype=np.float64).ravel()
+        return cls(gram=gram, xy=xy, x_mean=x_mean, y_mean=y_mean, n_samples=n_samples)
+
+    @property
+    def eigen(self) -> tuple[np.ndarray, np.ndarray]:
+        """Собственные значения (отрицательные из-за округления обнуляются) и векторы."""
+        if self._eigen is None:
+            values, vectors = np.linalg.eigh(self.gram)
+            self._eigen = (np.clip(values, 0.0, None), vectors)
+        return self._eigen
+
+    def intercepts(self, coefs: np.ndarray) -> np.ndarray:
+        return self.y_mean - self.x_mean @ coefs
+
+
+def ridge_path(system: GramSystem, alphas: np.ndarray) -> np.ndarray:
+    """Коэффициенты Ridge (столбцы) для всех alpha по одному разложению XᵀX."""
+    values, vectors = system.eigen
+    projected = vectors.T @ system.xy
+    return vectors @ (projected[:, None] / (values[:, None] + alphas[None, :]))
+
+
+def ridge_alphas(system: GramSystem, config: RegularizationPathConfig) -> np.ndarray:
+    """Сетка alpha Ridge вокруг среднего собственного значения XᵀX."""
+    scale = max(float(np.trace(system.gram)) / len(system.gram), np.finfo(np.float64).tiny)
+    return scale * np.logspace(2, np.log10(config.eps) - 2, config.n_alphas)
+
+
+def elastic_net_path(
+    system: GramSystem,
+    l1_ratio: float,
+    config: RegularizationPathConfig,
+    max_iter: int = 1000,
+    tol: float = 1e-4,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Путь Lasso (l1_ratio=1) или ElasticNet по убыванию alpha с теплым стартом.
+
+    Целевая функция зависит от данных только через XᵀX и Xᵀy, поэтому
+    enet_path получает квадратную матрицу R = S^½Vᵀ (RᵀR = XᵀX) и r с Rᵀr = Xᵀy
+    вместо X и y, а также готовую матрицу Грама: спуск по координатам идет по
+    p x p независимо от числа строк и разреженности X. Штраф пересчитывается
+    на число строк R (alpha * n / p). Возвращает alpha и коэффициенты (столбцы).
+    """
+    values, vectors = system.eigen
+    n_features = len(values)
+    roots = np.sqrt(values)
+    surrogate_X = roots[:, None] * vectors.T
+    projected = vectors.T @ system.xy
+    # Xᵀy лежит в образе XᵀX: компоненты при нулевых собственных значениях отбрасываются
+    surrogate_y = np.divide(projected, roots, out=np.zeros_like(projected), where=roots > 1e-12 * roots.max(initial=0.0))
+    gram = surrogate_X.T @ surrogate_X
+    xy = surrogate_X.T @ surrogate_y
+
+    alpha_max = np.abs(xy).max(initial=0.0) / (system.n_samples * l1_ratio)
+    alpha_max = max(alpha_max, np.finfo(np.float64).tiny)
+    alphas = np.geomspace(alpha_max, alpha_max * config.eps, config.n_alphas)
+    _, coefs, _ = enet_path(
+        np.asfortranarray(surrogate_X),
+        surrogate_y,
+        l1_ratio=l1_ratio,
+        alphas=alphas * system.n_samples / n_features,
+        precompute=gram,
+        Xy=xy,
+        max_iter=max_iter,
+        tol=tol,
+        check_input=False,
+    )
+    return alphas, coefs
+
+
+def validation_r2(system: GramSystem, coefs: np.ndarray, X_val: Any, y_val: np.ndarray) -> np.ndarray:
+    """R² на отложенной выборке для каждого столбца коэффициентов."""
+    predictions = np.asarray(X_val @ coefs) + system.intercepts(coefs)
+    residuals = ((predictions - y_val[:, None]) ** 2).sum(axis=0)
+    total = ((y_val - y_val.mean()) ** 2).sum()
+    return 1.0 - residuals / total if total > 0 else np.where(residuals > 0, -np.inf, 1.0)
+
+
+def select_alphas(
+    models: dict[str, Any],
+    X: Any,
+    y: np.ndarray,
+    config: RegularizationPathConfig,
+    random_state: Optional[int] = None,
+) -> dict[str, tuple[dict[str, Any], float]]:
+    """
+    Лучшие alpha (и l1_ratio) для моделей из LINEAR_PATH_MODELS в models по
+    путям регуляризации на обучающей части X и R² на отложенной. Возвращает
+    параметры для set_params и R² на отложенной части.
+    """
+    names = [name for name in LINEAR_PATH_MODELS if name in models]
+    n_rows = X.shape[0]
+    n_validation = int(round(n_rows * config.validation_fraction))
+    if not names or X.shape[1] > MAX_PATH_FEATURES or n_validation < 1 or n_rows - n_validation < 2:
+        return {}
+    order = np.random.default_rng(random_state).permutation(n_rows)
+    fit_rows, validation_rows = np.sort(order[n_validation:]), np.sort(order[:n_validation])
+    y = np.asarray(y, dtype=np.float64)
+    system = GramSystem.from_data(X[fit_rows], y[fit_rows])
+    X_val, y_val = X[validation_rows], y[validation_rows]
+
+    selected: dict[str, tuple[dict[str, Any], float]] = {}
+    if "ridge" in names:
+        alphas = ridge_alphas(system, config)
+        scores = validation_r2(system, ridge_path(system, alphas), X_val, y_val)
+        best = int(np.argmax(scores))
+        selected["ridge"] = ({"alpha": float(alphas[best])}, float(scores[best]))
+    for name in ("lasso", "elastic_net"):
+        if name not in names:
+            continue
+        params = models[name].get_params()
+        l1_ratios = (1.0,) if name == "lasso" else config.l1_ratios
+        candidates = []
+        for l1_ratio in l1_ratios:
+            alphas, coefs = elastic_net_path(system, l1_ratio, config, params["max_iter"], params["tol"])
+            scores = validation_r2(system, coefs, X_val, y_val)
+            best = int(np.argmax(scores))
+            candidates.append((float(scores[best]), float(alphas[best]), l1_ratio))
+        score, alpha, l1_ratio = max(candidates)
+        selected[name] = ({"alpha": alpha} if name == "lasso" else {"alpha": alpha, "l1_ratio": l1_ratio}, score)
+    return selected
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import math
+import multiprocessing
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from multiprocessing.connection import wait as wait_connections
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
 
 import joblib
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import (
     GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
     RandomForestRegressor,
 )
 from sklearn.linear_model import (
@@ -19,25 +30,293 @@ from sklearn.linear_model import (
     Ridge,
 )
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import KFold, train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
 from sklearn.svm import SVR
 
+from .data_preprocessor import PreprocessingState
+from .encoders import EncodingConfig, high_cardinality_encoder
+from .hyperparameter_search import (
+    SEARCH_SPACES,
+    WARM_START_RESOURCES,
+    SearchConfig,
+    halving_schedule,
+    mean_score,
+    sample_candidates,
+    survivors,
+)
+from .linear_paths import LINEAR_PATH_MODELS, RegularizationPathConfig, select_alphas
+from .training_budget import TrainingBudget, estimate_cost, measure_fit
+
+# Модели, обучаемые прямо на разреженной матрице; остальным нужна плотная копия
+SPARSE_INPUT_MODELS = frozenset({"linear_regression", "ridge", "lasso", "elastic_net", "svr"})
+# Модели со своей предобработкой: категории как порядковые коды без One-Hot
+NATIVE_CATEGORICAL_MODELS = frozenset({"hist_gradient_boosting"})
+
+# Движки градиентного бустинга: exact - GradientBoostingRegressor,
+# histogram - HistGradientBoostingRegressor, auto - histogram на больших данных
+BOOSTING_ENGINES = ("auto", "exact", "histogram")
+HIST_BOOSTING_MIN_ROWS = 100_000
+# Предел числа категорий одного признака для HistGradientBoostingRegressor (max_bins)
+HIST_MAX_CATEGORIES = 255
+# Без бюджета SVR обучается только на небольших выборках (сложность ~ n^2)
+SVR_MAX_ROWS = 5000
+# Время на запуск процесса обучения (импорт библиотек, чтение матриц) сверх таймаута
+PROCESS_STARTUP_SECONDS = 120.0
+
 
 @dataclass
 class ModelTrainingResult:
     model_name: str
     pipeline: Pipeline
     metrics: Dict[str, float]
+    # Обученная предобработка сырых данных; сохраняется вместе с моделью
+    preprocessing: Optional[PreprocessingState] = None
+    # Число строк, на которых обучена модель, и причина подвыборки (бюджет)
+    training_rows: Optional[int] = None
+    budget_note: Optional[str] = None
+    # Метрики k-fold кросс-валидации (train(..., cv_folds=k))
+    cross_validation: Optional["CrossValidationResult"] = None
+    # Параметры, выбранные подбором (search: средний R² на фолдах) или путями
+    # регуляризации (paths: R² на отложенной части обучающей выборки), и их оценка
+    best_params: Optional[Dict[str, Any]] = None
+    search_score: Optional[float] = None
+    # Стоимость обучения и обслуживания модели (см. ModelProfile)
+    profile: Optional["ModelProfile"] = None
+
+
+@dataclass
+class ModelProfile:
+    """
+    Стоимость модели помимо качества: подготовка признаков (общая для моделей
+    с одной матрицей, с плотной копией для древесных), обучение, предсказание
+    на 1 000 строк (преобразование признаков + модель), пик памяти Python/NumPy
+    при обучении (None без отслеживания), размер сериализованного Pipeline и
+    ширина матрицы признаков.
+    """
+
+    preprocessing_seconds: float
+    fit_seconds: float
+    predict_ms_per_1k_rows: float
+    peak_fit_memory_bytes: Optional[int]
+    serialized_bytes: int
+    n_features: int
+
+
+@dataclass
+class FitStats:
+    """Замеры одного обучения в _fit_task."""
+
+    fit_seconds: float
+    predict_seconds: float
+    peak_bytes: Optional[int] = None
+
+
+@dataclass
+class CrossValidationResult:
+    """Метрики модели на каждом фолде кросс-валидации, их среднее и разброс."""
+
+    model_name: str
+    fold_metrics: list[Dict[str, float]]
+
+    @property
+    def n_splits(self) -> int:
+        return len(self.fold_metrics)
+
+    @property
+    def mean(self) -> Dict[str, float]:
+        return {key: float(np.mean([m[key] for m in self.fold_metrics])) for key in self.fold_metrics[0]}
+
+    @property
+    def std(self) -> Dict[str, float]:
+        return {key: float(np.std([m[key] for m in self.fold_metrics])) for key in self.fold_metrics[0]}
+
+
+@dataclass
+class FeatureMatrices:
+    """Обученная предобработка и преобразованные ею выборки, общие для всех моделей."""
+
+    preprocessor: ColumnTransformer
+    X_train: Any
+    X_test: Any
+    y_train: pd.Series
+    y_test: pd.Series
+    # Время обучения предобработки с преобразованием X_train и преобразования X_test
+    fit_transform_seconds: float = 0.0
+    transform_seconds: float = 0.0
+    densify_seconds: float = 0.0
+    _dense: Optional[tuple[np.ndarray, np.ndarray]] = field(default=None, repr=False)
+    _y_train_values: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def is_sparse(self) -> bool:
+        return sparse.issparse(self.X_train)
+
+    @property
+    def y_train_values(self) -> np.ndarray:
+        """y_train одним массивом: общий объект для всех моделей (и для отображения в память)."""
+        if self._y_train_values is None:
+            self._y_train_values = np.asarray(self.y_train)
+        return self._y_train_values
+
+    def matrices(self, accepts_sparse: bool) -> tuple[Any, Any]:
+        """Выборки для модели: разреженные как есть или плотная копия (создается один раз)."""
+        if accepts_sparse or not self.is_sparse:
+            return self.X_train, self.X_test
+        if self._dense is None:
+            start = time.perf_counter()
+            self._dense = (self.X_train.toarray(), self.X_test.toarray())
+            self.densify_seconds = time.perf_counter() - start
+        return self._dense
+
+
+def to_dense(X: Any) -> Any:
+    """Переводит разреженную матрицу признаков в плотную (шаг Pipeline древесных моделей)."""
+    return X.toarray() if sparse.issparse(X) else X
+
+
+def _fit_task(
+    name: str,
+    regressor: Any,
+    X_train: Any,
+    y_train: np.ndarray,
+    X_test: Any,
+    trace_memory: bool = False,
+) -> tuple[str, Any, Optional[np.ndarray], Optional[str], Optional[FitStats]]:
+    """
+    Обучает регрессор и предсказывает тестовую выборку, замеряя время (и пик
+    памяти при trace_memory). Выполняется и в процессах пула, поэтому ошибка
+    возвращается текстом, а не пробрасывается.
+    """
+    try:
+        fit_seconds, peak_bytes = measure_fit(regressor, X_train, y_train, trace_memory)
+        start = time.perf_counter()
+        predictions = regressor.predict(X_test)
+        stats = FitStats(fit_seconds, time.perf_counter() - start, peak_bytes if trace_memory else None)
+        return name, regressor, predictions, None, stats
+    except Exception as e:
+        return name, regressor, None, str(e), None
+
+
+def _fit_in_process(
+    connection: Any, name: str, regressor: Any, paths: tuple[Path, Path, Path], trace_memory: bool = False
+) -> None:
+    """
+    Точка входа отдельного процесса обучения: матрицы читаются из отображенных
+    файлов, затем процесс сообщает о готовности (None) и отсчет таймаута начинается.
+    """
+    X_train, y_train, X_test = (joblib.load(path, mmap_mode="r") for path in paths)
+    connection.send(None)
+    connection.send(_fit_task(name, regressor, X_train, y_train, X_test, trace_memory))
+    connection.close()
+
+
+@contextmanager
+def _shared_matrices(inputs: dict[str, tuple[Any, Any, Any]]) -> Iterator[dict[str, tuple[Path, Path, Path]]]:
+    """
+    Записывает каждую матрицу один раз во временный каталог (joblib.dump) и
+    отдает пути к файлам для каждой модели; каталог удаляется по выходе.
+    """
+    folder = Path(tempfile.mkdtemp(prefix="carml_features_"))
+    written: dict[int, Path] = {}
+
+    def dump(value: Any) -> Path:
+        if id(value) not in written:
+            path = folder / f"{len(written)}.joblib"
+            joblib.dump(value, path)
+            written[id(value)] = path
+        return written[id(value)]
+
+    try:
+        yield {name: tuple(dump(value) for value in values) for name, values in inputs.items()}
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+class _ByteCounter:
+    """Файловый объект, который только считает записанные байты."""
+
+    def __init__(self) -> None:
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # joblib выравнивает массивы NumPy по текущей позиции
+        return self.size
+
+    def flush(self) -> None:
+        pass
+
+
+def serialized_size(obj: Any) -> int:
+    """Размер объекта в формате save_model (joblib) без записи на диск."""
+    counter = _ByteCounter()
+    joblib.dump(obj, counter)
+    return counter.size
+
+
+def _stage_callback(
+    progress_callback: Optional[Callable[[int], None]], start: int, end: int
+) -> Callable[[int], None]:
+    """Переводит процент этапа в диапазон [start, end] общего индикатора (не выше 99)."""
+
+    def report(percent: int) -> None:
+        if progress_callback is not None:
+            progress_callback(min(start + (end - start) * percent // 100, 99))
+
+    return report
 
 
 class ModelTrainer:
     """Обучает и оценивает модели машинного обучения."""
 
-    def __init__(self, target_column: str = "price") -> None:
+    def __init__(
+        self,
+        target_column: str = "price",
+        n_jobs: int = 1,
+        sparse_features: bool = True,
+        encoding: Optional[EncodingConfig] = None,
+        boosting: str = "exact",
+        budget: Optional[TrainingBudget] = None,
+        profile_memory: bool = False,
+    ) -> None:
+        """
+        n_jobs - число процессов, обучающих модели одновременно
+        (1 - последовательно, -1 - по числу ядер).
+
+        sparse_features оставляет One-Hot признаки в разреженном виде (CSR):
+        линейные модели и SVR обучаются на нем напрямую, а древесные модели
+        получают плотную копию.
+
+        encoding задает кодирование категорий с большим числом значений
+        (см. EncodingConfig); по умолчанию все категории кодируются One-Hot.
+
+        boosting выбирает движок градиентного бустинга (BOOSTING_ENGINES):
+        гистограммный обучается многопоточно, с ранней остановкой и
+        категориями без One-Hot; auto включает его от HIST_BOOSTING_MIN_ROWS строк.
+        По умолчанию - exact (GradientBoostingRegressor, как раньше).
+
+        budget ограничивает время и память обучения каждой модели (см.
+        TrainingBudget); пропущенные модели и причины попадают в self.skipped.
+
+        Каждый результат получает ModelProfile со временем подготовки признаков,
+        обучения и предсказания, размером и шириной признаков. profile_memory
+        добавляет пик памяти обучения; по умолчанию выключен, так как
+        tracemalloc замедляет обучение деревьев примерно на 15 %.
+        """
         self.target_column = target_column
+        self.n_jobs = n_jobs
+        self.sparse_features = sparse_features
+        self.encoding = encoding or EncodingConfig()
+        self.boosting = boosting
+        self.budget = budget
+        self.profile_memory = profile_memory
         self.results: dict[str, ModelTrainingResult] = {}
+        self.skipped: dict[str, str] = {}
 
     def train(
         self,
@@ -45,13 +324,56 @@ class ModelTrainer:
         test_size: float = 0.2,
         random_state: int = 42,
         rf_estimators: int = 300,
+        n_jobs: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        encoding: Optional[EncodingConfig] = None,
+        boosting: Optional[str] = None,
+        budget: Optional[TrainingBudget] = None,
+        cv_folds: Optional[int] = None,
+        search: Optional[SearchConfig] = None,
+        paths: Optional[RegularizationPathConfig] = None,
+        profile_memory: Optional[bool] = None,
     ) -> dict[str, ModelTrainingResult]:
+        """
+        Обучает все модели на общих матрицах признаков.
+
+        При n_jobs != 1 независимые модели обучаются в пуле процессов joblib;
+        матрицы передаются через файлы, отображенные в память, а не копиями.
+        Каждая модель попадает в self.results сразу после завершения, а
+        progress_callback получает процент обученных моделей.
+
+        С бюджетом модели сначала обучаются пробно на подвыборке; модели,
+        не укладывающиеся в лимиты, обучаются на меньшей подвыборке или
+        пропускаются, а при timeout_seconds каждая модель обучается в
+        отдельном процессе и прерывается по таймауту.
+
+        cv_folds >= 2 дополнительно оценивает обученные модели k-fold
+        кросс-валидацией на всех данных (см. cross_validate); результат - в
+        ModelTrainingResult.cross_validation.
+
+        search включает подбор гиперпараметров (см. SearchConfig) на фолдах
+        обучающей выборки; модели обучаются с лучшими найденными параметрами,
+        которые сохраняются в ModelTrainingResult.best_params.
+
+        paths выбирает alpha Ridge, Lasso и ElasticNet по путям регуляризации
+        (см. RegularizationPathConfig) на общей матрице признаков; выбранные
+        параметры также попадают в best_params.
+
+        profile_memory замеряет пик памяти обучения для ModelProfile
+        (None - значение из ModelTrainer).
+        """
         if dataframe.empty:
             raise ValueError("Dataframe is empty. Cannot train models.")
         
         if self.target_column not in dataframe.columns:
             raise ValueError(f"Target column '{self.target_column}' was not found.")
 
+        boosting = self._check_boosting(boosting or self.boosting)
+        budget = budget or self.budget
+        # Результаты прошлого запуска не должны выдаваться за пропущенные сейчас модели
+        self.results = {}
+        self.skipped = {}
+
         X = dataframe.drop(columns=[self.target_column])
         y = dataframe[self.target_column]
         
@@ -62,9 +384,597 @@ class ModelTrainer:
             X, y, test_size=test_size, random_state=random_state
         )
 
+        # Масштабирование и кодирование категорий обучаются один раз на все модели
+        models = self._build_models(
+            len(X_train), random_state, rf_estimators, boosting,
+            budgeted=budget is not None and budget.has_limits,
+        )
+        encoding = encoding or self.encoding
+
+        # Индикатор делится между этапами: подбор, обучение, кросс-валидация
+        training_start = 40 if search is not None else 0
+        training_end = (training_start + 100) // 2 if cv_folds else 100
+
+        searched: dict[str, tuple[dict[str, Any], float]] = {}
+        if search is not None:
+            # Alpha линейных моделей при paths выбирается по путям регуляризации
+            searched = self._search_hyperparameters(
+                {
+                    name: model
+                    for name, model in models.items()
+                    if paths is None or name not in LINEAR_PATH_MODELS
+                },
+                X_train,
+                y_train,
+                search,
+                encoding,
+                random_state,
+                n_jobs,
+                budget,
+                _stage_callback(progress_callback, 0, training_start),
+            )
+            for name, (params, _) in searched.items():
+                models[name].set_params(**params)
+
+        model_features = self._feature_sets(
+            models, X, X_train, X_test, y_train, y_test, encoding, random_state
+        )
+        linear_models = {name: models[name] for name in LINEAR_PATH_MODELS if name in models}
+        if paths is not None and linear_models:
+            # У линейных моделей общая матрица признаков; она же - основа матрицы Грама
+            features = model_features[next(iter(linear_models))]
+            X_linear, _ = features.matrices(accepts_sparse=True)
+            selected = select_alphas(linear_models, X_linear, features.y_train_values, paths, random_state)
+            for name, (params, _) in selected.items():
+                models[name].set_params(**params)
+            searched.update(selected)
+
+        plans: dict[str, tuple[Optional[np.ndarray], Optional[str]]] = {}
+        if budget is not None and budget.has_limits:
+            plans = self._plan_budget(models, model_features, budget, random_state)
+            models = {name: models[name] for name in plans}
+        if not models:
+            return self.results
+        inputs = {
+            name: self._model_inputs(name, model_features[name], plans.get(name, (None, None))[0])
+            for name in models
+        }
+        # Неподготовленные копии для кросс-валидации (с подобранными параметрами)
+        unfitted = {name: clone(model) for name, model in models.items()}
+
+        training_callback = _stage_callback(progress_callback, training_start, training_end)
+        if profile_memory is None:
+            profile_memory = self.profile_memory
+        outcomes = self._fit_all(models, inputs, n_jobs, budget, profile_memory)
+        for done, (name, regressor, predictions, error, stats) in enumerate(outcomes, start=1):
+            result = self._make_result(name, regressor, predictions, error, model_features[name])
+            if result is not None:
+                result.profile = self._profile(result, stats, model_features[name], inputs[name])
+                result.training_rows = inputs[name][0].shape[0]
+                result.budget_note = plans.get(name, (None, None))[1]
+                if name in searched:
+                    result.best_params, result.search_score = searched[name]
+                self.results[name] = result
+            else:
+                del unfitted[name]
+            training_callback(int(100 * done / len(models)))
+
+        if cv_folds and unfitted:
+            scores = self._cross_validate(
+                unfitted,
+                X,
+                y,
+                cv_folds,
+                random_state,
+                n_jobs,
+                _stage_callback(progress_callback, training_end, 100),
+                encoding,
+                budget,
+                {name: len(sample) for name, (sample, _) in plans.items() if sample is not None},
+            )
+            for name, score in scores.items():
+                self.results[name].cross_validation = score
+
+        return self.results
+
+    def cross_validate(
+        self,
+        dataframe: pd.DataFrame,
+        n_splits: int = 5,
+        random_state: int = 42,
+        rf_estimators: int = 300,
+        n_jobs: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        encoding: Optional[EncodingConfig] = None,
+        boosting: Optional[str] = None,
+        budget: Optional[TrainingBudget] = None,
+        model_names: Optional[Iterable[str]] = None,
+    ) -> dict[str, CrossValidationResult]:
+        """
+        K-fold кросс-валидация моделей (model_names - подмножество, None - все).
+
+        Предобработка обучается один раз на каждом фолде и общая для всех
+        моделей фолда; пары (модель, фолд) обучаются в пуле процессов, как в
+        train. Модель, не обученная хотя бы на одном фолде, не попадает в
+        результат, причина записывается в self.skipped. Лимиты бюджета
+        проверяются пробным обучением на первом фолде: дорогие модели на всех
+        фолдах обучаются на подвыборке того же размера или пропускаются.
+        timeout_seconds ограничивает суммарное время обучения модели на всех
+        фолдах; отдельные процессы на фолды не запускаются.
+        """
+        if self.target_column not in dataframe.columns:
+            raise ValueError(f"Target column '{self.target_column}' was not found.")
+        boosting = self._check_boosting(boosting or self.boosting)
+        X = dataframe.drop(columns=[self.target_column])
+        y = dataframe[self.target_column]
+
+        n_train = len(X) - len(X) // max(n_splits, 1)
+        # Один набор моделей на все фолды, чтобы пороги по числу строк не расходились
+        models = self._build_models(n_train, random_state, rf_estimators, boosting)
+        if model_names is not None:
+            selected = set(model_names)
+            models = {name: model for name, model in models.items() if name in selected}
+        return self._cross_validate(
+            models,
+            X,
+            y,
+            n_splits,
+            random_state,
+            n_jobs,
+            _stage_callback(progress_callback, 0, 100),
+            encoding or self.encoding,
+            budget or self.budget,
+        )
+
+    def _cross_validate(
+        self,
+        models: dict[str, Any],
+        X: pd.DataFrame,
+        y: pd.Series,
+        n_splits: int,
+        random_state: Optional[int],
+        n_jobs: Optional[int],
+        progress_callback: Callable[[int], None],
+        encoding: EncodingConfig,
+        budget: Optional[TrainingBudget],
+        training_rows: Optional[dict[str, int]] = None,
+    ) -> dict[str, CrossValidationResult]:
+        """
+        training_rows - размер подвыборки обучающей части фолда для моделей,
+        которым он уже назначен бюджетом в train; без него решение по бюджету
+        принимается здесь.
+        """
+        if n_splits < 2:
+            raise ValueError("n_splits must be at least 2.")
+        if len(X) < n_splits:
+            raise ValueError("Not enough data for cross-validation.")
+        if not models:
+            return {}
+
+        folds = list(KFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X))
+        fold_sets = self._fold_features(models, X, y, folds, encoding, random_state)
+        if training_rows is None and budget is not None and budget.has_limits:
+            estimators, features = fold_sets[0]
+            plans = self._plan_budget(estimators, features, budget, random_state)
+            training_rows = {name: len(sample) for name, (sample, _) in plans.items() if sample is not None}
+            models = {name: models[name] for name in plans}
+            if not models:
+                return {}
+        training_rows = training_rows or {}
+
+        rng = np.random.default_rng(random_state)
+        fold_models: dict[tuple[str, int], Any] = {}
+        inputs: dict[tuple[str, int], tuple[Any, Any, Any]] = {}
+        for fold, (estimators, features) in enumerate(fold_sets):
+            for name in models:
+                sample = None
+                n_rows = features[name].X_train.shape[0]
+                if training_rows.get(name, n_rows) < n_rows:
+                    # Модель, которой бюджет назначил подвыборку, не обучается на полных фолдах
+                    sample = np.sort(rng.choice(n_rows, size=training_rows[name], replace=False))
+                fold_models[name, fold] = estimators[name]
+                inputs[name, fold] = self._model_inputs(name, features[name], sample)
+
+        fold_metrics: dict[str, list[Optional[Dict[str, float]]]] = {
+            name: [None] * n_splits for name in models
+        }
+        failed: dict[str, str] = {}
+        # Процесс на каждую пару (модель, фолд) обошел бы пул n_jobs. С жестким
+        # пределом фолды обучаются по очереди, и модель, суммарное время обучения
+        # которой превысило timeout_seconds, на следующих фолдах не обучается.
+        timeout = budget.timeout_seconds if budget is not None else None
+        batches = (
+            [list(fold_models)]
+            if timeout is None
+            else [[key for key in fold_models if key[1] == fold] for fold in range(n_splits)]
+        )
+        spent = dict.fromkeys(models, 0.0)
+        done = 0
+        for batch in batches:
+            batch = [key for key in batch if key[0] not in failed]
+            outcomes = self._fit_all(
+                {key: fold_models[key] for key in batch}, {key: inputs[key] for key in batch}, n_jobs, None
+            )
+            for (name, fold), _, predictions, error, stats in outcomes:
+                done += 1
+                if stats is not None:
+                    spent[name] += stats.fit_seconds
+                if error is None and not np.isfinite(predictions).all():
+                    error = "некорректные предсказания (NaN/Inf)"
+                if error is None and timeout is not None and spent[name] > timeout:
+                    error = f"превышен лимит времени {timeout:g} c"
+                if error is not None:
+                    failed.setdefault(name, f"фолд {fold + 1}: {error}")
+                else:
+                    fold_metrics[name][fold] = self._evaluate(fold_sets[fold][1][name].y_test, predictions)
+                progress_callback(int(100 * done / len(fold_models)))
+
+        for name, reason in failed.items():
+            print(f"Ошибка кросс-валидации модели {name}: {reason}")
+            self.skipped[name] = f"кросс-валидация: {reason}"
+        return {
+            name: CrossValidationResult(model_name=name, fold_metrics=metrics)
+            for name, metrics in fold_metrics.items()
+            if name not in failed
+        }
+
+    def _search_hyperparameters(
+        self,
+        models: dict[str, Any],
+        X: pd.DataFrame,
+        y: pd.Series,
+        config: SearchConfig,
+        encoding: EncodingConfig,
+        random_state: Optional[int],
+        n_jobs: Optional[int],
+        budget: Optional[TrainingBudget],
+        progress_callback: Callable[[int], None],
+    ) -> dict[str, tuple[dict[str, Any], float]]:
+        """
+        Successive halving по SEARCH_SPACES на фолдах X: предобработка каждого
+        фолда выполняется один раз на весь подбор. Возвращает для каждой
+        модели лучшие параметры и их средний R²; модели без пространства или
+        без успешных кандидатов остаются с параметрами по умолчанию.
+
+        Кандидаты обучаются в текущем процессе или пуле joblib, без отдельного
+        процесса на задачу; budget.timeout_seconds ограничивает подбор каждой
+        модели целиком и проверяется между раундами.
+        """
+        names = [name for name in models if name in SEARCH_SPACES]
+        if not names or len(X) < config.cv_folds:
+            return {}
+        folds = list(KFold(n_splits=config.cv_folds, shuffle=True, random_state=random_state).split(X))
+        fold_sets = self._fold_features(
+            {name: models[name] for name in names}, X, y, folds, encoding, random_state
+        )
+        # Подвыборки строк - префиксы одной случайной перестановки каждого фолда
+        rng = np.random.default_rng(random_state)
+        orders = [rng.permutation(len(train_index)) for train_index, _ in folds]
+
+        best: dict[str, tuple[dict[str, Any], float]] = {}
+        for position, name in enumerate(names):
+            candidates = sample_candidates(name, config, random_state)
+            resource_param = WARM_START_RESOURCES.get(name)
+            if resource_param is not None:
+                schedule = halving_schedule(
+                    len(candidates), config.factor, models[name].get_params()[resource_param]
+                )
+            else:
+                rows = min(len(train_index) for train_index, _ in folds)
+                schedule = halving_schedule(len(candidates), config.factor, rows, config.min_rows)
+
+            estimators: dict[tuple[int, int], Any] = {}
+            for candidate, params in enumerate(candidates):
+                for fold, (fold_estimators, _) in enumerate(fold_sets):
+                    estimator = clone(fold_estimators[name]).set_params(**params)
+                    if resource_param is not None:
+                        # Следующий раунд добавляет деревья/итерации к уже обученным
+                        estimator.set_params(warm_start=True)
+                    estimators[candidate, fold] = estimator
+
+            alive = list(range(len(candidates)))
+            subsets: dict[tuple[int, int], tuple[Any, Any, Any]] = {}
+            scores: dict[int, float] = {}
+            deadline = (
+                time.perf_counter() + budget.timeout_seconds
+                if budget is not None and budget.timeout_seconds is not None
+                else None
+            )
+            for round_, resource in enumerate(schedule):
+                final = round_ == len(schedule) - 1
+                if len(alive) == 1 and not final:
+                    continue
+                if deadline is not None and scores and time.perf_counter() > deadline:
+                    # Победитель - лидер последнего завершенного раунда
+                    print(f"Предупреждение: подбор параметров {name} остановлен по лимиту времени.")
+                    break
+                tasks: dict[tuple[str, int, int], Any] = {}
+                inputs: dict[tuple[str, int, int], tuple[Any, Any, Any]] = {}
+                for candidate in alive:
+                    for fold, (_, features) in enumerate(fold_sets):
+                        fold_inputs = self._model_inputs(name, features[name])
+                        if resource_param is not None:
+                            estimators[candidate, fold].set_params(**{resource_param: resource})
+                        elif resource < fold_inputs[0].shape[0]:
+                            if (fold, resource) not in subsets:
+                                sample = np.sort(orders[fold][:resource])
+                                subsets[fold, resource] = (
+                                    fold_inputs[0][sample], fold_inputs[1][sample], fold_inputs[2]
+                                )
+                            fold_inputs = subsets[fold, resource]
+                        tasks[name, candidate, fold] = estimators[candidate, fold]
+                        inputs[name, candidate, fold] = fold_inputs
+
+                fold_scores: dict[int, list[float]] = {candidate: [] for candidate in alive}
+                # Без budget: процесс на каждую задачу обнулил бы выгоду warm_start
+                for (_, candidate, fold), regressor, predictions, error, _ in self._fit_all(
+                    tasks, inputs, n_jobs, None
+                ):
+                    # Из процесса пула возвращается обученная копия - ее и дообучаем
+                    estimators[candidate, fold] = regressor
+                    if error is None and np.isfinite(predictions).all():
+                        fold_scores[candidate].append(
+                            r2_score(fold_sets[fold][1][name].y_test, predictions)
+                        )
+                    else:
+                        fold_scores[candidate].append(-math.inf)
+                scores = {candidate: mean_score(values) for candidate, values in fold_scores.items()}
+                alive = survivors(scores, config.factor)
+                for candidate, fold in list(estimators):
+                    if candidate not in alive:
+                        del estimators[candidate, fold]
+
+            winner = alive[0]
+            if math.isfinite(scores.get(winner, -math.inf)):
+                best[name] = (candidates[winner], scores[winner])
+            else:
+                print(f"Предупреждение: подбор параметров {name} не дал ни одной успешной модели.")
+            progress_callback(int(100 * (position + 1) / len(names)))
+        return best
+
+    @staticmethod
+    def _check_boosting(boosting: str) -> str:
+        if boosting not in BOOSTING_ENGINES:
+            raise ValueError(
+                f"Unknown boosting engine '{boosting}'. Expected one of: {', '.join(BOOSTING_ENGINES)}."
+            )
+        return boosting
+
+    def _feature_sets(
+        self,
+        models: dict[str, Any],
+        X: pd.DataFrame,
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame,
+        y_train: pd.Series,
+        y_test: pd.Series,
+        encoding: EncodingConfig,
+        random_state: Optional[int],
+    ) -> dict[str, FeatureMatrices]:
+        """
+        Обучает предобработку на X_train один раз и раздает матрицы моделям;
+        моделям с поддержкой категорий - отдельный набор с порядковыми кодами.
+        """
+        preprocessor = self._build_preprocessor(X, self.sparse_features, encoding, random_state)
+        features = self._prepare_features(preprocessor, X_train, X_test, y_train, y_test)
+        model_features = dict.fromkeys(models, features)
+        native_models = NATIVE_CATEGORICAL_MODELS & models.keys()
+        if native_models:
+            native = self._prepare_features(
+                self._build_native_preprocessor(X), X_train, X_test, y_train, y_test
+            )
+            categorical = np.zeros(native.X_train.shape[1], dtype=bool)
+            if "cat" in native.preprocessor.output_indices_:
+                categorical[native.preprocessor.output_indices_["cat"]] = True
+            for name in native_models:
+                models[name].set_params(categorical_features=categorical)
+                model_features[name] = native
+        return model_features
+
+    def _fold_features(
+        self,
+        models: dict[str, Any],
+        X: pd.DataFrame,
+        y: pd.Series,
+        folds: list[tuple[np.ndarray, np.ndarray]],
+        encoding: EncodingConfig,
+        random_state: Optional[int],
+    ) -> list[tuple[dict[str, Any], dict[str, FeatureMatrices]]]:
+        """Копии моделей и матрицы признаков каждого фолда (предобработка - один раз на фолд)."""
+        fold_sets = []
+        for train_index, test_index in folds:
+            estimators = {name: clone(model) for name, model in models.items()}
+            features = self._feature_sets(
+                estimators,
+                X,
+                X.iloc[train_index],
+                X.iloc[test_index],
+                y.iloc[train_index],
+                y.iloc[test_index],
+                encoding,
+                random_state,
+            )
+            fold_sets.append((estimators, features))
+        return fold_sets
+
+    def _fit_all(
+        self,
+        models: dict[Any, Any],
+        inputs: dict[Any, tuple[Any, Any, Any]],
+        n_jobs: Optional[int],
+        budget: Optional[TrainingBudget],
+        trace_memory: bool = False,
+    ) -> Iterator[tuple]:
+        """
+        Выбирает способ обучения: отдельные процессы с таймаутом, пул
+        процессов joblib или последовательно в текущем процессе.
+        """
+        workers = min(joblib.effective_n_jobs(self.n_jobs if n_jobs is None else n_jobs), len(models))
+        if budget is not None and budget.timeout_seconds is not None:
+            return self._fit_isolated(models, inputs, workers, budget.timeout_seconds, trace_memory)
+        if workers > 1:
+            return self._fit_parallel(models, inputs, workers, trace_memory)
+        return (
+            _fit_task(name, regressor, *inputs[name], trace_memory=trace_memory)
+            for name, regressor in models.items()
+        )
+
+    def _plan_budget(
+        self,
+        models: dict[str, Any],
+        model_features: dict[str, FeatureMatrices],
+        budget: TrainingBudget,
+        random_state: Optional[int],
+    ) -> dict[str, tuple[Optional[np.ndarray], Optional[str]]]:
+        """
+        Пробное обучение каждой модели и решение по бюджету: полная выборка
+        (None), индексы подвыборки с пояснением или пропуск (запись в self.skipped).
+        """
+        plans: dict[str, tuple[Optional[np.ndarray], Optional[str]]] = {}
+        for name, regressor in models.items():
+            X_train, y_train, _ = self._model_inputs(name, model_features[name])
+            n_rows = X_train.shape[0]
+            if n_rows <= budget.probe_rows:
+                plans[name] = (None, None)
+                continue
+            try:
+                estimate = estimate_cost(name, regressor, X_train, y_train, budget, random_state)
+            except Exception as e:
+                self.skipped[name] = f"пробное обучение не удалось: {e}"
+                continue
+            seconds, peak_bytes = estimate.project(n_rows)
+            over = []
+            if budget.max_fit_seconds is not None and seconds > budget.max_fit_seconds:
+                over.append(f"прогноз времени {seconds:.1f} c > {budget.max_fit_seconds:.1f} c")
+            if budget.max_memory_bytes is not None and peak_bytes > budget.max_memory_bytes:
+                over.append(
+                    f"прогноз памяти {peak_bytes / 1024 ** 2:.0f} MB > {budget.max_memory_bytes / 1024 ** 2:.0f} MB"
+                )
+            if not over:
+                plans[name] = (None, None)
+                continue
+            rows = min(estimate.affordable_rows(budget), n_rows)
+            if not budget.allow_subsample or rows < budget.min_subsample_rows:
+                self.skipped[name] = ", ".join(over)
+                continue
+            rng = np.random.default_rng(random_state)
+            sample = np.sort(rng.choice(n_rows, size=rows, replace=False))
+            plans[name] = (sample, f"подвыборка {rows:,} из {n_rows:,} строк: " + ", ".join(over))
+        return plans
+
+    @staticmethod
+    def _model_inputs(
+        name: str, features: FeatureMatrices, rows: Optional[np.ndarray] = None
+    ) -> tuple[Any, np.ndarray, Any]:
+        X_train, X_test = features.matrices(name in SPARSE_INPUT_MODELS)
+        if rows is not None:
+            return X_train[rows], features.y_train_values[rows], X_test
+        return X_train, features.y_train_values, X_test
+
+    @staticmethod
+    def _fit_parallel(
+        models: dict[str, Any],
+        inputs: dict[str, tuple[Any, Any, Any]],
+        workers: int,
+        trace_memory: bool = False,
+    ) -> Iterator[tuple]:
+        """Обучает модели в пуле процессов и отдает результаты по мере готовности."""
+        with _shared_matrices(inputs) as paths:
+            # Процессы получают ссылки на отображенные файлы, а не копии матриц
+            loaded: dict[Path, Any] = {}
+            tasks = []
+            for name, regressor in models.items():
+                for path in paths[name]:
+                    if path not in loaded:
+                        loaded[path] = joblib.load(path, mmap_mode="r")
+                matrices = (loaded[path] for path in paths[name])
+                tasks.append(delayed(_fit_task)(name, regressor, *matrices, trace_memory=trace_memory))
+            parallel = Parallel(n_jobs=workers, return_as="generator_unordered", max_nbytes=None)
+            try:
+                yield from parallel(tasks)
+            finally:
+                loaded.clear()
+
+    @staticmethod
+    def _fit_isolated(
+        models: dict[str, Any],
+        inputs: dict[str, tuple[Any, Any, Any]],
+        workers: int,
+        timeout: float,
+        trace_memory: bool = False,
+    ) -> Iterator[tuple]:
+        """
+        Обучает каждую модель в отдельном процессе (не больше workers
+        одновременно). Процесс, не уложившийся в timeout секунд с момента
+        готовности, завершается, а модель возвращается с ошибкой.
+        """
+        context = multiprocessing.get_context("spawn")
+        pending = list(models.items())
+        running: dict[Any, tuple[str, Any, Any, float]] = {}
+        with _shared_matrices(inputs) as paths:
+            try:
+                while pending or running:
+                    while pending and len(running) < workers:
+                        name, regressor = pending.pop(0)
+                        receiver, sender = context.Pipe(duplex=False)
+                        process = context.Process(
+                            target=_fit_in_process,
+                            args=(sender, name, regressor, paths[name], trace_memory),
+                        )
+                        process.start()
+                        sender.close()
+                        deadline = time.monotonic() + PROCESS_STARTUP_SECONDS + timeout
+                        running[receiver] = (name, regressor, process, deadline)
+
+                    nearest = min(deadline for *_, deadline in running.values())
+                    for receiver in wait_connections(list(running), max(nearest - time.monotonic(), 0)):
+                        name, regressor, process, _ = running.pop(receiver)
+                        try:
+                            outcome = receiver.recv()
+                        except EOFError:
+                            outcome = (name, regressor, None, "процесс обучения завершился аварийно", None)
+                        if outcome is None:
+                            # Процесс готов: таймаут отсчитывается от начала обучения
+                            running[receiver] = (name, regressor, process, time.monotonic() + timeout)
+                            continue
+                        receiver.close()
+                        process.join()
+                        yield outcome
+
+                    now = time.monotonic()
+                    for receiver, (name, regressor, process, deadline) in list(running.items()):
+                        if deadline <= now:
+                            del running[receiver]
+                            process.terminate()
+                            process.join()
+                            receiver.close()
+                            yield name, regressor, None, f"превышен лимит времени {timeout:g} c", None
+            finally:
+                for receiver, (_, _, process, _) in running.items():
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+
+    @staticmethod
+    def _build_preprocessor(
+        X: pd.DataFrame,
+        sparse_output: bool = False,
+        encoding: Optional[EncodingConfig] = None,
+        random_state: Optional[int] = None,
+    ) -> ColumnTransformer:
         categorical_features = X.select_dtypes(exclude="number").columns.tolist()
         numeric_features = X.select_dtypes(include="number").columns.tolist()
 
+        # Категории с большим числом значений кодируются отдельно, если задан способ кроме One-Hot
+        high_cardinality_features: list[str] = []
+        if encoding is not None and encoding.high_cardinality != "onehot":
+            high_cardinality_features = [
+                col for col in categorical_features if X[col].nunique() > encoding.threshold
+            ]
+            categorical_features = [
+                col for col in categorical_features if col not in high_cardinality_features
+            ]
+
         # Создаем трансформеры только для существующих типов данных
         transformers = []
         
@@ -82,23 +992,91 @@ class ModelTrainer:
                 (
                     "cat",
                     Pipeline(
-                        [("encoder", OneHotEncoder(handle_unknown="ignore", sparse_output=False))]
+                        [("encoder", OneHotEncoder(handle_unknown="ignore", sparse_output=sparse_output))]
                     ),
                     categorical_features,
                 )
             )
+
+        if high_cardinality_features:
+            transformers.append(
+                (
+                    "high_cardinality",
+                    high_cardinality_encoder(encoding, random_state),
+                    high_cardinality_features,
+                )
+            )
         
         if not transformers:
             raise ValueError("Нет признаков для обучения. Проверьте предобработку.")
 
-        preprocessor = ColumnTransformer(
+        return ColumnTransformer(
             transformers=transformers,
             remainder="drop",
+            # При разреженном One-Hot вывод остается CSR при любой плотности
+            sparse_threshold=1.0,
         )
 
-        # Проверяем размерность данных для выбора подходящих моделей
-        n_samples = len(X_train)
-        
+    @staticmethod
+    def _build_native_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
+        """
+        Предобработка для моделей с поддержкой категорий: числа без масштабирования
+        (пропуски остаются NaN), категории - порядковые коды. Редкие значения сверх
+        HIST_MAX_CATEGORIES объединяются, новые значения становятся пропусками.
+        """
+        categorical_features = X.select_dtypes(exclude="number").columns.tolist()
+        numeric_features = X.select_dtypes(include="number").columns.tolist()
+        transformers = []
+        if numeric_features:
+            transformers.append(("num", "passthrough", numeric_features))
+        if categorical_features:
+            transformers.append(
+                (
+                    "cat",
+                    OrdinalEncoder(
+                        handle_unknown="use_encoded_value",
+                        unknown_value=np.nan,
+                        max_categories=HIST_MAX_CATEGORIES,
+                    ),
+                    categorical_features,
+                )
+            )
+        if not transformers:
+            raise ValueError("Нет признаков для обучения. Проверьте предобработку.")
+        return ColumnTransformer(transformers=transformers, remainder="drop")
+
+    @staticmethod
+    def _prepare_features(
+        preprocessor: ColumnTransformer,
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame,
+        y_train: pd.Series,
+        y_test: pd.Series,
+    ) -> FeatureMatrices:
+        """Обучает предобработку на X_train и один раз преобразует обе выборки."""
+        # y_train нужен кодированию средним целевой переменной
+        start = time.perf_counter()
+        train_matrix = preprocessor.fit_transform(X_train, y_train)
+        fitted = time.perf_counter()
+        test_matrix = preprocessor.transform(X_test)
+        return FeatureMatrices(
+            preprocessor=preprocessor,
+            X_train=train_matrix,
+            X_test=test_matrix,
+            y_train=y_train,
+            y_test=y_test,
+            fit_transform_seconds=fitted - start,
+            transform_seconds=time.perf_counter() - fitted,
+        )
+
+    @staticmethod
+    def _build_models(
+        n_samples: int,
+        random_state: int,
+        rf_estimators: int,
+        boosting: str = "exact",
+        budgeted: bool = False,
+    ) -> dict[str, Any]:
         models: dict[str, Any] = {
             "random_forest": RandomForestRegressor(
                 n_estimators=rf_estimators, 
@@ -107,51 +1085,102 @@ class ModelTrainer:
                 min_samples_split=5,
                 n_jobs=-1
             ),
-            "gradient_boosting": GradientBoostingRegressor(
+        }
+
+        if boosting == "histogram" or (boosting == "auto" and n_samples >= HIST_BOOSTING_MIN_ROWS):
+            # Гистограммный бустинг многопоточен (OpenMP) и останавливается по валидационной выборке
+            models["hist_gradient_boosting"] = HistGradientBoostingRegressor(
+                learning_rate=0.1,
+                max_iter=500,
+                max_depth=None,
+                max_leaf_nodes=31,
+                early_stopping=True,
+                validation_fraction=0.1,
+                n_iter_no_change=10,
+                random_state=random_state
+            )
+        else:
+            models["gradient_boosting"] = GradientBoostingRegressor(
                 n_estimators=100,
                 learning_rate=0.1,
                 max_depth=5,
                 random_state=random_state
-            ),
+            )
+
+        models.update({
             "linear_regression": LinearRegression(),
             "ridge": Ridge(alpha=1.0, random_state=random_state),
             "lasso": Lasso(alpha=0.1, random_state=random_state, max_iter=2000),
             "elastic_net": ElasticNet(alpha=0.1, l1_ratio=0.5, random_state=random_state, max_iter=2000),
-        }
+        })
         
-        # SVM только для небольших датасетов (может быть медленным)
-        if n_samples < 5000:
+        # SVM только для небольших датасетов (может быть медленным); с бюджетом решает пробное обучение
+        if budgeted or n_samples < SVR_MAX_ROWS:
             models["svr"] = SVR(kernel='rbf', C=100, gamma='scale', epsilon=0.1)
+        return models
 
-        for name, regressor in models.items():
-            try:
-                pipeline = Pipeline(
-                    steps=[("preprocessor", preprocessor), ("model", regressor)]
-                )
-                pipeline.fit(X_train, y_train)
-                predictions = pipeline.predict(X_test)
-                
-                # Проверяем на некорректные предсказания (NaN, Inf)
-                if not np.isfinite(predictions).all():
-                    print(f"Предупреждение: Модель {name} выдала некорректные предсказания (NaN/Inf). Пропускаем.")
-                    continue
-                
-                # Проверяем на разумность метрик
-                metrics = self._evaluate(y_test, predictions)
-                
-                # Если метрики явно некорректные (очень большие числа или отрицательный R² близкий к -inf)
-                if abs(metrics['r2']) > 1e10 or metrics['rmse'] > 1e10:
-                    print(f"Предупреждение: Модель {name} выдала некорректные метрики. Пропускаем.")
-                    continue
-                
-                self.results[name] = ModelTrainingResult(
-                    model_name=name, pipeline=pipeline, metrics=metrics
-                )
-            except Exception as e:
-                print(f"Ошибка при обучении модели {name}: {e}")
-                continue
-                
-        return self.results
+    def _make_result(
+        self,
+        name: str,
+        regressor: Any,
+        predictions: Optional[np.ndarray],
+        error: Optional[str],
+        features: FeatureMatrices,
+    ) -> Optional[ModelTrainingResult]:
+        """Оценивает обученный регрессор; None (причина в self.skipped), если модель отбракована."""
+        if error is not None:
+            print(f"Ошибка при обучении модели {name}: {error}")
+            self.skipped[name] = error
+            return None
+        try:
+            # Проверяем на некорректные предсказания (NaN, Inf)
+            if not np.isfinite(predictions).all():
+                print(f"Предупреждение: Модель {name} выдала некорректные предсказания (NaN/Inf). Пропускаем.")
+                self.skipped[name] = "некорректные предсказания (NaN/Inf)"
+                return None
+            
+            # Проверяем на разумность метрик
+            metrics = self._evaluate(features.y_test, predictions)
+            
+            # Если метрики явно некорректные (очень большие числа или отрицательный R² близкий к -inf)
+            if abs(metrics['r2']) > 1e10 or metrics['rmse'] > 1e10:
+                print(f"Предупреждение: Модель {name} выдала некорректные метрики. Пропускаем.")
+                self.skipped[name] = "некорректные метрики"
+                return None
+            
+            # Pipeline собирается из уже обученных шагов и сохраняется как раньше
+            steps = [("preprocessor", features.preprocessor)]
+            if features.is_sparse and name not in SPARSE_INPUT_MODELS:
+                steps.append(("densify", FunctionTransformer(to_dense, accept_sparse=True)))
+            steps.append(("model", regressor))
+            pipeline = Pipeline(steps=steps)
+            return ModelTrainingResult(model_name=name, pipeline=pipeline, metrics=metrics)
+        except Exception as e:
+            print(f"Ошибка при обучении модели {name}: {e}")
+            self.skipped[name] = str(e)
+            return None
+
+    @staticmethod
+    def _profile(
+        result: ModelTrainingResult,
+        stats: FitStats,
+        features: FeatureMatrices,
+        inputs: tuple[Any, Any, Any],
+    ) -> ModelProfile:
+        """Стоимость модели по замерам обучения и ее собранному Pipeline."""
+        X_train, _, X_test = inputs
+        preprocessing_seconds = features.fit_transform_seconds + features.transform_seconds
+        if features.is_sparse and result.model_name not in SPARSE_INPUT_MODELS:
+            preprocessing_seconds += features.densify_seconds
+        n_test = max(X_test.shape[0], 1)
+        return ModelProfile(
+            preprocessing_seconds=preprocessing_seconds,
+            fit_seconds=stats.fit_seconds,
+            predict_ms_per_1k_rows=(features.transform_seconds + stats.predict_seconds) / n_test * 1e6,
+            peak_fit_memory_bytes=stats.peak_bytes,
+            serialized_bytes=serialized_size(result.pipeline),
+            n_features=X_train.shape[1],
+        )
 
     def predict(self, model_name: str, dataframe: pd.DataFrame) -> np.ndarray:
         if model_name not in self.results:
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .data_cache import read_frame, write_frame
+from .data_preprocessor import PreprocessingConfig, PreprocessingState
+
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class CachedPreprocessing:
+    """Результат предобработки: обученное состояние и очищенный кадр."""
+
+    state: PreprocessingState
+    frame: pd.DataFrame
+    nbytes: int = 0
+
+
+class PreprocessingCache:
+    """
+    Кэш результатов предобработки с адресацией по содержимому.
+
+    Ключ - хэш сырых данных (pd.util.hash_pandas_object, имена и типы
+    столбцов) вместе с полями PreprocessingConfig. Уровень в памяти - LRU,
+    ограниченный суммарным объемом кадров; необязательный уровень на диске
+    хранит кадры поколоночно (как DatasetCache) и также вытесняет самые
+    старые записи при превышении лимита.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 512 * 1024 ** 2,
+        directory: Optional[str | Path] = None,
+        max_disk_bytes: int = 2 * 1024 ** 3,
+    ) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = Path(directory) if directory is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[str, CachedPreprocessing] = OrderedDict()
+        self._memory_bytes = 0
+        # Хэш последнего сырого кадра: повторная предобработка того же объекта не хэширует заново
+        self._data_hash: Optional[tuple[weakref.ref, str]] = None
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, raw_df: pd.DataFrame, config: PreprocessingConfig) -> str:
+        """Ключ записи: хэш данных + параметры предобработки."""
+        config_json = json.dumps(asdict(config), sort_keys=True, default=str)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.data_hash(raw_df).encode("ascii"))
+        digest.update(config_json.encode("utf-8"))
+        return digest.hexdigest()
+
+    def data_hash(self, raw_df: pd.DataFrame) -> str:
+        """
+        Хэш содержимого кадра. Запоминается для последнего объекта, поэтому
+        кадр нельзя изменять на месте между вызовами (загрузчик создает новый).
+        """
+        if self._data_hash is not None:
+            ref, value = self._data_hash
+            if ref() is raw_df:
+                return value
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr([(str(c), str(t)) for c, t in raw_df.dtypes.items()]).encode("utf-8"))
+        row_hashes = pd.util.hash_pandas_object(raw_df, index=True)
+        digest.update(row_hashes.to_numpy().tobytes())
+        value = digest.hexdigest()
+        self._data_hash = (weakref.ref(raw_df), value)
+        return value
+
+    def get(self, key: str) -> Optional[CachedPreprocessing]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        entry = self._load_from_disk(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        state: PreprocessingState,
+        frame: pd.DataFrame,
+        copy: bool = False,
+    ) -> CachedPreprocessing:
+        """
+        Сохраняет результат предобработки. copy=True кладет в память копию
+        кадра (без copy-on-write вызывающий код может изменить его на месте);
+        размер проверяется до копирования, и кадр больше лимита памяти не
+        копируется, а только записывается на диск, если помещается туда.
+        """
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        fits_memory = nbytes <= self.max_memory_bytes
+        entry = CachedPreprocessing(
+            state=state,
+            frame=frame.copy() if copy and fits_memory else frame,
+            nbytes=nbytes,
+        )
+        self._remember(key, entry)
+        self._store_on_disk(key, entry)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._memory_bytes = 0
+        self._data_hash = None
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _remember(self, key: str, entry: CachedPreprocessing) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        if entry.nbytes > self.max_memory_bytes:
+            # Кадр больше всего лимита: держим его только на диске
+            return
+        self._entries[key] = entry
+        self._memory_bytes += entry.nbytes
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _store_on_disk(self, key: str, entry: CachedPreprocessing) -> None:
+        if self.directory is None or entry.nbytes > self.max_disk_bytes:
+            return
+        target = self.directory / key
+        tmp_target = target.with_name(key + ".tmp")
+        try:
+            shutil.rmtree(tmp_target, ignore_errors=True)
+            tmp_target.mkdir(parents=True)
+            meta = write_frame(tmp_target, entry.frame)
+            meta["cache_version"] = CACHE_FORMAT_VERSION
+            meta["nbytes"] = entry.nbytes
+            meta["state"] = asdict(entry.state)
+            with open(tmp_target / "meta.json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, default=_json_scalar)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp_target, target)
+        except (OSError, TypeError, ValueError):
+            # Кадры с нестандартным индексом или типами кэшируются только в памяти
+            shutil.rmtree(tmp_target, ignore_errors=True)
+            return
+        self._evict_disk()
+
+    def _load_from_disk(self, key: str) -> Optional[CachedPreprocessing]:
+        if self.directory is None:
+            return None
+        target = self.directory / key
+        meta_path = target / "meta.json"
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("cache_version") != CACHE_FORMAT_VERSION:
+                return None
+            frame = read_frame(target, meta)
+            state = PreprocessingState(**meta["state"])
+            # Время изменения служит меткой последнего использования для вытеснения
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return CachedPreprocessing(state=state, frame=frame, nbytes=int(meta.get("nbytes", 0)))
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total = 0
+        for target in self.directory.iterdir():
+            meta_path = target / "meta.json"
+            if not meta_path.exists():
+                continue
+            size = sum(path.stat().st_size for path in target.iterdir())
+            entries.append((meta_path.stat().st_mtime_ns, size, target))
+            total += size
+        for _, size, target in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            shutil.rmtree(target, ignore_errors=True)
+            total -= size
+
+
+def _json_scalar(value: Any) -> Any:
+    """Преобразует скаляры numpy в типы, понятные json."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
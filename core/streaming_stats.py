@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def mode_from_counts(counts: pd.Series) -> Any:
+    """Мода по таблице частот; при равенстве частот - наименьшее значение, как у Series.mode."""
+    counts = counts[counts > 0]
+    if counts.empty:
+        return None
+    top = counts.index[counts.to_numpy() == counts.max()]
+    try:
+        return min(top)
+    except TypeError:
+        return top[0]
+
+
+class QuantileSketch:
+    """
+    Сливаемый квантильный скетч в духе KLL.
+
+    Значения копятся в уровнях-буферах; переполненный уровень сортируется,
+    и каждое второе значение переходит на следующий уровень с удвоенным весом.
+    Пока данных не больше k, скетч хранит их целиком и отвечает точно.
+    """
+
+    def __init__(self, k: int = 2048, seed: int = 0) -> None:
+        self.k = k
+        self.count = 0
+        self.levels: list[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: Iterable[float] | np.ndarray) -> "QuantileSketch":
+        array = np.asarray(values, dtype=np.float64).ravel()
+        array = array[~np.isnan(array)]
+        if array.size:
+            self.count += int(array.size)
+            self.levels[0] = np.concatenate([self.levels[0], array])
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for height, buffer in enumerate(other.levels):
+            self.levels[height] = np.concatenate([self.levels[height], buffer])
+        self.count += other.count
+        self._compress()
+        return self
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def quantile(self, q: float | Iterable[float]) -> float | np.ndarray:
+        """Квантили с линейной интерполяцией (точно, пока скетч не сжимался)."""
+        scalar = np.ndim(q) == 0
+        qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.count == 0:
+            result = np.full(qs.shape, np.nan)
+        elif self.is_exact:
+            result = np.quantile(self.levels[0], qs)
+        else:
+            values = np.concatenate(self.levels)
+            weights = np.concatenate(
+                [np.full(buffer.size, 2.0 ** height) for height, buffer in enumerate(self.levels)]
+            )
+            order = np.argsort(values, kind="mergesort")
+            values = values[order]
+            # Средняя точка веса каждого элемента как его ранговая позиция
+            cumulative = np.cumsum(weights[order]) - weights[order] / 2
+            positions = qs * weights.sum()
+            result = np.interp(positions, cumulative, values)
+        return float(result[0]) if scalar else result
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.levels) - height - 1
+        return max(int(self.k * (2.0 / 3.0) ** depth), 2)
+
+    def _compress(self) -> None:
+        height = 0
+        while height < len(self.levels):
+            buffer = self.levels[height]
+            if buffer.size > self._capacity(height):
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                buffer = np.sort(buffer)
+                # Нечетный хвост остается на текущем уровне
+                keep = buffer[-1:] if buffer.size % 2 else buffer[:0]
+                paired = buffer[: buffer.size - keep.size]
+                promoted = paired[int(self._rng.integers(2))::2]
+                self.levels[height] = keep
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+            height += 1
+
+
+class FrequencySketch:
+    """
+    Сливаемая таблица частот значений.
+
+    При capacity=None хранит точные частоты; иначе работает как алгоритм
+    Misra-Gries (heavy hitters): оставляет не более capacity самых частых
+    значений, и значение с частотой выше total / capacity гарантированно в таблице.
+    """
+
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.total = 0
+
+    def update(self, values: pd.Series) -> "FrequencySketch":
+        return self.update_counts(values.value_counts(dropna=True, sort=False))
+
+    def update_counts(self, counts: pd.Series) -> "FrequencySketch":
+        counts = counts[counts > 0]
+        if counts.empty:
+            return self
+        if isinstance(counts.index, pd.CategoricalIndex):
+            counts.index = counts.index.astype(object)
+        self.total += int(counts.sum())
+        if self.counts.empty:
+            self.counts = counts.astype(np.int64)
+        else:
+            self.counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+        self._prune()
+        return self
+
+    def merge(self, other: "FrequencySketch") -> "FrequencySketch":
+        total = self.total + other.total
+        self.update_counts(other.counts)
+        self.total = total
+        return self
+
+    @property
+    def distinct_count(self) -> int:
+        """Число различных значений (точное только при capacity=None)."""
+        return int(len(self.counts))
+
+    def mode(self) -> Any:
+        return mode_from_counts(self.counts)
+
+    def _prune(self) -> None:
+        if self.capacity is None or len(self.counts) <= self.capacity:
+            return
+        threshold = np.sort(self.counts.to_numpy())[::-1][self.capacity]
+        kept = self.counts[self.counts > threshold] - threshold
+        self.counts = kept.astype(np.int64)
+
+
+# Меньшие кадры считаются последовательно: запуск потоков дороже самой работы
+PARALLEL_MIN_ROWS = 50_000
+
+
+class NumericAccumulator:
+    """
+    Сливаемый накопитель статистик числовых столбцов.
+
+    Количество, среднее и сумма квадратов отклонений объединяются по формулам
+    Уэлфорда/Чана, минимум и максимум - поэлементно. Квантили при
+    quantile_capacity=None считаются точно по сохраненным значениям (одна
+    сортировка на все столбцы), иначе - по QuantileSketch на каждый столбец,
+    который точен, пока в столбце не больше quantile_capacity значений.
+    """
+
+    def __init__(self, quantile_capacity: Optional[int] = None) -> None:
+        self.quantile_capacity = quantile_capacity
+        self.columns: Optional[list[Any]] = None
+        self.index = pd.Index([], dtype=object)
+        self.dtypes: list[Any] = []
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.minimum = np.zeros(0)
+        self.maximum = np.zeros(0)
+        self._blocks: list[np.ndarray] = []
+        self._sketches: list[QuantileSketch] = []
+
+    def update(self, dataframe: pd.DataFrame) -> "NumericAccumulator":
+        """Добавляет порцию строк (учитываются только числовые столбцы)."""
+        numeric_df = dataframe.select_dtypes(include="number")
+        self._check_columns(list(numeric_df.columns), list(numeric_df.dtypes))
+        if not len(self.index):
+            self.index = numeric_df.columns
+        block = numeric_block(numeric_df)
+
+        missing = np.isnan(block)
+        count = block.shape[1] - missing.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Те же формулы, что у DataFrame.mean/var: сумма без NaN, затем отклонения
+            mean = np.where(missing, 0.0, block).sum(axis=1) / count
+            squares = (mean[:, None] - block) ** 2
+        squares[missing] = 0.0
+        m2 = squares.sum(axis=1)
+        del squares
+
+        self._merge_moments(
+            count, mean, m2, np.fmin.reduce(block, axis=1, initial=np.nan),
+            np.fmax.reduce(block, axis=1, initial=np.nan),
+        )
+        if self.quantile_capacity is None:
+            self._blocks.append(block)
+        else:
+            for sketch, values in zip(self._sketches, block):
+                sketch.update(values)
+        return self
+
+    def merge(self, other: "NumericAccumulator") -> "NumericAccumulator":
+        """Объединяет статистики другого накопителя (например, другого потока)."""
+        if other.columns is None:
+            return self
+        if (self.quantile_capacity is None) != (other.quantile_capacity is None):
+            raise ValueError("Нельзя объединить точный накопитель квантилей со скетчем.")
+        self._check_columns(other.columns, other.dtypes)
+        if not len(self.index):
+            self.index = other.index
+        self._merge_moments(other.count, other.mean, other.m2, other.minimum, other.maximum)
+        self._blocks.extend(other._blocks)
+        for sketch, other_sketch in zip(self._sketches, other._sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    def statistics(self, quantiles: tuple[float, ...]) -> pd.DataFrame:
+        """Таблица min/max/mean/median/variance/std и q_* в формате numeric_statistics."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = self.m2 / (self.count - 1)
+        variance[self.count < 2] = np.nan
+        median, quantile_values = self._quantiles(quantiles)
+
+        extrema_dtype = _extrema_dtype(self.dtypes)
+        table = {
+            "min": self.minimum.astype(extrema_dtype),
+            "max": self.maximum.astype(extrema_dtype),
+            "mean": self.mean,
+            "median": median,
+            "variance": variance,
+            "std": np.sqrt(variance),
+        }
+        for position, q in enumerate(quantiles):
+            table[f"q_{q}"] = quantile_values[:, position]
+        return pd.DataFrame(table, index=self.index)
+
+    def _check_columns(self, columns: list[Any], dtypes: list[Any]) -> None:
+        if self.columns is None:
+            n_columns = len(columns)
+            self.columns = list(columns)
+            self.dtypes = list(dtypes)
+            self.count = np.zeros(n_columns, dtype=np.int64)
+            self.mean = np.full(n_columns, np.nan)
+            self.m2 = np.zeros(n_columns)
+            self.minimum = np.full(n_columns, np.nan)
+            self.maximum = np.full(n_columns, np.nan)
+            if self.quantile_capacity is not None:
+                self._sketches = [QuantileSketch(k=self.quantile_capacity) for _ in columns]
+            return
+        if list(columns) != self.columns:
+            raise ValueError(
+                f"Числовые столбцы порции {list(columns)} не совпадают с накопленными {self.columns}."
+            )
+        self.dtypes = [
+            np.result_type(old, new)
+            if isinstance(old, np.dtype) and isinstance(new, np.dtype)
+            else np.dtype(np.float64)
+            for old, new in zip(self.dtypes, dtypes)
+        ]
+
+    def _merge_moments(
+        self,
+        count: np.ndarray,
+        mean: np.ndarray,
+        m2: np.ndarray,
+        minimum: np.ndarray,
+        maximum: np.ndarray,
+    ) -> None:
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean - self.mean
+            merged_mean = self.mean + delta * (count / total)
+            merged_m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        # Пустая сторона не должна менять значения (и вносить ошибки округления)
+        self.mean = np.where(self.count == 0, mean, np.where(count == 0, self.mean, merged_mean))
+        self.m2 = np.where(self.count == 0, m2, np.where(count == 0, self.m2, merged_m2))
+        self.count = total
+        self.minimum = np.fmin(self.minimum, minimum)
+        self.maximum = np.fmax(self.maximum, maximum)
+
+    def _quantiles(self, quantiles: tuple[float, ...]) -> tuple[np.ndarray, np.ndarray]:
+        n_columns = len(self.columns or [])
+        if self.quantile_capacity is not None:
+            median = np.array([sketch.quantile(0.5) for sketch in self._sketches], dtype=np.float64)
+            values = np.array(
+                [sketch.quantile(list(quantiles)) for sketch in self._sketches], dtype=np.float64
+            ).reshape(n_columns, len(quantiles))
+            return median, values
+        if not self._blocks or sum(block.shape[1] for block in self._blocks) == 0:
+            return np.full(n_columns, np.nan), np.full((n_columns, len(quantiles)), np.nan)
+        block = self._blocks[0] if len(self._blocks) == 1 else np.concatenate(self._blocks, axis=1)
+        return sorted_quantiles(block, self.count, quantiles)
+
+
+class CategoricalAccumulator:
+    """
+    Сливаемые таблицы частот нечисловых столбцов.
+
+    По умолчанию частоты точные; при capacity каждая таблица работает как
+    FrequencySketch (Misra-Gries), и число уникальных значений и частота
+    моды становятся оценками снизу.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, max_workers: Optional[int] = None) -> None:
+        self.capacity = capacity
+        self.max_workers = max_workers
+        self.columns: list[Any] = []
+        self.frequencies: dict[Any, FrequencySketch] = {}
+        # Порядок категорий для столбцов category: при равенстве частот мода - первая категория
+        self.category_order: dict[Any, dict[Any, int]] = {}
+
+    def update(self, dataframe: pd.DataFrame) -> "CategoricalAccumulator":
+        """Добавляет порцию строк (учитываются только нечисловые столбцы)."""
+        items = list(dataframe.select_dtypes(exclude="number").items())
+        if self.max_workers != 1 and len(items) > 1 and len(dataframe) >= PARALLEL_MIN_ROWS:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                tables = list(executor.map(lambda item: _frequency_table(item[1]), items))
+        else:
+            tables = [_frequency_table(series) for _, series in items]
+
+        for (column, series), counts in zip(items, tables):
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                order = self.category_order.setdefault(column, {})
+                for category in series.cat.categories:
+                    order.setdefault(category, len(order))
+            self._sketch(column).update_counts(counts)
+        return self
+
+    def merge(self, other: "CategoricalAccumulator") -> "CategoricalAccumulator":
+        for column in other.columns:
+            if column in other.category_order:
+                order = self.category_order.setdefault(column, {})
+                for category in other.category_order[column]:
+                    order.setdefault(category, len(order))
+            self._sketch(column).merge(other.frequencies[column])
+        return self
+
+    def statistics(self) -> pd.DataFrame:
+        """Таблица unique_count/mode/mode_frequency/mode_percentage по столбцам."""
+        rows = []
+        for column in self.columns:
+            sketch = self.frequencies[column]
+            counts = sketch.counts[sketch.counts > 0]
+            if counts.empty:
+                mode, mode_freq = "", 0
+            elif column in self.category_order:
+                order = self.category_order[column]
+                top = counts.index[counts.to_numpy() == counts.max()]
+                mode = min(top, key=lambda value: order.get(value, len(order)))
+                mode_freq = int(counts.max())
+            else:
+                mode = mode_from_counts(counts)
+                mode_freq = int(counts.max())
+            rows.append(
+                {
+                    "column": column,
+                    "unique_count": int(len(counts)),
+                    "mode": mode,
+                    "mode_frequency": mode_freq,
+                    "mode_percentage": mode_freq / max(sketch.total, 1),
+                }
+            )
+        stats = pd.DataFrame(rows)
+        if len(stats) > 0:
+            stats = stats.set_index("column")
+        return stats
+
+    def _sketch(self, column: Any) -> FrequencySketch:
+        sketch = self.frequencies.get(column)
+        if sketch is None:
+            sketch = self.frequencies[column] = FrequencySketch(capacity=self.capacity)
+            self.columns.append(column)
+        return sketch
+
+
+def numeric_block(numeric_df: pd.DataFrame) -> np.ndarray:
+    """Числовые столбцы как массив (столбцы x строки) float64 с NaN вместо пропусков."""
+    block = np.empty((numeric_df.shape[1], numeric_df.shape[0]), dtype=np.float64)
+    for position in range(numeric_df.shape[1]):
+        block[position] = numeric_df.iloc[:, position].to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+    return block
+
+
+def sorted_quantiles(
+    block: np.ndarray, count: np.ndarray, quantiles: tuple[float, ...]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Медиана и квантили каждой строки блока за одну сортировку.
+
+    Формулы повторяют np.median и np.percentile (линейная интерполяция),
+    поэтому результат совпадает с DataFrame.median/quantile.
+    """
+    # NaN после сортировки уходят в конец каждой строки
+    ordered = np.sort(block, axis=1)
+    last = np.maximum(count - 1, 0)[:, None]
+
+    middle_low = np.take_along_axis(ordered, last // 2, axis=1)[:, 0]
+    middle_high = np.take_along_axis(ordered, np.minimum(count[:, None] // 2, last), axis=1)[:, 0]
+    median = np.where(count % 2 == 1, middle_low, (middle_low + middle_high) / 2.0)
+
+    # Как np.percentile: q делится на 100 после умножения, индекс (n - 1) * q
+    q = np.asarray(quantiles, dtype=np.float64) * 100.0 / 100.0
+    virtual = last * q[None, :]
+    previous = np.floor(virtual).astype(np.intp)
+    gamma = virtual - previous
+    low = np.take_along_axis(ordered, previous, axis=1)
+    high = np.take_along_axis(ordered, np.minimum(previous + 1, last), axis=1)
+    diff = high - low
+    values = np.where(gamma >= 0.5, high - diff * (1 - gamma), low + diff * gamma)
+
+    # Столбцы целиком из пропусков
+    median[count == 0] = np.nan
+    values[count == 0] = np.nan
+    return median, values
+
+
+def _frequency_table(series: pd.Series) -> pd.Series:
+    """Частоты непустых значений: bincount кодов для category, иначе value_counts."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+        return pd.Series(counts, index=series.cat.categories.astype(object))
+    return series.value_counts(dropna=True, sort=False)
+
+
+def _extrema_dtype(dtypes: list[Any]) -> np.dtype:
+    """Минимум и максимум целочисленных столбцов остаются целыми, как у DataFrame.min."""
+    if dtypes and all(isinstance(d, np.dtype) and d.kind in "iu" for d in dtypes):
+        return np.result_type(*dtypes)
+    return np.dtype(np.float64)
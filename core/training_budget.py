@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import math
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+from sklearn.base import clone
+
+# Показатель роста времени обучения с числом строк: t ~ n ** exponent
+COST_EXPONENTS = {
+    "random_forest": 1.1,
+    "gradient_boosting": 1.1,
+    "svr": 2.0,
+}
+DEFAULT_COST_EXPONENT = 1.0
+
+
+@dataclass
+class TrainingBudget:
+    """
+    Ограничения на обучение одной модели.
+
+    Стоимость модели оценивается пробным обучением на probe_rows строках и
+    пересчитывается на полную выборку. Если прогноз времени (max_fit_seconds)
+    или памяти (max_memory_bytes) превышает лимит, модель обучается на
+    подвыборке, укладывающейся в лимит (не меньше min_subsample_rows строк),
+    или пропускается. timeout_seconds - жесткий предел: модель обучается в
+    отдельном процессе, который завершается по его истечении.
+    """
+
+    max_fit_seconds: Optional[float] = None
+    max_memory_bytes: Optional[int] = None
+    timeout_seconds: Optional[float] = None
+    probe_rows: int = 1000
+    min_subsample_rows: int = 200
+    allow_subsample: bool = True
+
+    @property
+    def has_limits(self) -> bool:
+        return self.max_fit_seconds is not None or self.max_memory_bytes is not None
+
+
+@dataclass
+class CostEstimate:
+    """Результат пробного обучения и его пересчет на другое число строк."""
+
+    probe_rows: int
+    seconds: float
+    peak_bytes: int
+    exponent: float = DEFAULT_COST_EXPONENT
+
+    def project(self, n_rows: int) -> tuple[float, float]:
+        """Прогноз времени (c) и пиковой памяти (байт) обучения на n_rows строках."""
+        scale = n_rows / self.probe_rows
+        return self.seconds * scale ** self.exponent, self.peak_bytes * scale
+
+    def affordable_rows(self, budget: TrainingBudget) -> int:
+        """Наибольшее число строк, обучение на котором укладывается в лимиты."""
+        limits = [math.inf]
+        if budget.max_fit_seconds is not None and self.seconds > 0:
+            limits.append(
+                self.probe_rows * (budget.max_fit_seconds / self.seconds) ** (1 / self.exponent)
+            )
+        if budget.max_memory_bytes is not None and self.peak_bytes > 0:
+            limits.append(self.probe_rows * budget.max_memory_bytes / self.peak_bytes)
+        affordable = min(limits)
+        return int(affordable) if math.isfinite(affordable) else np.iinfo(np.int64).max
+
+
+def measure_fit(regressor: Any, X: Any, y: Any, trace_memory: bool = True) -> tuple[float, int]:
+    """
+    Обучает регрессор и возвращает время (c) и пик памяти, выделенной через
+    Python и NumPy (tracemalloc), в байтах. Память нативного кода не учитывается.
+    Отслеживание памяти замедляет обучение, поэтому его можно отключить (пик 0).
+    """
+    if not trace_memory:
+        start = time.perf_counter()
+        regressor.fit(X, y)
+        return time.perf_counter() - start, 0
+    already_tracing = tracemalloc.is_tracing()
+    if already_tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    try:
+        regressor.fit(X, y)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return elapsed, max(peak - baseline, 0)
+
+
+def estimate_cost(
+    name: str,
+    regressor: Any,
+    X: Any,
+    y: np.ndarray,
+    budget: TrainingBudget,
+    random_state: Optional[int] = None,
+) -> CostEstimate:
+    """Пробное обучение копии регрессора на budget.probe_rows случайных строках."""
+    rng = np.random.default_rng(random_state)
+    sample = np.sort(rng.choice(X.shape[0], size=min(budget.probe_rows, X.shape[0]), replace=False))
+    seconds, peak_bytes = measure_fit(
+        clone(regressor), X[sample], y[sample], trace_memory=budget.max_memory_bytes is not None
+    )
+    return CostEstimate(
+        probe_rows=len(sample),
+        seconds=seconds,
+        peak_bytes=peak_bytes,
+        exponent=COST_EXPONENTS.get(name, DEFAULT_COST_EXPONENT),
+    )
@@ -61,8 +61,10 @@ class AnalysisTab(QWidget):
         stats_layout.setSpacing(8)
         self.numeric_label = QLabel("Числовые признаки: —")
         self.categorical_label = QLabel("Категориальные признаки: —")
+        self.correlation_label = QLabel("Матрица корреляций: —")
         stats_layout.addWidget(self.numeric_label)
         stats_layout.addWidget(self.categorical_label)
+        stats_layout.addWidget(self.correlation_label)
         stats_box.setLayout(stats_layout)
 
         # Секция визуализаций с прокруткой
@@ -184,8 +186,12 @@ class AnalysisTab(QWidget):
                 self.categorical_label.setText(
                     f"Категориальные признаки: {artifacts.categorical_stats_path.name}"
                 )
+            if artifacts.correlation_path:
+                self.correlation_label.setText(
+                    f"Матрица корреляций: {artifacts.correlation_path.name}"
+                )
 
-            # Отображаем графики с правильным масштабированием
+            # Графики уже отрендерены в PNG рабочим потоком - здесь только декодирование
             viz = artifacts.visualizations
             if viz:
                 # Максимальный размер для графиков
@@ -193,7 +199,7 @@ class AnalysisTab(QWidget):
                 max_height = 400
                 
                 if viz.price_hist:
-                    pixmap = FigureConverter.to_pixmap(viz.price_hist)
+                    pixmap = FigureConverter.from_png(viz.price_hist)
                     # Масштабируем сохраняя пропорции
                     scaled_pixmap = pixmap.scaled(
                         max_width, max_height, 
@@ -204,7 +210,7 @@ class AnalysisTab(QWidget):
                     self.hist_label.setText("")
                 
                 if viz.price_box:
-                    pixmap = FigureConverter.to_pixmap(viz.price_box)
+                    pixmap = FigureConverter.from_png(viz.price_box)
                     scaled_pixmap = pixmap.scaled(
                         max_width, max_height,
                         Qt.KeepAspectRatio,
@@ -214,7 +220,7 @@ class AnalysisTab(QWidget):
                     self.box_label.setText("")
                 
                 if viz.correlation_heatmap:
-                    pixmap = FigureConverter.to_pixmap(viz.correlation_heatmap)
+                    pixmap = FigureConverter.from_png(viz.correlation_heatmap)
                     scaled_pixmap = pixmap.scaled(
                         max_width, max_height,
                         Qt.KeepAspectRatio,
@@ -27,6 +27,19 @@ from core import CarPricePredictor
 class ConclusionsTab(QWidget):
     """Вкладка с выводами и рекомендациями по результатам анализа."""
 
+    TABLE_COLUMNS = [
+        "Модель", "MAE", "RMSE", "R²", "Обучение, c", "Предсказание, мс/1000 строк",
+        "Память обучения, MB", "Размер, MB", "Признаков", "Рейтинг",
+    ]
+    # Столбцы стоимости: ключ ModelProfile в JSON, множитель и формат
+    PROFILE_COLUMNS = [
+        ("fit_seconds", 1.0, "{:.2f}"),
+        ("predict_ms_per_1k_rows", 1.0, "{:.1f}"),
+        ("peak_fit_memory_bytes", 1 / 1024 ** 2, "{:.1f}"),
+        ("serialized_bytes", 1 / 1024 ** 2, "{:.2f}"),
+        ("n_features", 1, "{:d}"),
+    ]
+
     def __init__(self, predictor: CarPricePredictor, parent: Optional[QWidget] = None):
         super().__init__(parent)
         self.predictor = predictor
@@ -54,10 +67,8 @@ class ConclusionsTab(QWidget):
         
         # Таблица сравнения
         self.models_table = QTableWidget()
-        self.models_table.setColumnCount(5)
-        self.models_table.setHorizontalHeaderLabels([
-            "Модель", "MAE", "RMSE", "R²", "Рейтинг"
-        ])
+        self.models_table.setColumnCount(len(self.TABLE_COLUMNS))
+        self.models_table.setHorizontalHeaderLabels(self.TABLE_COLUMNS)
         self.models_table.setAlternatingRowColors(True)
         self.models_table.setSelectionBehavior(QTableWidget.SelectRows)
         models_layout.addWidget(self.models_table)
@@ -183,11 +194,18 @@ class ConclusionsTab(QWidget):
                 r2_item.setBackground(QColor(240, 240, 240))  # Светло-серый
             self.models_table.setItem(row_idx, 3, r2_item)
             
+            # Стоимость обучения и предсказания (нет в метриках старых версий)
+            profile = model_data.get('profile') or {}
+            for offset, (key, scale, template) in enumerate(self.PROFILE_COLUMNS):
+                value = profile.get(key)
+                text = template.format(value * scale) if value is not None else "—"
+                self.models_table.setItem(row_idx, 4 + offset, QTableWidgetItem(text))
+            
             # Рейтинг
             rating = f"#{row_idx + 1}"
             rating_item = QTableWidgetItem(rating)
             rating_item.setTextAlignment(Qt.AlignCenter)
-            self.models_table.setItem(row_idx, 4, rating_item)
+            self.models_table.setItem(row_idx, len(self.TABLE_COLUMNS) - 1, rating_item)
 
         # Автоматическая подгонка ширины столбцов
         self.models_table.resizeColumnsToContents()
@@ -216,6 +234,12 @@ class ConclusionsTab(QWidget):
         conclusions.append(f"  R² (коэффициент детерминации): {best_metrics.get('r2', 0):.4f}")
         conclusions.append(f"  MAE (средняя абсолютная ошибка): {best_metrics.get('mae', 0):.2f}")
         conclusions.append(f"  RMSE (корень из средней квадратичной ошибки): {best_metrics.get('rmse', 0):.2f}")
+        cross_validation = best_data.get('cross_validation')
+        if cross_validation:
+            conclusions.append(
+                f"  R² кросс-валидации ({cross_validation['n_splits']} фолдов): "
+                f"{cross_validation['mean']['r2']:.4f} ± {cross_validation['std']['r2']:.4f}"
+            )
         conclusions.append("")
 
         # Анализ качества моделей
@@ -270,6 +294,28 @@ class ConclusionsTab(QWidget):
         
         conclusions.append("")
 
+        # Стоимость обслуживания: задержка предсказания и размер модели
+        profiles = {name: data['profile'] for name, data in metrics_data.items() if data.get('profile')}
+        if profiles:
+            conclusions.append("СТОИМОСТЬ ОБСЛУЖИВАНИЯ:")
+            fastest = min(profiles, key=lambda name: profiles[name]['predict_ms_per_1k_rows'])
+            smallest = min(profiles, key=lambda name: profiles[name]['serialized_bytes'])
+            conclusions.append(
+                f"  Быстрее всего предсказывает: {fastest} "
+                f"({profiles[fastest]['predict_ms_per_1k_rows']:.1f} мс на 1000 строк)"
+            )
+            conclusions.append(
+                f"  Меньше всего места занимает: {smallest} "
+                f"({profiles[smallest]['serialized_bytes'] / 1024 ** 2:.2f} MB)"
+            )
+            if best_name in profiles:
+                best_profile = profiles[best_name]
+                conclusions.append(
+                    f"  Лучшая модель ({best_name}): {best_profile['predict_ms_per_1k_rows']:.1f} мс на 1000 строк, "
+                    f"{best_profile['serialized_bytes'] / 1024 ** 2:.2f} MB"
+                )
+            conclusions.append("")
+
         # Общие выводы
         conclusions.append("ОБЩИЕ ВЫВОДЫ:")
         avg_r2 = sum(r2_scores.values()) / len(r2_scores) if r2_scores else 0
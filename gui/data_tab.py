@@ -6,7 +6,7 @@ from typing import Optional
 import pandas as pd
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtWidgets import (
-    QFileDialog, QFormLayout, QGridLayout, QGroupBox, QHBoxLayout, QLabel,
+    QCheckBox, QFileDialog, QFormLayout, QGridLayout, QGroupBox, QHBoxLayout, QLabel,
     QLineEdit, QPushButton, QProgressBar, QSizePolicy, QSpinBox, QTableWidget,
     QTableWidgetItem, QTextEdit, QVBoxLayout, QWidget, QMessageBox
 )
@@ -42,8 +42,13 @@ class DataTab(QWidget):
         self.path_display.setPlaceholderText("Выберите CSV файл для загрузки...")
         load_button = QPushButton("Выбрать CSV")
         load_button.clicked.connect(self._select_file)
+        self.optimize_memory_checkbox = QCheckBox("Экономия памяти")
+        self.optimize_memory_checkbox.setToolTip(
+            "Повторяющиеся строки загружаются как category, числа - в минимальной разрядности"
+        )
         load_layout.addWidget(QLabel("Файл:"))
         load_layout.addWidget(self.path_display, 1)
+        load_layout.addWidget(self.optimize_memory_checkbox)
         load_layout.addWidget(load_button)
         load_box.setLayout(load_layout)
 
@@ -82,12 +87,17 @@ class DataTab(QWidget):
         self.missing_spin.setRange(0, 100)
         self.missing_spin.setValue(30)
         self.missing_spin.setSuffix("%")
+        self.brand_checkbox = QCheckBox("Заменить CarName маркой автомобиля")
+        self.brand_checkbox.setToolTip(
+            "Из «марка модель» остается только марка: меньше категорий и столбцов One-Hot"
+        )
         self.preprocess_button = QPushButton("Запустить предобработку")
         self.preprocess_button.clicked.connect(self._run_preprocessing)
         self.preprocess_button.setEnabled(False)
         form.addRow("Целевая колонка:", self.target_input)
         form.addRow("Удалить столбцы:", self.drop_columns_input)
         form.addRow("Порог пропусков:", self.missing_spin)
+        form.addRow("", self.brand_checkbox)
         form.addRow("", self.preprocess_button)
         preprocess_box.setLayout(form)
 
@@ -150,7 +160,11 @@ class DataTab(QWidget):
             if path.stat().st_size == 0:
                 raise ValueError("Файл пуст")
             
-            self.current_worker = WorkerThread(self.predictor.load_data, file_path)
+            self.current_worker = WorkerThread(
+                self.predictor.load_data,
+                file_path,
+                optimize_memory=self.optimize_memory_checkbox.isChecked(),
+            )
             self.current_worker.signals.progress.connect(self.progress.setValue)
             self.current_worker.signals.finished.connect(self._on_data_loaded)
             self.current_worker.signals.error.connect(self._on_error)
@@ -168,7 +182,14 @@ class DataTab(QWidget):
             
             # Форматируем информацию о данных
             info_text = f"Размер данных: {humanize_shape(summary.shape)}\n"
-            info_text += f"Строк: {summary.shape[0]}, Столбцов: {summary.shape[1]}\n\n"
+            info_text += f"Строк: {summary.shape[0]}, Столбцов: {summary.shape[1]}\n"
+            if summary.cache_hit:
+                info_text += "Источник: бинарный кэш (CSV не разбирался)\n"
+            info_text += f"Память: {summary.memory_bytes / 1024 ** 2:.2f} MB"
+            if summary.memory_saved_bytes > 0:
+                info_text += f" (сэкономлено {summary.memory_saved_bytes / 1024 ** 2:.2f} MB)"
+            info_text += "\n"
+            info_text += "\n"
             info_text += "Информация о данных:\n"
             info_text += summary.info
             info_text += "\n\nПропущенные значения:\n"
@@ -292,6 +313,7 @@ class DataTab(QWidget):
                     if col.strip()
                 ],
                 high_missing_threshold=self.missing_spin.value() / 100,
+                brand_column="CarName" if self.brand_checkbox.isChecked() else None,
             )
 
             self.current_worker = WorkerThread(self.predictor.preprocess_data, config)
@@ -312,6 +334,8 @@ class DataTab(QWidget):
             preprocess_info = f"\n\n{'='*50}\n"
             preprocess_info += f"Предобработанные данные: {humanize_shape(dataframe.shape)}\n"
             preprocess_info += f"Строк: {dataframe.shape[0]}, Столбцов: {dataframe.shape[1]}\n"
+            if self.predictor.preprocessing_cache_hit:
+                preprocess_info += "Результат взят из кэша предобработки\n"
             preprocess_info += f"{'='*50}\n"
             
             self.summary_text.append(preprocess_info)
@@ -189,4 +189,5 @@ class MainWindow(QMainWindow):
             self.analysis_tab._cleanup_worker()
         if hasattr(self, 'model_tab'):
             self.model_tab._cleanup_worker()
+        self.predictor.shutdown()
         event.accept()
\ No newline at end of file
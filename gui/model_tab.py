@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import json
+import os
+from dataclasses import asdict
 from pathlib import Path
 from typing import Optional
 
 import pandas as pd
 from PySide6.QtCore import Signal
 from PySide6.QtWidgets import (
+    QCheckBox,
     QFileDialog,
     QFormLayout,
     QGroupBox,
@@ -22,7 +25,13 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from core import CarPricePredictor
+from core import (
+    CarPricePredictor,
+    EncodingConfig,
+    RegularizationPathConfig,
+    SearchConfig,
+    TrainingBudget,
+)
 from utils import WorkerThread
 
 
@@ -56,10 +65,65 @@ class ModelTab(QWidget):
         self.estimators_input.setRange(100, 1000)
         self.estimators_input.setValue(300)
         self.estimators_input.setSingleStep(50)
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, os.cpu_count() or 1)
+        self.workers_input.setValue(min(os.cpu_count() or 1, 4))
+        self.encoding_selector = QComboBox()
+        self.encoding_selector.addItems(["onehot", "hashing", "frequency", "target"])
+        self.encoding_selector.setToolTip(
+            "Кодирование категорий, у которых больше 50 значений (например, CarName)"
+        )
+        self.boosting_selector = QComboBox()
+        self.boosting_selector.addItems(["exact", "auto", "histogram"])
+        self.boosting_selector.setToolTip(
+            "exact - GradientBoosting, histogram - HistGradientBoosting "
+            "(многопоточный, с ранней остановкой), auto - histogram от 100 000 строк"
+        )
+        self.budget_input = QSpinBox()
+        self.budget_input.setRange(0, 3600)
+        self.budget_input.setValue(0)
+        self.budget_input.setSingleStep(30)
+        self.budget_input.setSpecialValueText("без лимита")
+        self.budget_input.setToolTip(
+            "Прогноз времени обучения одной модели по пробному обучению. Дорогие "
+            "модели обучаются на подвыборке или пропускаются"
+        )
+        self.timeout_input = QSpinBox()
+        self.timeout_input.setRange(0, 7200)
+        self.timeout_input.setValue(0)
+        self.timeout_input.setSingleStep(60)
+        self.timeout_input.setSpecialValueText("выкл")
+        self.timeout_input.setToolTip(
+            "Жесткий предел: каждая модель обучается в отдельном процессе, который "
+            "завершается по истечении времени. Запуск процессов замедляет обучение"
+        )
+        self.cv_folds_input = QSpinBox()
+        self.cv_folds_input.setRange(1, 10)
+        self.cv_folds_input.setValue(1)
+        self.cv_folds_input.setSpecialValueText("выкл")
+        self.cv_folds_input.setToolTip(
+            "k-fold кросс-валидация: среднее и разброс метрик по фолдам вдобавок к тестовой выборке"
+        )
+        self.search_checkbox = QCheckBox("Подбор гиперпараметров")
+        self.search_checkbox.setToolTip(
+            "Successive halving: 16 конфигураций на модель, лучшая треть переходит "
+            "в следующий раунд с втрое большим числом деревьев или строк"
+        )
+        self.paths_checkbox = QCheckBox("Пути регуляризации (Ridge, Lasso, ElasticNet)")
+        self.paths_checkbox.setToolTip(
+            "alpha линейных моделей выбирается из 50 значений по отложенной части "
+            "обучающей выборки вместо фиксированных"
+        )
+        self.memory_checkbox = QCheckBox("Замерять пик памяти обучения")
+        self.memory_checkbox.setToolTip(
+            "Пик памяти в профиле стоимости моделей (tracemalloc); обучение "
+            "деревьев медленнее примерно на 15 %"
+        )
         self.model_selector = QComboBox()
         self.model_selector.addItems([
             "random_forest",
             "gradient_boosting", 
+            "hist_gradient_boosting",
             "linear_regression",
             "ridge",
             "lasso",
@@ -72,6 +136,15 @@ class ModelTab(QWidget):
         form.addRow("Test size (0-1):", self.test_size_input)
         form.addRow("Random state:", self.random_state_input)
         form.addRow("Trees (RF):", self.estimators_input)
+        form.addRow("Процессы обучения:", self.workers_input)
+        form.addRow("Кодирование категорий:", self.encoding_selector)
+        form.addRow("Градиентный бустинг:", self.boosting_selector)
+        form.addRow("Лимит на модель, c:", self.budget_input)
+        form.addRow("Прерывать обучение через, c:", self.timeout_input)
+        form.addRow("Фолды кросс-валидации:", self.cv_folds_input)
+        form.addRow("", self.search_checkbox)
+        form.addRow("", self.paths_checkbox)
+        form.addRow("", self.memory_checkbox)
         form.addRow("Текущая модель:", self.model_selector)
         form.addRow("", train_button)
         config_box.setLayout(form)
@@ -134,11 +207,23 @@ class ModelTab(QWidget):
 
         self._cleanup_worker()
 
+        budget = TrainingBudget(
+            max_fit_seconds=self.budget_input.value() or None,
+            timeout_seconds=self.timeout_input.value() or None,
+        )
         self.current_worker = WorkerThread(
             self.predictor.train_models,
             test_size=test_size,
             random_state=random_state,
             rf_estimators=self.estimators_input.value(),
+            n_jobs=self.workers_input.value(),
+            encoding=EncodingConfig(high_cardinality=self.encoding_selector.currentText()),
+            boosting=self.boosting_selector.currentText(),
+            budget=budget,
+            cv_folds=self.cv_folds_input.value() if self.cv_folds_input.value() > 1 else None,
+            search=SearchConfig() if self.search_checkbox.isChecked() else None,
+            paths=RegularizationPathConfig() if self.paths_checkbox.isChecked() else None,
+            profile_memory=self.memory_checkbox.isChecked(),
         )
         self.current_worker.signals.progress.connect(self.progress.setValue)
         self.current_worker.signals.finished.connect(self._on_trained)
@@ -153,6 +238,31 @@ class ModelTab(QWidget):
         for name, result in results.items():
             metrics = ", ".join(f"{k.upper()}: {v:.4f}" for k, v in result.metrics.items())
             message_lines.append(f"{name}: {metrics}")
+            if result.cross_validation is not None:
+                mean, std = result.cross_validation.mean, result.cross_validation.std
+                message_lines.append(
+                    f"  CV ({result.cross_validation.n_splits} фолдов): "
+                    + ", ".join(f"{k.upper()}: {mean[k]:.4f} ± {std[k]:.4f}" for k in mean)
+                )
+            if result.profile is not None:
+                profile = result.profile
+                memory = (
+                    f", память {profile.peak_fit_memory_bytes / 1024 ** 2:.1f} MB"
+                    if profile.peak_fit_memory_bytes is not None
+                    else ""
+                )
+                message_lines.append(
+                    f"  Обучение {profile.fit_seconds:.2f} c, предсказание "
+                    f"{profile.predict_ms_per_1k_rows:.1f} мс/1000 строк{memory}, "
+                    f"размер {profile.serialized_bytes / 1024 ** 2:.2f} MB, признаков {profile.n_features}"
+                )
+            if result.best_params:
+                params = ", ".join(f"{k}={v}" for k, v in result.best_params.items())
+                message_lines.append(f"  Подобрано (R² при подборе {result.search_score:.4f}): {params}")
+            if result.budget_note:
+                message_lines.append(f"  {result.budget_note}")
+        for name, reason in self.predictor.trainer.skipped.items():
+            message_lines.append(f"{name}: не обучена ({reason})")
         self.metrics_text.setPlainText("\n".join(message_lines))
         # Сохраняем метрики в JSON для Telegram бота
         self._save_metrics_to_json(results)
@@ -171,8 +281,24 @@ class ModelTab(QWidget):
             for name, result in results.items():
                 metrics_data[name] = {
                     "model_name": result.model_name,
-                    "metrics": {k: float(v) for k, v in result.metrics.items()}
+                    "metrics": {k: float(v) for k, v in result.metrics.items()},
+                    "training_rows": result.training_rows,
+                    "budget_note": result.budget_note,
+                    "best_params": result.best_params,
+                    "search_score": result.search_score,
+                    "profile": asdict(result.profile) if result.profile is not None else None,
                 }
+                cross_validation = result.cross_validation
+                if cross_validation is not None:
+                    metrics_data[name]["cross_validation"] = {
+                        "n_splits": cross_validation.n_splits,
+                        "mean": cross_validation.mean,
+                        "std": cross_validation.std,
+                        "folds": [
+                            {k: float(v) for k, v in fold.items()}
+                            for fold in cross_validation.fold_metrics
+                        ],
+                    }
             
             with open(metrics_file, 'w', encoding='utf-8') as f:
                 json.dump(metrics_data, f, indent=2, ensure_ascii=False)
@@ -3,12 +3,16 @@ from __future__ import annotations
 import sys
 import warnings
 import traceback
+from pathlib import Path
 
 from PySide6.QtWidgets import QApplication, QMessageBox
 
-from core import CarPricePredictor
+from core import CarPricePredictor, PreprocessingCache
 from gui.main_window import MainWindow  # Измените импорт
 
+# Кэш предобработки лежит в каталоге проекта, а не в текущем рабочем каталоге
+PREPROCESSING_CACHE_DIR = Path(__file__).resolve().parent / ".carml_preprocessing_cache"
+
 
 def excepthook(exc_type, exc_value, exc_tb):
     """Глобальный обработчик исключений для Qt"""
@@ -33,7 +37,9 @@ def main() -> int:
     app = QApplication(sys.argv)
     
     try:
-        predictor = CarPricePredictor()
+        predictor = CarPricePredictor(
+            preprocessing_cache=PreprocessingCache(directory=PREPROCESSING_CACHE_DIR)
+        )
         window = MainWindow(predictor)
         window.show()
         return app.exec()
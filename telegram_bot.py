@@ -41,6 +41,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         "/start - показать это сообщение\n"
         "/models - показать список доступных моделей\n"
         "/metrics <имя_модели> - показать метрики выбранной модели в формате JSON\n"
+        "/costs - сравнить модели по времени, памяти и размеру\n"
         "/help - показать справку\n\n"
         "Пример: /metrics random_forest"
     )
@@ -52,7 +53,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     help_text = (
         "Справка по использованию бота:\n\n"
         "/models - получить список всех доступных моделей\n"
-        "/metrics <имя_модели> - получить метрики модели в формате JSON\n\n"
+        "/metrics <имя_модели> - получить метрики модели в формате JSON\n"
+        "/costs - стоимость моделей: обучение, предсказание, память, размер\n\n"
         "Примеры:\n"
         "/metrics random_forest\n"
         "/metrics linear_regression\n\n"
@@ -60,7 +62,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "- MAE (Mean Absolute Error)\n"
         "- MSE (Mean Squared Error)\n"
         "- RMSE (Root Mean Squared Error)\n"
-        "- R² (Coefficient of Determination)"
+        "- R² (Coefficient of Determination)\n"
+        "- стоимость: время обучения, мс на 1000 предсказаний, пик памяти, размер модели"
     )
     await update.message.reply_text(help_text)
 
@@ -152,6 +155,8 @@ async def get_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         summary_text = f"Метрики модели: {model_name}\n\n"
         for key, value in metrics_summary.items():
             summary_text += f"{key.upper()}: {value:.6f}\n"
+        if model_info.get('profile'):
+            summary_text += "\nСтоимость:\n" + "\n".join(format_profile(model_info['profile'])) + "\n"
         
         await update.message.reply_text(summary_text)
 
@@ -167,6 +172,54 @@ async def get_metrics(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         )
 
 
+def format_profile(profile: dict) -> list[str]:
+    """Строки с временем, памятью и размером модели из ее профиля в JSON."""
+    lines = [
+        f"Подготовка признаков: {profile['preprocessing_seconds']:.3f} c",
+        f"Обучение: {profile['fit_seconds']:.3f} c",
+        f"Предсказание: {profile['predict_ms_per_1k_rows']:.2f} мс на 1000 строк",
+    ]
+    if profile.get('peak_fit_memory_bytes') is not None:
+        lines.append(f"Пик памяти обучения: {profile['peak_fit_memory_bytes'] / 1024 ** 2:.1f} MB")
+    lines.append(f"Размер модели: {profile['serialized_bytes'] / 1024 ** 2:.2f} MB")
+    lines.append(f"Признаков: {profile['n_features']}")
+    return lines
+
+
+async def list_costs(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /costs - модели по возрастанию задержки предсказания."""
+    try:
+        if not METRICS_FILE.exists():
+            await update.message.reply_text(
+                " Файл с метриками не найден. "
+                "Сначала обучите модели в приложении."
+            )
+            return
+
+        with open(METRICS_FILE, 'r', encoding='utf-8') as f:
+            metrics_data = json.load(f)
+
+        profiles = {name: info['profile'] for name, info in metrics_data.items() if info.get('profile')}
+        if not profiles:
+            await update.message.reply_text(
+                " Нет данных о стоимости моделей. Переобучите модели в приложении."
+            )
+            return
+
+        costs_text = "Стоимость моделей (по возрастанию времени предсказания):\n\n"
+        for name in sorted(profiles, key=lambda name: profiles[name]['predict_ms_per_1k_rows']):
+            r2 = metrics_data[name].get('metrics', {}).get('r2')
+            costs_text += f"{name}" + (f" (R² {r2:.4f})" if r2 is not None else "") + "\n"
+            costs_text += "\n".join(f"  {line}" for line in format_profile(profiles[name])) + "\n\n"
+        await update.message.reply_text(costs_text)
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении стоимости моделей: {e}")
+        await update.message.reply_text(
+            f" Ошибка при получении стоимости моделей: {str(e)}"
+        )
+
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик текстовых сообщений."""
     text = update.message.text.lower()
@@ -199,6 +252,7 @@ def main() -> None:
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("models", list_models))
     application.add_handler(CommandHandler("metrics", get_metrics))
+    application.add_handler(CommandHandler("costs", list_costs))
     
     # Обработчик текстовых сообщений
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
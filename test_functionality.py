@@ -9,10 +9,23 @@ from core import (
     CarPricePredictor,
     PreprocessingConfig,
     DataLoader,
+    DatasetCache,
     DataPreprocessor,
+    PreprocessingCache,
     DataAnalyzer,
-    ModelTrainer
+    EncodingConfig,
+    FrequencyEncoder,
+    HashingEncoder,
+    ModelProfile,
+    ModelTrainer,
+    RegularizationPathConfig,
+    SearchConfig,
+    TrainingBudget
 )
+from core.encoders import extract_brand
+from core.hyperparameter_search import SEARCH_SPACES, halving_schedule
+from core.linear_paths import GramSystem, elastic_net_path, ridge_path
+from core.training_budget import CostEstimate
 
 
 def create_test_data():
@@ -65,6 +78,75 @@ def test_data_loader():
         return False
 
 
+def test_streaming_loader():
+    """Тестирует потоковую загрузку CSV порциями."""
+    print("\n=== Тестирование потоковой загрузки ===")
+    loader = DataLoader()
+    test_file = Path(__file__).parent / 'test_car_data.csv'
+
+    try:
+        progress = []
+        df = loader.load_csv(test_file, chunksize=30, progress_callback=progress.append)
+        expected = pd.read_csv(test_file)
+        pd.testing.assert_frame_equal(df, expected)
+        assert progress and progress[-1] == 100, "Прогресс не дошел до 100%"
+        print(f"✓ Данные загружены порциями: {df.shape[0]} строк, прогресс {progress}")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+
+
+def test_dataset_cache():
+    """Тестирует бинарный кэш загруженных CSV."""
+    print("\n=== Тестирование кэша данных ===")
+    test_file = Path(__file__).parent / 'test_car_data.csv'
+
+    try:
+        import shutil
+        shutil.rmtree(DatasetCache().entry_dir(test_file), ignore_errors=True)
+
+        first_loader = DataLoader()
+        first = first_loader.load_csv(test_file)
+        assert not first_loader.describe().cache_hit, "Первая загрузка не должна попадать в кэш"
+
+        second_loader = DataLoader()
+        second = second_loader.load_csv(test_file)
+        assert second_loader.describe().cache_hit, "Повторная загрузка должна читаться из кэша"
+        pd.testing.assert_frame_equal(first, second)
+        print("✓ Повторная загрузка прочитана из кэша без разбора CSV")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+
+
+def test_memory_profile():
+    """Тестирует компактный профиль загрузки и работу конвейера на нем."""
+    print("\n=== Тестирование экономии памяти ===")
+    test_file = Path(__file__).parent / 'test_car_data.csv'
+
+    try:
+        loader = DataLoader()
+        df = loader.load_csv(test_file, optimize_memory=True)
+        summary = loader.describe()
+        assert summary.memory_saved_bytes > 0, "Экономия памяти не зафиксирована"
+        assert isinstance(df['fuel_type'].dtype, pd.CategoricalDtype)
+        print(f"✓ Сэкономлено {summary.memory_saved_bytes} байт")
+
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price')).preprocess(df)
+        assert isinstance(cleaned_df['fuel_type'].dtype, pd.CategoricalDtype), \
+            "Предобработка вернула категориальный столбец к object"
+        DataAnalyzer().categorical_statistics(cleaned_df)
+        results = ModelTrainer(target_column='price').train(cleaned_df, rf_estimators=10)
+        assert results, "Модели не обучены на компактном кадре"
+        print(f"✓ Конвейер работает на компактном кадре: {len(results)} моделей")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+
+
 def test_preprocessor():
     """Тестирует предобработку данных."""
     print("\n=== Тестирование DataPreprocessor ===")
@@ -113,15 +195,45 @@ def test_analyzer():
         # Тестируем статистику
         numeric_stats = analyzer.numeric_statistics(cleaned_df)
         print(f"✓ Числовая статистика: {len(numeric_stats)} признаков")
+
+        # Однопроходный расчет должен совпадать с отдельными вызовами pandas
+        with_gaps = pd.read_csv(Path(__file__).parent / 'test_car_data.csv')
+        numeric_df = with_gaps.select_dtypes(include="number")
+        expected = pd.DataFrame(
+            {
+                "min": numeric_df.min(),
+                "max": numeric_df.max(),
+                "mean": numeric_df.mean(),
+                "median": numeric_df.median(),
+                "variance": numeric_df.var(),
+                "std": numeric_df.std(),
+            }
+        ).join(numeric_df.quantile([0.1, 0.25, 0.75, 0.9]).T.add_prefix("q_"))
+        pd.testing.assert_frame_equal(analyzer.numeric_statistics(with_gaps), expected)
+        print("✓ Статистика совпадает с расчетом pandas")
+
+        categorical_stats = analyzer.categorical_statistics(with_gaps)
+        for column, row in categorical_stats.iterrows():
+            counts = with_gaps[column].value_counts()
+            assert row["unique_count"] == len(counts), f"Неверное число уникальных в {column}"
+            assert row["mode"] == with_gaps[column].mode().iloc[0], f"Неверная мода в {column}"
+            assert row["mode_frequency"] == counts.max(), f"Неверная частота моды в {column}"
+        print(f"✓ Категориальная статистика: {len(categorical_stats)} признаков")
         
         # Тестируем визуализации
         artifacts = analyzer.build_visualizations(cleaned_df, 'price')
+        assert artifacts.price_hist.startswith(b"\x89PNG"), "График не закодирован в PNG"
         if artifacts.price_hist:
             print(f"✓ Гистограмма цен создана")
         if artifacts.price_box:
             print(f"✓ Boxplot цен создан")
         if artifacts.correlation_heatmap:
             print(f"✓ Тепловая карта корреляции создана")
+
+        # Режим больших данных: графики по бинам и квартилям
+        large = DataAnalyzer(large_data_rows=10).build_visualizations(cleaned_df, 'price')
+        assert large.price_hist and large.price_box, "Графики по агрегатам не построены"
+        print("✓ Графики по агрегатам построены")
         
         return True
     except Exception as e:
@@ -131,6 +243,99 @@ def test_analyzer():
         return False
 
 
+def test_statistics_accumulators():
+    """Тестирует накопление статистики по порциям и слияние накопителей."""
+    print("\n=== Тестирование накопителей статистики ===")
+
+    try:
+        dataframe = pd.read_csv(Path(__file__).parent / 'test_car_data.csv')
+        analyzer = DataAnalyzer()
+
+        history = analyzer.numeric_accumulator()
+        for start in range(0, 80, 20):
+            history.update(dataframe.iloc[start:start + 20])
+        new_day = analyzer.numeric_accumulator().update(dataframe.iloc[80:])
+        history.merge(new_day)
+        pd.testing.assert_frame_equal(
+            analyzer.numeric_statistics(history), analyzer.numeric_statistics(dataframe)
+        )
+        print("✓ Числовая статистика по порциям совпадает с расчетом целиком")
+
+        categories = analyzer.categorical_accumulator()
+        categories.update(dataframe.iloc[:50]).merge(
+            analyzer.categorical_accumulator().update(dataframe.iloc[50:])
+        )
+        pd.testing.assert_frame_equal(
+            analyzer.categorical_statistics(categories), analyzer.categorical_statistics(dataframe)
+        )
+        print("✓ Таблицы частот объединяются без пересчета истории")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+
+
+def test_correlation_engine():
+    """Тестирует блочный расчет корреляций и режим top-k."""
+    print("\n=== Тестирование матрицы корреляций ===")
+
+    try:
+        from core.correlation import correlation_matrix
+
+        rng = np.random.default_rng(0)
+        wide = pd.DataFrame(rng.normal(size=(500, 80)), columns=[f"f{i}" for i in range(80)])
+        wide['price'] = wide['f3'] * 3 + wide['f7'] + rng.normal(size=500)
+
+        matrix = correlation_matrix(wide, block_bytes=8 * 81 * 100)
+        assert np.allclose(matrix, wide.corr(), atol=1e-5), "Корреляции отличаются от pandas"
+        print("✓ Блочный расчет в float32 совпадает с DataFrame.corr")
+
+        artifacts = DataAnalyzer(large_data_rows=10 ** 9).build_visualizations(wide, 'price')
+        assert artifacts.correlation.shape == (81, 81), "Матрица не сохранена в артефактах"
+        assert artifacts.correlation_heatmap, "Тепловая карта top-k не построена"
+        print("✓ Широкие данные: тепловая карта по top-k признакам")
+
+        predictor = CarPricePredictor()
+        predictor.cleaned_df = wide
+        first = predictor.analyze(Path(__file__).parent / 'test_artifacts')
+        second = predictor.analyze(Path(__file__).parent / 'test_artifacts')
+        assert first.correlation_path.exists(), "Файл матрицы корреляций не создан"
+        assert second.visualizations.correlation is first.visualizations.correlation, "Матрица пересчитана"
+        print("✓ Матрица корреляций переиспользуется при повторном анализе")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+
+
+def test_concurrent_analysis():
+    """Тестирует параллельный анализ: потоки для статистики, процессы для графиков."""
+    print("\n=== Тестирование параллельного анализа ===")
+
+    predictor = CarPricePredictor()
+    try:
+        predictor.load_data(Path(__file__).parent / 'test_car_data.csv')
+        predictor.preprocess_data(PreprocessingConfig(target_column='price'))
+        output_dir = Path(__file__).parent / 'test_artifacts'
+
+        for in_processes in (False, True):
+            predictor.render_in_processes = in_processes
+            progress = []
+            artifacts = predictor.analyze(output_dir, progress_callback=progress.append)
+            viz = artifacts.visualizations
+            assert viz.price_hist and viz.price_box and viz.correlation_heatmap, "Не все графики построены"
+            assert progress == sorted(progress) and len(progress) == 6, f"Неверный прогресс: {progress}"
+            assert artifacts.numeric_stats_path.exists() and artifacts.correlation_path.exists()
+            mode = "процессах" if in_processes else "потоках"
+            print(f"✓ Графики построены в {mode}, прогресс по этапам: {progress}")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+    finally:
+        predictor.shutdown()
+
+
 def test_model_trainer():
     """Тестирует обучение моделей."""
     print("\n=== Тестирование ModelTrainer ===")
@@ -153,6 +358,18 @@ def test_model_trainer():
         results = trainer.train(cleaned_df, test_size=0.2, random_state=42, rf_estimators=50)
         
         print(f"✓ Модели обучены: {len(results)} шт.")
+        preprocessors = {id(result.pipeline.named_steps['preprocessor']) for result in results.values()}
+        assert len(preprocessors) == 1, "Предобработка обучалась для каждой модели отдельно"
+        
+        # One-Hot остается разреженным: линейные модели обучаются на CSR, деревья - на плотной копии
+        assert 'densify' not in results['ridge'].pipeline.named_steps
+        assert 'densify' in results['random_forest'].pipeline.named_steps
+        dense_results = ModelTrainer(target_column='price', sparse_features=False).train(
+            cleaned_df, test_size=0.2, random_state=42, rf_estimators=50
+        )
+        for name, result in dense_results.items():
+            assert abs(result.metrics['r2'] - results[name].metrics['r2']) < 1e-3, f"R² {name} отличается"
+        print("✓ Метрики на разреженных и плотных признаках совпадают")
         
         for name, result in results.items():
             print(f"  - {name}:")
@@ -184,6 +401,405 @@ def test_model_trainer():
         return False
 
 
+def test_parallel_training():
+    """Тестирует обучение моделей в пуле процессов."""
+    print("\n=== Тестирование параллельного обучения ===")
+    
+    try:
+        loader = DataLoader()
+        test_file = Path(__file__).parent / 'test_car_data.csv'
+        df = loader.load_csv(test_file)
+        config = PreprocessingConfig(target_column='price', drop_columns=['car_ID'])
+        cleaned_df = DataPreprocessor(config).preprocess(df)
+        
+        sequential = ModelTrainer(target_column='price').train(cleaned_df, rf_estimators=20)
+        
+        progress = []
+        trainer = ModelTrainer(target_column='price', n_jobs=2)
+        parallel = trainer.train(cleaned_df, rf_estimators=20, progress_callback=progress.append)
+        assert parallel is trainer.results
+        assert set(parallel) == set(sequential), "Набор моделей отличается"
+        for name, result in sequential.items():
+            assert parallel[name].metrics == result.metrics, f"Метрики {name} отличаются"
+        assert progress == sorted(progress) and len(progress) == len(parallel)
+        print(f"✓ Параллельно обучено моделей: {len(parallel)}, метрики совпадают")
+        
+        predictions = trainer.predict('random_forest', cleaned_df.drop(columns=['price']).head(5))
+        assert len(predictions) == 5
+        print("✓ Модель из процесса пула выполняет предсказания")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_encoders():
+    """Тестирует выделение марки и кодирование категорий с большим числом значений."""
+    print("\n=== Тестирование кодировщиков категорий ===")
+    
+    try:
+        names = pd.Series(['alfa-romero giulia', 'Nissan rogue', 'vw rabbit', 'maxda rx3', None])
+        brands = extract_brand(names).tolist()
+        assert brands[:4] == ['alfa-romero', 'nissan', 'volkswagen', 'mazda'], brands
+        assert pd.isna(brands[4])
+        print(f"✓ Марки выделены: {brands[:4]}")
+        
+        loader = DataLoader()
+        df = loader.load_csv(Path(__file__).parent / 'test_car_data.csv')
+        df['CarName'] = df['brand'] + ' ' + df['model'] + pd.Series(range(len(df))).mod(60).astype(str)
+        
+        config = PreprocessingConfig(target_column='price', drop_columns=['car_ID'], brand_column='CarName')
+        branded = DataPreprocessor(config).preprocess(df)
+        assert set(branded['CarName']) == set(df['brand'].str.lower())
+        print(f"✓ Предобработка заменила CarName маркой: {branded['CarName'].nunique()} значений")
+        
+        categories = df[['CarName']]
+        hashed = HashingEncoder(n_features=16).fit(categories).transform(categories)
+        assert hashed.shape == (len(df), 16) and (hashed.sum(axis=1) == 1).all()
+        unseen = HashingEncoder(n_features=16).fit(categories).transform(pd.DataFrame({'CarName': ['new car']}))
+        assert unseen.shape == (1, 16)
+        frequencies = FrequencyEncoder().fit(categories).transform(pd.DataFrame({'CarName': [df['CarName'][0], 'new car']}))
+        assert frequencies[0, 0] == (df['CarName'] == df['CarName'][0]).mean() and frequencies[1, 0] == 0.0
+        print("✓ Хэширование и частотное кодирование работают на новых значениях")
+        
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price', drop_columns=['car_ID'])).preprocess(df)
+        for method in ('hashing', 'frequency', 'target'):
+            encoding = EncodingConfig(high_cardinality=method, threshold=20, hash_features=8)
+            trainer = ModelTrainer(target_column='price', encoding=encoding)
+            results = trainer.train(cleaned_df, rf_estimators=10)
+            preprocessor = results['ridge'].pipeline.named_steps['preprocessor']
+            assert 'high_cardinality' in preprocessor.named_transformers_
+            width = preprocessor.transform(cleaned_df.head(3)).shape[1]
+            onehot_width = cleaned_df.drop(columns=['price', 'CarName']).select_dtypes(exclude='number').nunique().sum()
+            assert width <= onehot_width + 8 + cleaned_df.select_dtypes(include='number').shape[1]
+            assert len(trainer.predict('ridge', cleaned_df.drop(columns=['price']).head(3))) == 3
+            print(f"✓ Кодирование {method}: {len(results)} моделей, ширина матрицы {width}")
+        
+        # Кодирование средним вне фолда: значения обучающей выборки отличаются от полного обучения
+        encoder = EncodingConfig(high_cardinality='target', threshold=20)
+        preprocessor = ModelTrainer._build_preprocessor(cleaned_df.drop(columns=['price']), True, encoder, 42)
+        X = cleaned_df.drop(columns=['price'])
+        out_of_fold = preprocessor.fit_transform(X, cleaned_df['price'])
+        assert not np.allclose(out_of_fold.toarray(), preprocessor.transform(X).toarray())
+        print("✓ Кодирование средним использует значения вне фолда")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_hist_gradient_boosting():
+    """Тестирует гистограммный движок градиентного бустинга."""
+    print("\n=== Тестирование HistGradientBoosting ===")
+    
+    try:
+        loader = DataLoader()
+        df = loader.load_csv(Path(__file__).parent / 'test_car_data.csv')
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price', drop_columns=['car_ID'])).preprocess(df)
+        
+        trainer = ModelTrainer(target_column='price', boosting='histogram')
+        results = trainer.train(cleaned_df, rf_estimators=10)
+        assert 'hist_gradient_boosting' in results and 'gradient_boosting' not in results
+        model = results['hist_gradient_boosting'].pipeline.named_steps['model']
+        n_categorical = cleaned_df.drop(columns=['price']).select_dtypes(exclude='number').shape[1]
+        assert model.is_categorical_.sum() == n_categorical, "Категории не переданы как категориальные"
+        print(f"✓ HistGradientBoosting обучен: {model.n_iter_} итераций, R² {results['hist_gradient_boosting'].metrics['r2']:.4f}")
+        
+        unseen = cleaned_df.drop(columns=['price']).head(3).assign(brand='Unseen')
+        assert np.isfinite(trainer.predict('hist_gradient_boosting', unseen)).all()
+        print("✓ Новые категории обрабатываются как пропуски")
+        
+        save_path = Path(__file__).parent / 'test_hist_model.joblib'
+        trainer.save_model('hist_gradient_boosting', save_path)
+        loaded = ModelTrainer(target_column='price').load_model(save_path)
+        save_path.unlink()
+        assert loaded.metrics == results['hist_gradient_boosting'].metrics
+        print("✓ Модель сохраняется и загружается как остальные")
+        
+        auto = ModelTrainer(target_column='price', boosting='auto').train(cleaned_df, rf_estimators=10)
+        assert 'gradient_boosting' in auto, "auto на малых данных должен выбирать точный бустинг"
+        try:
+            ModelTrainer(target_column='price', boosting='xgboost').train(cleaned_df)
+            raise AssertionError("Неизвестный движок не отклонен")
+        except ValueError:
+            pass
+        print("✓ auto выбирает GradientBoosting на малых данных, неизвестный движок отклоняется")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_training_budget():
+    """Тестирует лимиты времени и памяти на обучение моделей."""
+    print("\n=== Тестирование бюджета обучения ===")
+    
+    try:
+        estimate = CostEstimate(probe_rows=100, seconds=1.0, peak_bytes=1000, exponent=1.0)
+        assert estimate.project(200) == (2.0, 2000.0)
+        assert estimate.affordable_rows(TrainingBudget(max_fit_seconds=0.5)) == 50
+        assert estimate.affordable_rows(TrainingBudget(max_fit_seconds=5.0, max_memory_bytes=3000)) == 300
+        print("✓ Прогноз стоимости пересчитывается на число строк")
+        
+        loader = DataLoader()
+        df = loader.load_csv(Path(__file__).parent / 'test_car_data.csv')
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price', drop_columns=['car_ID'])).preprocess(df)
+        
+        tight = TrainingBudget(max_fit_seconds=1e-9, probe_rows=20, allow_subsample=False)
+        trainer = ModelTrainer(target_column='price', budget=tight)
+        results = trainer.train(cleaned_df, rf_estimators=10)
+        assert not results and 'svr' in trainer.skipped
+        assert all('прогноз времени' in reason for reason in trainer.skipped.values())
+        print(f"✓ Модели сверх лимита пропущены: {len(trainer.skipped)}")
+
+        trainer = ModelTrainer(target_column='price')
+        assert trainer.train(cleaned_df, rf_estimators=10)
+        results = trainer.train(cleaned_df, rf_estimators=10, budget=tight)
+        assert not results and not trainer.results, "Пропущенные модели вернулись из прошлого запуска"
+        print("✓ Результаты прошлого запуска не выдаются за пропущенные модели")
+
+        trainer = ModelTrainer(target_column='price', budget=TrainingBudget(timeout_seconds=0.001))
+        results = trainer.train(cleaned_df, rf_estimators=500)
+        assert 'random_forest' not in results
+        assert 'лимит времени' in trainer.skipped['random_forest']
+        print(f"✓ Обучение прервано по таймауту: {trainer.skipped['random_forest']}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_cross_validation():
+    """Тестирует k-fold кросс-валидацию моделей."""
+    print("\n=== Тестирование кросс-валидации ===")
+    
+    try:
+        loader = DataLoader()
+        df = loader.load_csv(Path(__file__).parent / 'test_car_data.csv')
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price', drop_columns=['car_ID'])).preprocess(df)
+        
+        trainer = ModelTrainer(target_column='price')
+        scores = trainer.cross_validate(cleaned_df, n_splits=3, rf_estimators=10)
+        assert set(scores) == {'random_forest', 'gradient_boosting', 'linear_regression', 'ridge', 'lasso', 'elastic_net', 'svr'}
+        ridge = scores['ridge']
+        assert ridge.n_splits == 3
+        assert np.isclose(ridge.mean['r2'], np.mean([fold['r2'] for fold in ridge.fold_metrics]))
+        assert np.isclose(ridge.std['r2'], np.std([fold['r2'] for fold in ridge.fold_metrics]))
+        print(f"✓ Ridge R² по 3 фолдам: {ridge.mean['r2']:.4f} ± {ridge.std['r2']:.4f}")
+        
+        parallel = ModelTrainer(target_column='price', n_jobs=2).cross_validate(cleaned_df, n_splits=3, rf_estimators=10)
+        for name, score in scores.items():
+            assert parallel[name].fold_metrics == score.fold_metrics, f"Фолды {name} расходятся"
+        print("✓ Параллельная кросс-валидация совпадает с последовательной")
+        
+        progress = []
+        results = trainer.train(cleaned_df, rf_estimators=10, cv_folds=3, progress_callback=progress.append)
+        assert all(result.cross_validation.n_splits == 3 for result in results.values())
+        assert progress == sorted(progress) and progress[-1] == 99
+        print("✓ train(cv_folds=3) добавляет метрики кросс-валидации к результатам")
+
+        class RecordingTrainer(ModelTrainer):
+            """Назначает ridge подвыборку и запоминает размеры обучающих частей."""
+
+            def _plan_budget(self, models, model_features, budget, random_state):
+                plans = {name: (None, None) for name in models}
+                plans['ridge'] = (np.arange(30), "подвыборка 30 строк")
+                return plans
+
+            def _fit_all(self, models, inputs, n_jobs, budget, *args, **kwargs):
+                self.fit_rows.update({key: value[0].shape[0] for key, value in inputs.items()})
+                self.budgets.extend(budget for key in models if isinstance(key, tuple))
+                return super()._fit_all(models, inputs, n_jobs, budget, *args, **kwargs)
+
+        recording = RecordingTrainer(target_column='price', budget=TrainingBudget(max_fit_seconds=1e6))
+        recording.fit_rows, recording.budgets = {}, []
+        recording.train(cleaned_df, rf_estimators=10, cv_folds=3)
+        cv_rows = {key: rows for key, rows in recording.fit_rows.items() if isinstance(key, tuple)}
+        assert all(rows == 30 for (name, _), rows in cv_rows.items() if name == 'ridge')
+        assert all(rows > 60 for (name, _), rows in cv_rows.items() if name != 'ridge')
+        print("✓ Кросс-валидация обучает на фолдах подвыборку, назначенную бюджетом")
+
+        recording = RecordingTrainer(target_column='price')
+        recording.fit_rows, recording.budgets = {}, []
+        timed = recording.cross_validate(
+            cleaned_df, n_splits=3, rf_estimators=10, budget=TrainingBudget(timeout_seconds=1e-9)
+        )
+        assert not timed and all('лимит времени' in reason for reason in recording.skipped.values())
+        assert {fold for _, fold in recording.fit_rows} == {0}, "Фолды после превышения лимита обучались"
+        assert recording.budgets and all(budget is None for budget in recording.budgets)
+        print("✓ Лимит времени действует на модель по всем фолдам, без процесса на фолд")
+
+        try:
+            trainer.cross_validate(cleaned_df, n_splits=1)
+            raise AssertionError("n_splits=1 не отклонен")
+        except ValueError:
+            pass
+        print("✓ Некорректное число фолдов отклоняется")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_hyperparameter_search():
+    """Тестирует подбор гиперпараметров последовательным делением пополам."""
+    print("\n=== Тестирование подбора гиперпараметров ===")
+    
+    try:
+        assert halving_schedule(9, 3, 300) == [33, 100, 300]
+        assert halving_schedule(16, 3, 2400, 1000) == [1000, 1000, 2400]
+        assert halving_schedule(1, 3, 300) == [300]
+        print("✓ Ресурс раундов растет в factor раз до полного")
+        
+        loader = DataLoader()
+        df = loader.load_csv(Path(__file__).parent / 'test_car_data.csv')
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price', drop_columns=['car_ID'])).preprocess(df)
+        
+        config = SearchConfig(n_candidates=4, factor=2, cv_folds=2, min_rows=20)
+        trainer = ModelTrainer(target_column='price')
+        results = trainer.train(cleaned_df, rf_estimators=20, search=config)
+        assert results['linear_regression'].best_params is None
+        for name in ('random_forest', 'ridge', 'svr'):
+            params = results[name].best_params
+            assert params and all(params[k] in SEARCH_SPACES[name][k] for k in params), f"{name}: {params}"
+            assert np.isfinite(results[name].search_score)
+        forest = results['random_forest'].pipeline.named_steps['model']
+        assert forest.n_estimators == 20 and not forest.warm_start
+        assert forest.max_depth == results['random_forest'].best_params['max_depth']
+        print(f"✓ Подобрано для random_forest: {results['random_forest'].best_params}")
+
+        class RecordingTrainer(ModelTrainer):
+            """Запоминает раунды подбора и бюджет, с которым они обучаются."""
+
+            def _fit_all(self, models, inputs, n_jobs, budget, *args, **kwargs):
+                keys = list(models)
+                if keys and len(keys[0]) == 3:
+                    self.rounds.append((keys[0][0], budget))
+                return super()._fit_all(models, inputs, n_jobs, budget, *args, **kwargs)
+
+        recording = RecordingTrainer(target_column='price', budget=TrainingBudget(timeout_seconds=1e-6))
+        recording.rounds = []
+        recording.train(cleaned_df, rf_estimators=20, search=config)
+        searched = [name for name, _ in recording.rounds]
+        assert len(searched) == len(set(searched)) and 'random_forest' in searched, recording.rounds
+        assert all(budget is None for _, budget in recording.rounds)
+        print("✓ Подбор идет без процесса на задачу и останавливается по лимиту времени модели")
+
+        try:
+            SearchConfig(factor=1)
+            raise AssertionError("factor=1 не отклонен")
+        except ValueError:
+            pass
+        print("✓ Некорректная конфигурация подбора отклоняется")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_regularization_paths():
+    """Тестирует выбор alpha линейных моделей по путям регуляризации."""
+    print("\n=== Тестирование путей регуляризации ===")
+    
+    try:
+        from scipy import sparse
+        from sklearn.linear_model import ElasticNet, Ridge
+        
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(300, 12))
+        X[:, 6:] = rng.random((300, 6)) < 0.2
+        y = X @ rng.normal(size=12) + rng.normal(size=300) + 3.0
+        config = RegularizationPathConfig(n_alphas=10)
+        for matrix in (X, sparse.csr_matrix(X)):
+            system = GramSystem.from_data(matrix, y)
+            alphas, coefs = elastic_net_path(system, 0.5, config, max_iter=5000, tol=1e-10)
+            reference = ElasticNet(alpha=alphas[5], l1_ratio=0.5, max_iter=5000, tol=1e-10).fit(matrix, y)
+            assert np.allclose(coefs[:, 5], reference.coef_, atol=1e-6)
+            assert np.isclose(system.intercepts(coefs)[5], reference.intercept_, atol=1e-6)
+        ridge_coefs = ridge_path(system, np.array([10.0]))
+        assert np.allclose(ridge_coefs[:, 0], Ridge(alpha=10.0).fit(X, y).coef_, atol=1e-8)
+        print("✓ Пути по матрице Грама совпадают с Ridge и ElasticNet sklearn")
+        
+        loader = DataLoader()
+        df = loader.load_csv(Path(__file__).parent / 'test_car_data.csv')
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price', drop_columns=['car_ID'])).preprocess(df)
+        
+        results = ModelTrainer(target_column='price').train(cleaned_df, rf_estimators=10, paths=RegularizationPathConfig())
+        for name in ('ridge', 'lasso', 'elastic_net'):
+            params = results[name].best_params
+            model = results[name].pipeline.named_steps['model']
+            assert params and model.alpha == params['alpha'], f"{name}: {params}"
+            assert np.isfinite(results[name].search_score)
+        assert results['elastic_net'].best_params['l1_ratio'] in RegularizationPathConfig().l1_ratios
+        assert results['random_forest'].best_params is None
+        print(f"✓ Выбраны alpha: ridge {results['ridge'].best_params['alpha']:.4g}, lasso {results['lasso'].best_params['alpha']:.4g}")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_model_profile():
+    """Тестирует замеры стоимости моделей в ModelTrainingResult."""
+    print("\n=== Тестирование профиля моделей ===")
+    
+    try:
+        import io
+        import joblib
+        
+        loader = DataLoader()
+        df = loader.load_csv(Path(__file__).parent / 'test_car_data.csv')
+        cleaned_df = DataPreprocessor(PreprocessingConfig(target_column='price', drop_columns=['car_ID'])).preprocess(df)
+        
+        results = ModelTrainer(target_column='price').train(cleaned_df, rf_estimators=10, profile_memory=True)
+        for name, result in results.items():
+            profile = result.profile
+            assert isinstance(profile, ModelProfile), name
+            assert profile.fit_seconds > 0 and profile.predict_ms_per_1k_rows > 0 and profile.preprocessing_seconds > 0
+            assert profile.peak_fit_memory_bytes > 0, f"{name}: пик памяти не замерен"
+            buffer = io.BytesIO()
+            joblib.dump(result.pipeline, buffer)
+            assert profile.serialized_bytes == len(buffer.getvalue()), f"{name}: размер не совпадает"
+        forest = results['random_forest'].profile
+        assert forest.n_features == results['ridge'].profile.n_features
+        assert forest.serialized_bytes > results['ridge'].profile.serialized_bytes
+        print(f"✓ random_forest: обучение {forest.fit_seconds:.3f} c, {forest.predict_ms_per_1k_rows:.1f} мс/1000 строк, "
+              f"{forest.serialized_bytes / 1024:.0f} KB, признаков {forest.n_features}")
+        
+        results = ModelTrainer(target_column='price', n_jobs=2).train(cleaned_df, rf_estimators=10)
+        assert all(result.profile.peak_fit_memory_bytes is None for result in results.values())
+        assert all(result.profile.fit_seconds > 0 for result in results.values())
+        print("✓ Без отслеживания памяти пик не записывается, замеры из пула процессов сохраняются")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def test_full_pipeline():
     """Тестирует полный конвейер через CarPricePredictor."""
     print("\n=== Тестирование полного конвейера ===")
@@ -235,6 +851,141 @@ def test_full_pipeline():
         return False
 
 
+def test_predict_raw_with_fitted_preprocessing():
+    """Тестирует предсказание по сырым данным с сохраненной предобработкой."""
+    print("\n=== Тестирование predict_raw ===")
+
+    try:
+        predictor = CarPricePredictor()
+        test_file = Path(__file__).parent / 'test_car_data.csv'
+        predictor.load_data(test_file)
+        predictor.preprocess_data(PreprocessingConfig(target_column='price'))
+        predictor.train_models(rf_estimators=10)
+
+        # Одна сырая строка с пропуском: статистики берутся из обучения
+        raw_row = pd.read_csv(test_file).drop(columns=['price']).head(1)
+        raw_row['mileage'] = np.nan
+        predicted = predictor.predict_raw(raw_row, 'ridge')['predicted_price']
+        print(f"✓ Предсказание по одной сырой строке: {predicted.iloc[0]:.2f}")
+
+        save_path = Path(__file__).parent / 'test_ridge.joblib'
+        predictor.save_model('ridge', save_path)
+        restored = CarPricePredictor()
+        restored.load_model(save_path)
+        save_path.unlink()
+        restored_predicted = restored.predict_raw(raw_row, 'ridge')['predicted_price']
+        assert np.allclose(predicted, restored_predicted), "Предобработка не сохранилась с моделью"
+        print("✓ Загруженная модель применяет ту же предобработку")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_memory_lean_pipeline():
+    """Тестирует экономный режим без лишних копий данных."""
+    print("\n=== Тестирование экономного режима ===")
+
+    try:
+        predictor = CarPricePredictor(memory_lean=True)
+        test_file = Path(__file__).parent / 'test_car_data.csv'
+        predictor.load_data(test_file)
+        assert predictor.raw_df is predictor.loader.dataframe, "Загрузчик сделал лишнюю копию"
+        raw_snapshot = predictor.raw_df.copy()
+
+        cleaned_df = predictor.preprocess_data(PreprocessingConfig(target_column='price'))
+        assert cleaned_df.isna().sum().sum() == 0, "Остались пропущенные значения"
+        pd.testing.assert_frame_equal(predictor.raw_df, raw_snapshot)
+        print("✓ Сырые данные не изменены, пропуски заполнены в очищенном кадре")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+
+
+def test_chunked_preprocessing():
+    """Тестирует предобработку порциями без загрузки всего файла."""
+    print("\n=== Тестирование предобработки порциями ===")
+
+    try:
+        test_file = Path(__file__).parent / 'test_car_data.csv'
+        config = PreprocessingConfig(target_column='price')
+        full_df = pd.read_csv(test_file)
+        expected = DataPreprocessor(config).preprocess(full_df)
+
+        chunked = DataPreprocessor(config)
+        chunked.fit(DataLoader.iter_csv_chunks(test_file, chunksize=3))
+        assert chunked.state == DataPreprocessor(config).fit(full_df).state, "Статистики порций отличаются"
+        print("✓ Статистики по порциям совпадают с обработкой целиком")
+
+        parts = []
+        rows = DataPreprocessor(config).preprocess_chunks(
+            DataLoader.iter_csv_chunks(test_file, chunksize=3), consumer=parts.append
+        )
+        assert rows == len(full_df), "Неверное число обработанных строк"
+        result = pd.concat(parts, ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected.reset_index(drop=True))
+        print(f"✓ Обработано порциями: {rows} строк")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+
+
+def test_preprocessing_cache():
+    """Тестирует кэш результатов предобработки в памяти и на диске."""
+    print("\n=== Тестирование кэша предобработки ===")
+
+    import shutil
+    import tempfile
+
+    cache_dir = Path(tempfile.mkdtemp(prefix="carml_preprocess_"))
+    try:
+        test_file = Path(__file__).parent / 'test_car_data.csv'
+        config = PreprocessingConfig(target_column='price')
+
+        predictor = CarPricePredictor(preprocessing_cache=PreprocessingCache(directory=cache_dir))
+        predictor.load_data(test_file)
+        first = predictor.preprocess_data(config)
+        assert not predictor.preprocessing_cache_hit, "Первый запуск не должен попадать в кэш"
+        second = predictor.preprocess_data(config)
+        assert predictor.preprocessing_cache_hit, "Повторный запуск не взят из кэша"
+        pd.testing.assert_frame_equal(first, second)
+        print("✓ Повторная предобработка взята из кэша в памяти")
+
+        predictor.preprocess_data(PreprocessingConfig(target_column='price', drop_columns=['car_ID']))
+        assert not predictor.preprocessing_cache_hit, "Другие параметры должны давать другой ключ"
+
+        restarted = CarPricePredictor(preprocessing_cache=PreprocessingCache(directory=cache_dir))
+        restarted.load_data(test_file)
+        from_disk = restarted.preprocess_data(config)
+        assert restarted.preprocessing_cache_hit, "Запись не найдена на диске"
+        pd.testing.assert_frame_equal(first, from_disk)
+        assert restarted.preprocessor.state == predictor.preprocessing_cache.get(
+            predictor.preprocessing_cache.key(predictor.raw_df, config)
+        ).state
+        print("✓ Результат восстановлен с диска в новом сеансе")
+
+        limited = PreprocessingCache(max_memory_bytes=int(first.memory_usage(deep=True).sum()))
+        limited.put("a", restarted.preprocessor.state, first)
+        limited.put("b", restarted.preprocessor.state, first)
+        assert len(limited) == 1 and limited.get("a") is None, "LRU не вытеснил старую запись"
+        print("✓ Старые записи вытесняются при превышении лимита")
+
+        tiny = PreprocessingCache(max_memory_bytes=1)
+        oversized = tiny.put("c", restarted.preprocessor.state, first, copy=True)
+        assert oversized.frame is first and len(tiny) == 0, "Кадр больше лимита скопирован"
+        print("✓ Кадр больше лимита не копируется")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка: {e}")
+        return False
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
 def main():
     """Запускает все тесты."""
     print("╔════════════════════════════════════════════╗")
@@ -243,10 +994,28 @@ def main():
     
     tests = [
         ("Загрузка данных", test_data_loader),
+        ("Потоковая загрузка", test_streaming_loader),
+        ("Кэш данных", test_dataset_cache),
+        ("Экономия памяти", test_memory_profile),
         ("Предобработка", test_preprocessor),
+        ("Предобработка порциями", test_chunked_preprocessing),
+        ("Кэш предобработки", test_preprocessing_cache),
         ("Анализ данных", test_analyzer),
+        ("Накопители статистики", test_statistics_accumulators),
+        ("Матрица корреляций", test_correlation_engine),
+        ("Параллельный анализ", test_concurrent_analysis),
         ("Обучение моделей", test_model_trainer),
+        ("Параллельное обучение", test_parallel_training),
+        ("Кодирование категорий", test_encoders),
+        ("HistGradientBoosting", test_hist_gradient_boosting),
+        ("Бюджет обучения", test_training_budget),
+        ("Кросс-валидация", test_cross_validation),
+        ("Подбор гиперпараметров", test_hyperparameter_search),
+        ("Пути регуляризации", test_regularization_paths),
+        ("Профиль моделей", test_model_profile),
         ("Полный конвейер", test_full_pipeline),
+        ("Предсказание по сырым данным", test_predict_raw_with_fitted_preprocessing),
+        ("Экономный режим", test_memory_lean_pipeline),
     ]
     
     passed = 0
@@ -278,6 +1047,8 @@ def main():
     if test_file.exists():
         test_file.unlink()
         print(f"\n✓ Тестовые файлы очищены")
+    import shutil
+    shutil.rmtree(Path(__file__).parent / '.carml_cache', ignore_errors=True)
 
 
 if __name__ == '__main__':
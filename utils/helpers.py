@@ -5,6 +5,8 @@ from typing import Any, Callable, Iterable, Optional, Union
 
 import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 try:
     from PySide6.QtCore import QObject, QThread, Signal
@@ -39,19 +41,35 @@ class MatplotlibStyler:
 
 
 class FigureConverter:
-    """Преобразует фигуры Matplotlib в пригодные для Qt пиксмапы."""
+    """Преобразует фигуры Matplotlib в PNG и пригодные для Qt пиксмапы."""
 
     @staticmethod
-    def to_pixmap(figure: plt.Figure) -> QPixmap:  # type: ignore
+    def to_png(figure: Figure, dpi: int = 100) -> bytes:
+        """
+        Рендерит фигуру в PNG через холст Agg.
+
+        Не требует pyplot и GUI-потока: подходит для рабочих потоков и процессов.
+        """
+        if not isinstance(figure.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(figure)
+        buffer = BytesIO()
+        figure.savefig(buffer, format="png", dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_png(data: bytes) -> QPixmap:  # type: ignore
+        """Декодирует готовый PNG в QPixmap (единственная работа GUI-потока)."""
         if QPixmap is None:
             raise ImportError(
                 "PySide6 недоступен, поэтому нельзя создать QPixmap."
             ) from _QT_IMPORT_ERROR
-        buffer = BytesIO()
-        figure.savefig(buffer, format="png", dpi=100, bbox_inches='tight')
-        buffer.seek(0)
         pixmap = QPixmap()
-        pixmap.loadFromData(buffer.getvalue(), "PNG")
+        pixmap.loadFromData(data, "PNG")
+        return pixmap
+
+    @staticmethod
+    def to_pixmap(figure: Figure) -> QPixmap:  # type: ignore
+        pixmap = FigureConverter.from_png(FigureConverter.to_png(figure))
         plt.close(figure)
         return pixmap
 